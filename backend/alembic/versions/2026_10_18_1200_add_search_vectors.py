@@ -0,0 +1,52 @@
+"""add search vectors
+
+Revision ID: b0bfdf097050
+Revises: 169a44b639b4
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0bfdf097050'
+down_revision: Union[str, None] = '169a44b639b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('surveys', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.add_column('questions', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('simple', coalesce(text, ''))", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_surveys_search_vector', 'surveys', ['search_vector'], postgresql_using='gin')
+    op.create_index(
+        'ix_surveys_title_trgm', 'surveys', ['title'], postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+    op.create_index('ix_questions_search_vector', 'questions', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_questions_search_vector', table_name='questions')
+    op.drop_index('ix_surveys_title_trgm', table_name='surveys')
+    op.drop_index('ix_surveys_search_vector', table_name='surveys')
+    op.drop_column('questions', 'search_vector')
+    op.drop_column('surveys', 'search_vector')
@@ -0,0 +1,26 @@
+"""add response fingerprints
+
+Revision ID: 5c1e7a93d2f4
+Revises: b0bfdf097050
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a93d2f4'
+down_revision: Union[str, None] = 'b0bfdf097050'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('responses', sa.Column('fingerprint', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('responses', 'fingerprint')
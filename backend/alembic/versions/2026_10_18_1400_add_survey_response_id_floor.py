@@ -0,0 +1,34 @@
+"""add survey response id floor
+
+Revision ID: e2a4c6b8d0f1
+Revises: 5c1e7a93d2f4
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a4c6b8d0f1'
+down_revision: Union[str, None] = '5c1e7a93d2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('surveys', sa.Column('response_id_floor', sa.Integer(), nullable=True))
+    op.execute(
+        'UPDATE surveys SET response_id_floor = coalesce('
+        '(SELECT min(responses.id) - 1 FROM responses WHERE responses.survey_id = surveys.id), '
+        "nextval('responses_id_seq'))"
+    )
+    op.alter_column(
+        'surveys', 'response_id_floor', nullable=False, server_default=sa.text("nextval('responses_id_seq')")
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('surveys', 'response_id_floor')
@@ -0,0 +1,31 @@
+"""add response fingerprint index
+
+Revision ID: a7d3f9c1b5e8
+Revises: e2a4c6b8d0f1
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f9c1b5e8'
+down_revision: Union[str, None] = 'e2a4c6b8d0f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_responses_survey_fingerprint',
+        'responses',
+        ['survey_id', 'fingerprint'],
+        postgresql_where=sa.text('fingerprint IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_responses_survey_fingerprint', table_name='responses')
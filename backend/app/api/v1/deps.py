@@ -1,29 +1,32 @@
 from typing import Annotated
 from jose import JWTError
 from redis.asyncio import Redis
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose.exceptions import ExpiredSignatureError
 
-from app.db.session import get_db, get_redis_db
-from app.models.user_model import User
-from app.models.role_model import Role
+from app.db.session import get_db, get_redis_db, get_replica_db, is_pinned_to_primary, ReadSession
 from app.core.config import TokenType
 from app.core.security import decode_token
-from app.services.token import get_valid_tokens
+from app.schemas.principal_schema import Principal
+from app.services.token import is_session_active
+from app.services.token_cache import is_token_verified, remember_verified_token
+from app.services.principal import get_principal
 from app.services.permission import has_permission
+from app.services.ownership import OwnedResource, resolve_owner
+from app.utils.exceptions import SurveyNotFoundException, QuestionNotFoundException, OptionNotFoundException
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/api/v1/login/access-token')
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/api/v1/login/access-token', auto_error=False)
 
 
 async def get_current_user(
+    request: Request,
     token: Annotated[str, Depends(oauth2_scheme)],
     redis_client: Annotated[Redis, Depends(get_redis_db)],
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
+) -> Principal:
     try:
         payload = decode_token(token)
     except ExpiredSignatureError:
@@ -34,30 +37,47 @@ async def get_current_user(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail='Incorrect token', headers={'WWW-Authenticate': 'Bearer'}
         )
-    user_id = payload['sub']
-    valid_token = await get_valid_tokens(redis_client, user_id, TokenType.ACCESS)
-    if not valid_token or token not in valid_token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail='Invalid credentials',
-            headers={'WWW-Authenticate': 'Bearer'},
-        )
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.direct_permissions), selectinload(User.roles).selectinload(Role.permissions))
-        .where(User.id == int(user_id))
-    )
-    user_in_db = result.scalar_one_or_none()
-    if not user_in_db:
+    user_id = int(payload['sub'])
+    if not is_token_verified(payload['jti'], user_id):
+        if not await is_session_active(redis_client, payload['jti'], user_id, TokenType.ACCESS):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail='Invalid credentials',
+                headers={'WWW-Authenticate': 'Bearer'},
+            )
+        remember_verified_token(payload['jti'], user_id, payload['exp'])
+    principal = await get_principal(redis_client, db, user_id)
+    if not principal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found')
-    if not user_in_db.is_active:
+    if not principal.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='User is inactive')
 
-    return user_in_db
+    request.state.user_id = principal.id
+    return principal
+
+
+async def get_read_db(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+):
+    """Session for read-only endpoints: the replica when one is configured, unless the caller wrote recently."""
+    if ReadSession is None:
+        yield db
+        return
+    if token:
+        try:
+            user_id = int(decode_token(token)['sub'])
+        except JWTError:
+            user_id = None
+        if user_id is not None and await is_pinned_to_primary(user_id):
+            yield db
+            return
+    async for read_db in get_replica_db():
+        yield read_db
 
 
 def require_permission(resource: str, action: str):
-    async def permission_dependency(current_user: Annotated[User, Depends(get_current_user)]):
+    async def permission_dependency(current_user: Annotated[Principal, Depends(get_current_user)]):
         context = {}
         if not await has_permission(current_user, resource, action, context):
             raise HTTPException(
@@ -69,7 +89,7 @@ def require_permission(resource: str, action: str):
 
 
 def require_self_permission(resource: str, action: str):
-    async def permission_dependency(user_id: int, current_user: Annotated[User, Depends(get_current_user)]):
+    async def permission_dependency(user_id: int, current_user: Annotated[Principal, Depends(get_current_user)]):
         """Conditions = {'self': true}"""
         context = {'user_id': current_user.id, 'target_user_id': user_id}
         if not await has_permission(current_user, resource, action, context):
@@ -79,3 +99,90 @@ def require_self_permission(resource: str, action: str):
         return current_user
 
     return permission_dependency
+
+
+async def _get_owned(request: Request, db: AsyncSession, kind: str, entity_id: int) -> OwnedResource:
+    """Resolve once per request; later dependencies and handlers reuse ``request.state.owned_resources``."""
+    if not hasattr(request.state, 'owned_resources'):
+        request.state.owned_resources = {}
+    owned = request.state.owned_resources.get((kind, entity_id))
+    if owned is None:
+        owned = await resolve_owner(db, kind, entity_id)
+        request.state.owned_resources[(kind, entity_id)] = owned
+    return owned
+
+
+async def _get_owner(
+    request: Request, db: AsyncSession, kind: str, entity_id: int, not_found: type[Exception], detail: str
+) -> OwnedResource:
+    try:
+        return await _get_owned(request, db, kind, entity_id)
+    except not_found:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+
+def _check_survey_question(survey_id: int, owned: OwnedResource) -> OwnedResource:
+    """Question addressed through its survey; a question of another survey is reported as missing."""
+    if owned.resource.survey_id != survey_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Question not found')
+    return owned
+
+
+# the owners of write routes are resolved on the primary, those of read routes through ``get_read_db``
+
+async def get_survey_owner(
+    survey_id: int, request: Request, db: Annotated[AsyncSession, Depends(get_db)]
+) -> OwnedResource:
+    return await _get_owner(request, db, 'survey', survey_id, SurveyNotFoundException, 'Survey not found')
+
+
+async def get_question_owner(
+    question_id: int, request: Request, db: Annotated[AsyncSession, Depends(get_db)]
+) -> OwnedResource:
+    return await _get_owner(request, db, 'question', question_id, QuestionNotFoundException, 'Question not found')
+
+
+async def get_read_question_owner(
+    question_id: int, request: Request, db: Annotated[AsyncSession, Depends(get_read_db)]
+) -> OwnedResource:
+    return await _get_owner(request, db, 'question', question_id, QuestionNotFoundException, 'Question not found')
+
+
+async def get_survey_question_owner(
+    survey_id: int, owned: Annotated[OwnedResource, Depends(get_question_owner)]
+) -> OwnedResource:
+    return _check_survey_question(survey_id, owned)
+
+
+async def get_read_survey_question_owner(
+    survey_id: int, owned: Annotated[OwnedResource, Depends(get_read_question_owner)]
+) -> OwnedResource:
+    return _check_survey_question(survey_id, owned)
+
+
+async def get_option_owner(
+    option_id: int, request: Request, db: Annotated[AsyncSession, Depends(get_db)]
+) -> OwnedResource:
+    return await _get_owner(request, db, 'option', option_id, OptionNotFoundException, 'Option not found')
+
+
+async def get_read_option_owner(
+    option_id: int, request: Request, db: Annotated[AsyncSession, Depends(get_read_db)]
+) -> OwnedResource:
+    return await _get_owner(request, db, 'option', option_id, OptionNotFoundException, 'Option not found')
+
+
+def require_owner_permission(resource: str, action: str, get_owner):
+    """Check ``resource:action`` with the creator of the survey that owns the resource resolved by ``get_owner``."""
+    async def permission_dependency(
+        owned: Annotated[OwnedResource, Depends(get_owner)],
+        current_user: Annotated[Principal, Depends(get_current_user)],
+    ):
+        context = {'user_id': current_user.id, 'creator_id': owned.creator_id}
+        if not await has_permission(current_user, resource, action, context):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail=f'Permission denied: {action} on {resource}'
+            )
+        return current_user
+
+    return permission_dependency
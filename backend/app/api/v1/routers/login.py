@@ -11,19 +11,26 @@ from app.schemas.token_schema import TokenResponse, TokenResponseWithType
 from app.schemas.user_schema import UserPasswordUpdate
 from app.db.session import get_db, get_redis_db
 from app.models.user_model import User
+from app.schemas.principal_schema import Principal
 from app.crud.user_crud import user
 from app.schemas.user_schema import UserLogin
 from app.services.auth import authenticate_user
-from app.services.token import get_valid_tokens, update_token_in_redis
-from app.utils.exceptions import WrongPasswordException, UserNotFoundException
+from app.services.token import (
+    create_sessions,
+    is_session_active,
+    get_session_id,
+    revoke_session,
+    revoke_user_sessions,
+)
+from app.utils.exceptions import WrongPasswordException, UserNotFoundException, PasswordHasherBusyException
 from app.core.config import settings, TokenType
-from app.api.v1.deps import get_current_user
+from app.api.v1.deps import get_current_user, oauth2_scheme
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
-    verify_password,
-    get_hashed_password,
+    check_password,
+    hash_password,
 )
 
 router = APIRouter()
@@ -51,6 +58,8 @@ async def login_access_token(
             )
     except WrongPasswordException:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Wrong email/username or password')
+    except PasswordHasherBusyException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Server is busy, try again later')
     if not user_auth.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='User is inactive')
     access_token = create_access_token(
@@ -59,19 +68,10 @@ async def login_access_token(
     refresh_token = create_refresh_token(
         subject=user_auth.id, expires_delta=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
     )
-    await update_token_in_redis(
-        redis_client=redis_client,
-        user=user_auth,
-        token=access_token,
-        token_type=TokenType.ACCESS,
-        expires_delta=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-    )
-    await update_token_in_redis(
+    await create_sessions(
         redis_client=redis_client,
-        user=user_auth,
-        token=refresh_token,
-        token_type=TokenType.REFRESH,
-        expires_delta=settings.REFRESH_TOKEN_EXPIRE_MINUTES,
+        user_id=user_auth.id,
+        tokens={TokenType.ACCESS: access_token, TokenType.REFRESH: refresh_token},
     )
     return TokenResponseWithType(access_token=access_token, token_type='bearer')
 
@@ -86,24 +86,20 @@ async def create_new_access_token(
         payload = decode_token(body.refresh_token)
     except ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Refresh token is expired')
-    if payload['type'] == 'refresh':
-        user_id = payload['sub']
-        valid_refresh_token = await get_valid_tokens(
-            redis_client=redis_client, user_id=user_id, token_type=TokenType.REFRESH
-        )
-        if not valid_refresh_token or body.refresh_token not in valid_refresh_token:
+    if payload['type'] == TokenType.REFRESH:
+        user_id = int(payload['sub'])
+        if not await is_session_active(redis_client, payload['jti'], user_id, TokenType.REFRESH):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail='Wrong credentials or invalid refresh token'
             )
-        user_in_db: User = await user.get(db=db, id=int(user_id))
+        user_in_db: User = await user.get(db=db, id=user_id)
         if user_in_db.is_active:
             access_token = create_access_token(user_id, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-            await update_token_in_redis(
+            await create_sessions(
                 redis_client=redis_client,
-                user=user_in_db,
-                token=access_token,
-                token_type=TokenType.ACCESS,
-                expires_delta=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+                user_id=user_id,
+                tokens={TokenType.ACCESS: access_token},
+                sid=await get_session_id(redis_client, payload['jti']),
             )
         else:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='User is inactive')
@@ -117,22 +113,51 @@ async def change_password(
     redis_client: Annotated[Redis, Depends(get_redis_db)],
     db: Annotated[AsyncSession, Depends(get_db)],
     password_payload: UserPasswordUpdate,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
 ):
-    if not verify_password(password_payload.current_password, current_user.hashed_password):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Current password is wrong')
-
-    new_password_hashed = get_hashed_password(password_payload.new_password)
+    user_in_db = await user.get_user(db=db, user_id=current_user.id)
+    try:
+        if not await check_password(password_payload.current_password, user_in_db.hashed_password):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Current password is wrong')
+        new_password_hashed = await hash_password(password_payload.new_password)
+    except PasswordHasherBusyException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Server is busy, try again later')
     await user.update_user(user_id=current_user.id, obj_in={'hashed_password': new_password_hashed}, db=db)
 
     access_token = create_access_token(current_user.id, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    refresh_token = create_refresh_token(current_user.id, timedelta(minutes=settings.REFREsH_TOKEN_EXPIRE_MINUTES))
+    refresh_token = create_refresh_token(current_user.id, timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES))
 
-    await update_token_in_redis(
-        redis_client, current_user, access_token, TokenType.ACCESS, settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    # a new password logs every device out, this one included, and hands the caller a fresh session
+    await revoke_user_sessions(redis_client, current_user.id)
+    await create_sessions(
+        redis_client, current_user.id, {TokenType.ACCESS: access_token, TokenType.REFRESH: refresh_token}
     )
-    await update_token_in_redis(
-        redis_client, current_user, refresh_token, TokenType.REFRESH, settings.REFRESH_TOKEN_EXPIRE_MINUTES
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Password has been changed successfully',
+            'access_token': access_token,
+            'refresh_token': refresh_token,
+            'token_type': 'bearer',
+        },
     )
 
-    return JSONResponse(status_code=status.HTTP_200_OK, content={'message': 'Password has been changed successfully'})
+
+@router.post('/logout')
+async def logout(
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+):
+    await revoke_session(redis_client, current_user.id, decode_token(token)['jti'])
+    return JSONResponse(status_code=status.HTTP_200_OK, content={'message': 'Logged out'})
+
+
+@router.post('/logout-all')
+async def logout_all(
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+):
+    await revoke_user_sessions(redis_client, current_user.id)
+    return JSONResponse(status_code=status.HTTP_200_OK, content={'message': 'Logged out from all devices'})
@@ -1,21 +1,23 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.crud.permission_crud import permission
-from app.models.user_model import User
-from app.schemas.permission_schema import PermissionCreate, PermissionUpdate, PermissionResponse
+from app.schemas.principal_schema import Principal
+from app.schemas.permission_schema import PermissionCreate, PermissionUpdate, PermissionResponse, PermissionSort
 from app.schemas.role_schema import RoleDetails
-from app.api.v1.deps import require_permission
+from app.api.v1.deps import require_permission, get_read_db
 from app.utils.exceptions import (
     PermissionNotFoundException,
     NotFoundException,
     RoleNotFoundException,
     PermissionAlreadyAssignedException,
     RoleHasNoThisPermissionException,
+    InvalidCursorException,
 )
+from app.utils.pagination import PageLimit, PageSkip, set_next_cursor
 
 router = APIRouter()
 
@@ -24,7 +26,7 @@ router = APIRouter()
 async def create_permission(
     obj_in: PermissionCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('permission', 'create'))],
+    current_user: Annotated[Principal, Depends(require_permission('permission', 'create'))],
 ):
     try:
         permission_create = await permission.create_permission(db=db, obj_in=obj_in)
@@ -35,19 +37,32 @@ async def create_permission(
 
 @router.get('/', response_model=list[PermissionResponse], status_code=status.HTTP_200_OK)
 async def get_permissions(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('permission', 'list'))],
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('permission', 'list'))],
+    skip: PageSkip = 0,
+    limit: PageLimit = 100,
+    cursor: str | None = None,
+    sort: PermissionSort = 'id',
 ):
-    return await permission.get_permissions(db=db, skip=skip, limit=limit)
+    """Pass the `X-Next-Cursor` header of a page as `cursor` to get the next one. `skip` is kept for compatibility."""
+    if skip:
+        return await permission.get_permissions(db=db, skip=skip, limit=limit, current_user=current_user)
+    try:
+        items, next_cursor = await permission.get_permissions_page(
+            db=db, cursor=cursor, sort=sort, limit=limit, current_user=current_user
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    set_next_cursor(response, next_cursor)
+    return items
 
 
 @router.get('/{permission_id}', response_model=PermissionResponse, status_code=status.HTTP_200_OK)
 async def get_permission(
     permission_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('permission', 'read'))],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('permission', 'read'))],
 ):
     try:
         permission_in_db = await permission.get_permission(db=db, permission_id=permission_id)
@@ -61,7 +76,7 @@ async def update_permission(
     permission_id: int,
     obj_in: PermissionUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('permission', 'update'))],
+    current_user: Annotated[Principal, Depends(require_permission('permission', 'update'))],
 ):
     try:
         permission_update = await permission.update_permission(db=db, permission_id=permission_id, obj_in=obj_in)
@@ -74,7 +89,7 @@ async def update_permission(
 async def delete_permission(
     permission_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('permission', 'delete'))],
+    current_user: Annotated[Principal, Depends(require_permission('permission', 'delete'))],
 ):
     try:
         permission_delete = await permission.delete_permission(db=db, permission_id=permission_id)
@@ -88,7 +103,7 @@ async def assign_permission_to_role(
     permission_id: int,
     role_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('permission', 'assign'))],
+    current_user: Annotated[Principal, Depends(require_permission('permission', 'assign'))],
 ):
     try:
         permission_assignment = await permission.assign_permission_to_role(
@@ -108,7 +123,7 @@ async def remove_permission_from_role(
     permission_id: int,
     role_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('permission', 'remove'))],
+    current_user: Annotated[Principal, Depends(require_permission('permission', 'remove'))],
 ):
     try:
         permission_remove = await permission.remove_permission_from_role(
@@ -1,15 +1,32 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from redis.asyncio import Redis
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_db, get_redis_db
 from app.crud.question_crud import question
-from app.crud.survey_crud import survey
-from app.models.user_model import User
-from app.schemas.question_schema import QuestionResponse, QuestionCreate, QuestionUpdate, QuestionDetails
-from app.api.v1.deps import get_current_user, has_permission
-from app.utils.exceptions import QuestionNotFoundException, NotFoundException, SurveyNotFoundException
+from app.schemas.principal_schema import Principal
+from app.schemas.question_schema import (
+    QuestionResponse,
+    QuestionCreate,
+    QuestionUpdate,
+    QuestionDetails,
+    QuestionSearchResult,
+)
+from app.services.definitions import get_definition
+from app.services.ownership import OwnedResource
+from app.api.v1.deps import (
+    get_current_user,
+    get_read_db,
+    require_owner_permission,
+    get_survey_owner,
+    get_survey_question_owner,
+    get_read_survey_question_owner,
+)
+from app.utils.exceptions import QuestionNotFoundException, NotFoundException, InvalidCursorException
+from app.utils.pagination import PageLimit, set_next_cursor
+from app.utils.etag import etag_response
 
 router = APIRouter()
 
@@ -19,74 +36,72 @@ async def create_question(
     obj_in: QuestionCreate,
     survey_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(require_owner_permission('question', 'create', get_survey_owner))],
 ):
     try:
-        survey_in_db = await survey.get_survey(db=db, survey_id=survey_id)
-        if not await has_permission(
-            current_user, 'question', 'create', {'user_id': current_user.id, 'creator_id': survey_in_db.creator_id}
-        ):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Permission denied: create on question')
         question_create = await question.create_question(db=db, survey_id=survey_id, obj_in=obj_in)
     except IntegrityError:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Question already exists')
-    except SurveyNotFoundException:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Survey not found')
     return question_create
 
 
+@router.get('/search', response_model=list[QuestionSearchResult], status_code=status.HTTP_200_OK)
+async def search_questions(
+    q: str,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    limit: PageLimit = 100,
+    cursor: str | None = None,
+):
+    """Ranked full-text search over the questions of every survey you may read."""
+    try:
+        items, next_cursor = await question.search_questions(
+            db=db, query=q, cursor=cursor, limit=limit, current_user=current_user
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    set_next_cursor(response, next_cursor)
+    return items
+
+
 @router.get('/{question_id}', response_model=QuestionResponse, status_code=status.HTTP_200_OK)
 async def get_question(
-    survey_id: int,
-    question_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    owned: Annotated[OwnedResource, Depends(get_read_survey_question_owner)],
+    current_user: Annotated[
+        Principal, Depends(require_owner_permission('question', 'read', get_read_survey_question_owner))
+    ],
 ):
-    try:
-        survey_in_db = await survey.get_survey(db=db, survey_id=survey_id)
-        if not await has_permission(
-            current_user, 'question', 'read', {'user_id': current_user.id, 'creator_id': survey_in_db.creator_id}
-        ):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Permission denied: read on question')
-        question_in_db = await question.get_question(db=db, question_id=question_id)
-    except QuestionNotFoundException:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Question not found')
-    return question_in_db
+    return owned.resource
 
 
 @router.get('/{question_id}/options', response_model=QuestionDetails, status_code=status.HTTP_200_OK)
 async def get_question_options(
-    survey_id: int,
     question_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    request: Request,
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[
+        Principal, Depends(require_owner_permission('question', 'details', get_read_survey_question_owner))
+    ],
 ):
+    """Served from the survey definition cache with an ETag; send it back in `If-None-Match` to get a 304."""
     try:
-        survey_in_db = await survey.get_survey(db=db, survey_id=survey_id)
-        if not await has_permission(
-            current_user, 'question', 'details', {'user_id': current_user.id, 'creator_id': survey_in_db.creator_id}
-        ):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Permission denied: details on question')
-        question_in_db = await question.get_question(db=db, question_id=question_id)
+        body, etag = await get_definition(redis_client, 'options', question_id)
     except QuestionNotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Question not found')
-    return question_in_db
+    return etag_response(request, body, etag)
 
 
 @router.put('/{question_id}', response_model=QuestionResponse, status_code=status.HTTP_200_OK)
 async def update_question(
-    survey_id: int,
     question_id: int,
     obj_in: QuestionUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[
+        Principal, Depends(require_owner_permission('question', 'update', get_survey_question_owner))
+    ],
 ):
     try:
-        survey_in_db = await survey.get_survey(db=db, survey_id=survey_id)
-        if not await has_permission(
-            current_user, 'question', 'update', {'user_id': current_user.id, 'creator_id': survey_in_db.creator_id}
-        ):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Permission denied: update on question')
         question_update = await question.update_question(db=db, question_id=question_id, obj_in=obj_in)
     except QuestionNotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Question not found')
@@ -95,17 +110,13 @@ async def update_question(
 
 @router.delete('/{question_id}', status_code=status.HTTP_204_NO_CONTENT)
 async def delete_question(
-    survey_id: int,
     question_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[
+        Principal, Depends(require_owner_permission('question', 'delete', get_survey_question_owner))
+    ],
 ):
     try:
-        survey_in_db = await survey.get_survey(db=db, survey_id=survey_id)
-        if not await has_permission(
-            current_user, 'question', 'delete', {'user_id': current_user.id, 'creator_id': survey_in_db.creator_id}
-        ):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Permission denied: delete on question')
         question_delete = await question.delete_question(db=db, question_id=question_id)
     except NotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Question not found')
@@ -1,36 +1,178 @@
+import json
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from redis.asyncio import Redis
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_db, get_redis_db
 from app.crud.response_crud import response
-from app.models.user_model import User
-from app.schemas.response_schema import ResponseResponse, ResponseCreate
-from app.utils.exceptions import ResponseNotFoundException
-from app.api.v1.deps import get_current_user
+from app.schemas.principal_schema import Principal
+from app.schemas.response_schema import (
+    ResponseResponse,
+    ResponseCreate,
+    ResponseSubmit,
+    ResponseWithAnswers,
+    ResponsePageItem,
+    ResponseSort,
+)
+from app.services.ingest import ingest_responses
+from app.services.idempotency import replay_key, run_once
+from app.utils.exceptions import (
+    ResponseNotFoundException,
+    InvalidCursorException,
+    DuplicateResponseException,
+    InvalidAnswersException,
+    IdempotencyKeyReusedException,
+    IdempotencyKeyInProgressException,
+)
+from app.utils.pagination import PageLimit, set_next_cursor
+from app.utils.streaming import BodyStreamingResponse
+from app.api.v1.deps import (
+    get_current_user,
+    get_read_db,
+    require_permission,
+    require_owner_permission,
+    get_survey_owner,
+)
 
 router = APIRouter()
 
 
+async def submit_once(
+    redis_client: Redis,
+    http_response: Response,
+    current_user: Principal,
+    scope: str,
+    key: str | None,
+    obj_in,
+    call,
+):
+    """Honour an `Idempotency-Key`: the first request runs, retries get its result with `Idempotent-Replayed`."""
+    if key is None:
+        return await call()
+    try:
+        body, replayed = await run_once(redis_client, replay_key(current_user.id, scope, key), obj_in, call)
+    except IdempotencyKeyReusedException:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail='Idempotency key reused with a different body'
+        )
+    except IdempotencyKeyInProgressException:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail='A request with this idempotency key is still in progress'
+        )
+    if replayed:
+        http_response.headers['Idempotent-Replayed'] = 'true'
+    return body
+
+
 @router.post('/', response_model=ResponseResponse, status_code=status.HTTP_201_CREATED)
 async def create_response(
     obj_in: ResponseCreate,
+    http_response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    idempotency_key: Annotated[str | None, Header(max_length=255)] = None,
 ):
+    async def create():
+        try:
+            response_create = await response.create_response(db=db, obj_in=obj_in, current_user=current_user)
+        except IntegrityError:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Response already exists')
+        return ResponseResponse.model_validate(response_create)
+
+    return await submit_once(redis_client, http_response, current_user, 'create', idempotency_key, obj_in, create)
+
+
+@router.get('/', response_model=list[ResponsePageItem], status_code=status.HTTP_200_OK)
+async def get_survey_responses(
+    survey_id: int,
+    http_response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'details'))],
+    submitted_from: datetime | None = None,
+    submitted_to: datetime | None = None,
+    user_id: int | None = None,
+    include_answers: bool = False,
+    limit: PageLimit = 100,
+    cursor: str | None = None,
+    sort: ResponseSort = 'submitted_at',
+):
+    """Pass the `X-Next-Cursor` header of a page as `cursor` to get the next one. `submitted_to` is exclusive."""
     try:
-        response_create = await response.create_response(db=db, obj_in=obj_in)
-    except IntegrityError:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Response already exists')
-    return response_create
+        items, next_cursor = await response.get_survey_responses_page(
+            db=db,
+            survey_id=survey_id,
+            cursor=cursor,
+            sort=sort,
+            limit=limit,
+            submitted_from=submitted_from,
+            submitted_to=submitted_to,
+            user_id=user_id,
+            include_answers=include_answers,
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    set_next_cursor(http_response, next_cursor)
+    if include_answers:
+        return items
+    # answers were not loaded, keep them out of the serialized rows
+    return [ResponseResponse.model_validate(item) for item in items]
+
+
+@router.post('/submit', response_model=ResponseWithAnswers, status_code=status.HTTP_201_CREATED)
+async def submit_response(
+    obj_in: ResponseSubmit,
+    http_response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    idempotency_key: Annotated[str | None, Header(max_length=255)] = None,
+):
+    """Submit a response together with all of its answers in a single transaction.
+
+    Pass a stable device `fingerprint` to have repeat submissions from that device refused with a 409. Retries
+    sent with the same `Idempotency-Key` header get the first result back instead of submitting again."""
+
+    async def submit():
+        try:
+            response_submit = await response.submit_response(db=db, obj_in=obj_in, current_user=current_user)
+        except IntegrityError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Unknown survey, question or option')
+        except InvalidAnswersException as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        except DuplicateResponseException:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='This device already answered the survey')
+        return ResponseWithAnswers.model_validate(response_submit)
+
+    return await submit_once(redis_client, http_response, current_user, 'submit', idempotency_key, obj_in, submit)
+
+
+@router.post('/import', status_code=status.HTTP_200_OK)
+async def import_responses(
+    survey_id: int,
+    request: Request,
+    current_user: Annotated[Principal, Depends(require_owner_permission('response', 'import', get_survey_owner))],
+):
+    """Bulk import responses from an NDJSON body, one `{user_id, submitted_at, answers, fingerprint}` object per line.
+
+    Streams back NDJSON events: `error` per rejected line, `progress` per stored chunk and a final `summary`. The
+    body is parsed and stored while it is still being received."""
+
+    async def events():
+        async for event in ingest_responses(survey_id, request.stream()):
+            yield json.dumps(event) + '\n'
+
+    return BodyStreamingResponse(events(), media_type='application/x-ndjson')
 
 
 @router.get('/{response_id}', response_model=ResponseResponse, status_code=status.HTTP_200_OK)
 async def get_response(
     response_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
 ):
     try:
         response_in_db = await response.get_response(db=db, response_id=response_id)
@@ -1,21 +1,23 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.crud.role_crud import role
-from app.models.user_model import User
-from app.schemas.role_schema import RoleResponse, RoleDetails, RoleCreate, RoleUpdate
+from app.schemas.principal_schema import Principal
+from app.schemas.role_schema import RoleResponse, RoleDetails, RoleCreate, RoleUpdate, RoleSort
 from app.schemas.user_schema import UserDetails
-from app.api.v1.deps import require_permission
+from app.api.v1.deps import require_permission, get_read_db
 from app.utils.exceptions import (
     RoleNotFoundException,
     NotFoundException,
     UserNotFoundException,
     RoleAlreadyAssignedException,
     UserHasNoThisRoleException,
+    InvalidCursorException,
 )
+from app.utils.pagination import PageLimit, PageSkip, set_next_cursor
 
 router = APIRouter()
 
@@ -24,7 +26,7 @@ router = APIRouter()
 async def create_role(
     obj_in: RoleCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('role', 'create'))],
+    current_user: Annotated[Principal, Depends(require_permission('role', 'create'))],
 ):
     try:
         role_create = await role.create_role(db=db, obj_in=obj_in)
@@ -36,8 +38,8 @@ async def create_role(
 @router.get('/{role_id}', response_model=RoleResponse, status_code=status.HTTP_200_OK)
 async def get_role(
     role_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('role', 'read'))],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('role', 'read'))],
 ):
     try:
         role_in_db = await role.get_role(db=db, role_id=role_id)
@@ -48,19 +50,32 @@ async def get_role(
 
 @router.get('/', response_model=list[RoleResponse], status_code=status.HTTP_200_OK)
 async def get_roles(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('role', 'list'))],
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('role', 'list'))],
+    skip: PageSkip = 0,
+    limit: PageLimit = 100,
+    cursor: str | None = None,
+    sort: RoleSort = 'id',
 ):
-    return await role.get_roles(db=db, skip=skip, limit=limit)
+    """Pass the `X-Next-Cursor` header of a page as `cursor` to get the next one. `skip` is kept for compatibility."""
+    if skip:
+        return await role.get_roles(db=db, skip=skip, limit=limit, current_user=current_user)
+    try:
+        items, next_cursor = await role.get_roles_page(
+            db=db, cursor=cursor, sort=sort, limit=limit, current_user=current_user
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    set_next_cursor(response, next_cursor)
+    return items
 
 
 @router.get('/{role_id}/details', response_model=RoleDetails, status_code=status.HTTP_200_OK)
 async def get_role_detailed(
     role_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('role', 'details'))],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('role', 'details'))],
 ):
     try:
         role_in_db = await role.get_role(db=db, role_id=role_id)
@@ -74,7 +89,7 @@ async def update_role(
     role_id: int,
     obj_in: RoleUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('role', 'update'))],
+    current_user: Annotated[Principal, Depends(require_permission('role', 'update'))],
 ):
     try:
         role_update = await role.update_role(db=db, role_id=role_id, obj_in=obj_in)
@@ -87,7 +102,7 @@ async def update_role(
 async def delete_role(
     role_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('role', 'delete'))],
+    current_user: Annotated[Principal, Depends(require_permission('role', 'delete'))],
 ):
     try:
         role_delete = await role.delete_role(db=db, role_id=role_id)
@@ -101,7 +116,7 @@ async def assign_role_to_user(
     role_id: int,
     user_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('role', 'assign'))],
+    current_user: Annotated[Principal, Depends(require_permission('role', 'assign'))],
 ):
     try:
         role_assignment = await role.assign_role_to_user(db=db, role_id=role_id, user_id=user_id)
@@ -119,7 +134,7 @@ async def remove_role_from_user(
     role_id: int,
     user_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('role', 'remove'))],
+    current_user: Annotated[Principal, Depends(require_permission('role', 'remove'))],
 ):
     try:
         role_remove = await role.remove_role_from_user(db=db, role_id=role_id, user_id=user_id)
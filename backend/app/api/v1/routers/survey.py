@@ -1,20 +1,48 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_db, get_redis_db
 from app.crud.survey_crud import survey
-from app.models.user_model import User
+from app.schemas.principal_schema import Principal
 from app.schemas.survey_schema import (
     SurveyUpdate,
     SurveyCreate,
     SurveyDetails,
     SurveyResponse,
     SurveyDetailsWithResponses,
+    SurveySort,
+    SurveyResults,
+    ExportFormat,
+    Crosstab,
+    SurveyTimeline,
+    TimelineBucket,
+    RespondentEstimate,
 )
-from app.utils.exceptions import SurveyNotFoundException, NotFoundException
-from app.api.v1.deps import require_permission, get_current_user
+from app.services.results import get_survey_results
+from app.services.definitions import get_definition
+from app.services.crosstab import get_crosstab
+from app.services.segments import get_segment_results
+from app.services.timeline import get_timeline
+from app.services.respondents import HLL_STANDARD_ERROR, count_respondents
+from app.services.export import EXPORTERS, EXPORT_MEDIA_TYPES, ensure_format_available
+from app.utils.exceptions import (
+    SurveyNotFoundException,
+    NotFoundException,
+    InvalidCursorException,
+    ExportFormatUnavailableException,
+    QuestionNotFoundException,
+    NotChoiceQuestionException,
+    InvalidSegmentException,
+    InvalidTimelineRangeException,
+)
+from app.utils.pagination import PageLimit, PageSkip, set_next_cursor
+from app.utils.etag import etag_response
+from app.api.v1.deps import require_permission, get_current_user, get_read_db
 
 router = APIRouter()
 
@@ -23,7 +51,7 @@ router = APIRouter()
 async def create_survey(
     obj_in: SurveyCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('survey', 'create'))],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'create'))],
 ):
     """Create a survey with a title (amount for characters is min. 3 and max. 64) and description."""
     try:
@@ -35,52 +63,102 @@ async def create_survey(
 
 @router.get('/', response_model=list[SurveyResponse], status_code=status.HTTP_200_OK)
 async def get_surveys(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('survey', 'list'))],
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'list'))],
+    skip: PageSkip = 0,
+    limit: PageLimit = 100,
+    cursor: str | None = None,
+    sort: SurveySort = 'id',
 ):
-    return await survey.get_surveys(db=db, skip=skip, limit=limit)
+    """Pass the `X-Next-Cursor` header of a page as `cursor` to get the next one. `skip` is kept for compatibility."""
+    if skip:
+        return await survey.get_surveys(db=db, skip=skip, limit=limit, current_user=current_user)
+    try:
+        items, next_cursor = await survey.get_surveys_page(
+            db=db, cursor=cursor, sort=sort, limit=limit, current_user=current_user
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    set_next_cursor(response, next_cursor)
+    return items
 
 
 @router.get('/list/', response_model=list[SurveyResponse], status_code=status.HTTP_200_OK)  # todo: test
 async def get_user_surveys(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    skip: PageSkip = 0,
+    limit: PageLimit = 100,
+    cursor: str | None = None,
+    sort: SurveySort = 'id',
+):
+    """Pass the `X-Next-Cursor` header of a page as `cursor` to get the next one. `skip` is kept for compatibility."""
+    if skip:
+        return await survey.get_user_surveys(db=db, skip=skip, limit=limit, current_user=current_user)
+    try:
+        items, next_cursor = await survey.get_user_surveys_page(
+            db=db, cursor=cursor, sort=sort, limit=limit, current_user=current_user
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    set_next_cursor(response, next_cursor)
+    return items
+
+
+@router.get('/search', response_model=list[SurveyResponse], status_code=status.HTTP_200_OK)
+async def search_surveys(
+    q: str,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'list'))],
+    limit: PageLimit = 100,
+    cursor: str | None = None,
 ):
-    return await survey.get_user_surveys(skip=skip, limit=limit, db=db, current_user=current_user)
+    """Ranked full-text search over titles and descriptions, tolerant to typos in titles. Paged like the list."""
+    try:
+        items, next_cursor = await survey.search_surveys(
+            db=db, query=q, cursor=cursor, limit=limit, current_user=current_user
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    set_next_cursor(response, next_cursor)
+    return items
 
 
 @router.get('/{survey_id}', response_model=SurveyResponse, status_code=status.HTTP_200_OK)
-async def get_survey(survey_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_survey(survey_id: int, request: Request, redis_client: Annotated[Redis, Depends(get_redis_db)]):
+    """Served from the survey definition cache with an ETag; send it back in `If-None-Match` to get a 304."""
     try:
-        survey_in_db = await survey.get_survey(db=db, survey_id=survey_id)
+        body, etag = await get_definition(redis_client, 'survey', survey_id)
     except SurveyNotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Survey not found')
-    return survey_in_db
+    return etag_response(request, body, etag)
 
 
 @router.get('/{survey_id}/questions', response_model=SurveyDetails, status_code=status.HTTP_200_OK)
 async def get_survey_questions(
     survey_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('survey', 'details'))],
+    request: Request,
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'details'))],
 ):
+    """Served from the survey definition cache with an ETag; send it back in `If-None-Match` to get a 304."""
     try:
-        survey_in_db = await survey.get_survey(db=db, survey_id=survey_id)
+        body, etag = await get_definition(redis_client, 'questions', survey_id)
     except SurveyNotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Survey not found')
-    return survey_in_db
+    return etag_response(request, body, etag)
 
 
 @router.get('/{survey_id}/responses', response_model=SurveyDetailsWithResponses, status_code=status.HTTP_200_OK)
 async def get_survey_with_responses(
     survey_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('survey', 'details'))],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'details'))],
 ):
+    """Loads every response at once; use `GET /responses/?survey_id=` to page through large surveys."""
     try:
         survey_with_responses = await survey.get_survey_with_responses(db=db, survey_id=survey_id)
     except SurveyNotFoundException:
@@ -88,12 +166,123 @@ async def get_survey_with_responses(
     return survey_with_responses
 
 
+@router.get('/{survey_id}/results', response_model=SurveyResults, status_code=status.HTTP_200_OK)
+async def get_results(
+    survey_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'details'))],
+    segment: str | None = None,
+):
+    """Option counts and percentages per question, aggregated in the database and cached briefly.
+
+    `segment` restricts them to respondents matching an expression over option ids, e.g. `3 and (7 or not 8)`."""
+    try:
+        if segment:
+            survey_results = await get_segment_results(redis_client, db, survey_id, segment)
+        else:
+            survey_results = await get_survey_results(redis_client, db, survey_id)
+    except SurveyNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Survey not found')
+    except InvalidSegmentException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid segment')
+    return survey_results
+
+
+@router.get('/{survey_id}/crosstab', response_model=Crosstab, status_code=status.HTTP_200_OK)
+async def get_survey_crosstab(
+    survey_id: int,
+    rows: int,
+    cols: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'details'))],
+    segment: str | None = None,
+):
+    """Contingency table of two choice questions (`rows` and `cols` are question ids) with percentages and
+    chi-square. `segment` works as on the results endpoint."""
+    try:
+        crosstab = await get_crosstab(redis_client, db, survey_id, rows, cols, segment)
+    except SurveyNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Survey not found')
+    except QuestionNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Question not found in this survey')
+    except NotChoiceQuestionException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Only choice questions can be crossed')
+    except InvalidSegmentException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid segment')
+    return crosstab
+
+
+@router.get('/{survey_id}/timeline', response_model=SurveyTimeline, status_code=status.HTTP_200_OK)
+async def get_survey_timeline(
+    survey_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'details'))],
+    bucket: TimelineBucket = 'hour',
+    start: datetime | None = None,
+    end: datetime | None = None,
+):
+    """Responses per minute, hour or day over `[start, end)`, read from rollups kept up to date on submission.
+
+    Defaults to the last hour, two days or thirty days; minute buckets only reach back a couple of days."""
+    try:
+        timeline = await get_timeline(redis_client, db, survey_id, bucket, start, end)
+    except SurveyNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Survey not found')
+    except InvalidTimelineRangeException as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return timeline
+
+
+@router.get('/{survey_id}/respondents', response_model=RespondentEstimate, status_code=status.HTTP_200_OK)
+async def get_respondents(
+    survey_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    redis_client: Annotated[Redis, Depends(get_redis_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'details'))],
+):
+    """Estimated number of distinct respondents: users, else device fingerprints, else single responses."""
+    try:
+        await survey.get_survey(db=db, survey_id=survey_id)
+    except SurveyNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Survey not found')
+    return RespondentEstimate(
+        survey_id=survey_id,
+        unique_respondents=await count_respondents(redis_client, db, survey_id),
+        standard_error=HLL_STANDARD_ERROR,
+    )
+
+
+@router.get('/{survey_id}/export', status_code=status.HTTP_200_OK)
+async def export_responses(
+    survey_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'details'))],
+    format: ExportFormat = 'csv',
+):
+    """Stream every response as one row with a column per question, read in batches from a server-side cursor."""
+    try:
+        await survey.get_survey(db=db, survey_id=survey_id)
+        ensure_format_available(format)
+    except SurveyNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Survey not found')
+    except ExportFormatUnavailableException:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail='Parquet export requires pyarrow')
+    return StreamingResponse(
+        EXPORTERS[format](survey_id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="survey_{survey_id}.{format}"'},
+    )
+
+
 @router.put('/{survey_id}', response_model=SurveyResponse, status_code=status.HTTP_200_OK)
 async def update_survey(
     survey_id: int,
     obj_in: SurveyUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('survey', 'update'))],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'update'))],
 ):
     try:
         survey_update = await survey.update_survey(db=db, survey_id=survey_id, obj_in=obj_in)
@@ -106,7 +295,7 @@ async def update_survey(
 async def delete_survey(
     survey_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('survey', 'delete'))],
+    current_user: Annotated[Principal, Depends(require_permission('survey', 'delete'))],
 ):
     try:
         survey_delete = await survey.delete_survey(db=db, survey_id=survey_id)
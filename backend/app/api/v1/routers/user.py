@@ -1,13 +1,19 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
-from app.models.user_model import User
+from app.schemas.principal_schema import Principal
 from app.crud.user_crud import user
-from app.schemas.user_schema import UserResponse, UserCreate, UserUpdate, UserDetails
-from app.utils.exceptions import UserNotFoundException, NotFoundException
-from app.api.v1.deps import require_self_permission, require_permission, get_current_user
+from app.schemas.user_schema import UserResponse, UserCreate, UserUpdate, UserDetails, UserSort
+from app.utils.exceptions import (
+    UserNotFoundException,
+    NotFoundException,
+    PasswordHasherBusyException,
+    InvalidCursorException,
+)
+from app.utils.pagination import PageLimit, PageSkip, set_next_cursor
+from app.api.v1.deps import require_self_permission, require_permission, get_current_user, get_read_db
 
 router = APIRouter()
 
@@ -25,13 +31,17 @@ async def create_user(obj_in: UserCreate, db: Annotated[AsyncSession, Depends(ge
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail='User with this email or username already exists'
         )
-    return await user.create_user(obj_in=obj_in, db=db)
+    try:
+        user_create = await user.create_user(obj_in=obj_in, db=db)
+    except PasswordHasherBusyException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Server is busy, try again later')
+    return user_create
 
 
 @router.get('/me', response_model=UserResponse, status_code=status.HTTP_200_OK)
 async def get_current_user_info(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
     try:
         user_in_db = await user.get_user(db=db, user_id=current_user.id)
@@ -42,19 +52,32 @@ async def get_current_user_info(
 
 @router.get('/', response_model=list[UserResponse], status_code=status.HTTP_200_OK)
 async def get_users(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('user', 'list'))],
-    skip: int = 0,
-    limit: int = 100
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('user', 'list'))],
+    skip: PageSkip = 0,
+    limit: PageLimit = 100,
+    cursor: str | None = None,
+    sort: UserSort = 'id',
 ):
-    return await user.get_users(db=db, skip=skip, limit=limit)
+    """Pass the `X-Next-Cursor` header of a page as `cursor` to get the next one. `skip` is kept for compatibility."""
+    if skip:
+        return await user.get_users(db=db, skip=skip, limit=limit, current_user=current_user)
+    try:
+        items, next_cursor = await user.get_users_page(
+            db=db, cursor=cursor, sort=sort, limit=limit, current_user=current_user
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    set_next_cursor(response, next_cursor)
+    return items
 
 
 @router.get('/{user_id}', response_model=UserResponse, status_code=status.HTTP_200_OK)
 async def get_user(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_self_permission('user', 'read'))]
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_self_permission('user', 'read'))]
 ):
     try:
         user_in_db = await user.get_user(db=db, user_id=user_id)
@@ -66,8 +89,8 @@ async def get_user(
 @router.get('/{user_id}/details', response_model=UserDetails, status_code=status.HTTP_200_OK)
 async def get_user_detailed(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_self_permission('user', 'details'))]
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_self_permission('user', 'details'))]
 ):
     """Get detailed user information with assigned roles and direct permissions."""
     try:
@@ -80,8 +103,8 @@ async def get_user_detailed(
 @router.get('/identifier/{identifier}', response_model=UserResponse, status_code=status.HTTP_200_OK)
 async def get_user_by_email_or_username(
     identifier: str,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_permission('user', 'details'))],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(require_permission('user', 'details'))],
 ):
     try:
         user_by_email_or_username = await user.get_user_by_email_or_username(db=db, identifier=identifier)
@@ -95,7 +118,7 @@ async def update_user(
     user_id: int,
     obj_in: UserUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_self_permission('user', 'update'))]
+    current_user: Annotated[Principal, Depends(require_self_permission('user', 'update'))]
 ):
     try:
         user_update = await user.update_user(db=db, user_id=user_id, obj_in=obj_in)
@@ -108,7 +131,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_self_permission('user', 'delete'))]
+    current_user: Annotated[Principal, Depends(require_self_permission('user', 'delete'))]
 ):
     if user_id == 1:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Admin is undeletable')
@@ -21,12 +21,64 @@ class Settings(BaseSettings):
     DATABASE_USER: str
     DATABASE_PASSWORD: str
     DATABASE_NAME: str
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 30
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100
+    DATABASE_COMMAND_TIMEOUT_SECONDS: float = 30
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 30000
+    DATABASE_REPLICA_URL: PostgresDsn | None = None
+    READ_YOUR_WRITES_SECONDS: int = 5
 
     REDIS_URL: RedisDsn
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT_SECONDS: float = 5
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 5
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS: float = 2
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 42069
 
+    TOKEN_LOCAL_CACHE_ENABLED: bool = False
+    TOKEN_LOCAL_CACHE_SIZE: int = 10000
+    TOKEN_LOCAL_CACHE_TTL_SECONDS: int = 60
+
+    PASSWORD_HASH_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    SURVEY_RESULTS_CACHE_TTL_SECONDS: int = 30
+    SURVEY_COUNTERS_RECONCILE_INTERVAL_SECONDS: int = 3600
+    SURVEY_DEFINITION_CACHE_TTL_SECONDS: int = 3600
+    SURVEY_DEFINITION_LOCAL_CACHE_SIZE: int = 1024
+    SURVEY_DEFINITION_LOCAL_CACHE_TTL_SECONDS: int = 5
+
+    INGEST_CHUNK_SIZE: int = 1000
+    INGEST_USE_COPY: bool = True
+    INGEST_MAX_LINE_BYTES: int = 1048576
+
+    EXPORT_BATCH_SIZE: int = 1000
+
+    TIMELINE_ROLLUP_TTL_SECONDS: int = 86400
+    TIMELINE_MINUTE_RETENTION_HOURS: int = 48
+    TIMELINE_MAX_POINTS: int = 2000
+
+    RESPONDENT_BLOOM_CAPACITY: int = 100000
+    RESPONDENT_BLOOM_ERROR_RATE: float = 0.001
+    RESPONDENT_BUILD_LOCK_SECONDS: int = 300
+
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_CLAIM_TTL_SECONDS: int = 30
+    IDEMPOTENCY_WAIT_SECONDS: int = 10
+
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 300
+    PRINCIPAL_LOCAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_LOCAL_CACHE_TTL_SECONDS: int = 5
+
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8')
 
 
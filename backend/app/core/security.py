@@ -1,16 +1,23 @@
+import asyncio
 import bcrypt
 
 from jose import jwt
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
 
 from app.core.config import settings, ALGORITHM, TokenType
+from app.utils.exceptions import PasswordHasherBusyException
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+_password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='bcrypt')
+_password_jobs = 0
 
 
 def get_hashed_password(password: str | bytes) -> str:
     if isinstance(password, str):
         password = password.encode()
-    return bcrypt.hashpw(password, bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=settings.PASSWORD_HASH_ROUNDS)).decode()
 
 
 def verify_password(plain_password: str | bytes, hashed_password: str | bytes) -> bool:
@@ -21,6 +28,38 @@ def verify_password(plain_password: str | bytes, hashed_password: str | bytes) -
     return bcrypt.checkpw(plain_password, hashed_password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    # bcrypt hashes look like $2b$<rounds>$<salt+digest>
+    try:
+        rounds = int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.PASSWORD_HASH_ROUNDS
+
+
+async def _run_password_job(func, *args):
+    global _password_jobs
+    if _password_jobs >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHasherBusyException
+    _password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_jobs -= 1
+
+
+async def hash_password(password: str | bytes) -> str:
+    return await _run_password_job(get_hashed_password, password)
+
+
+async def check_password(plain_password: str | bytes, hashed_password: str | bytes) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+def shutdown_password_executor():
+    _password_executor.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(subject: int, expires_delta: timedelta | None = None) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
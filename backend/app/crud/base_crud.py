@@ -1,11 +1,13 @@
 from typing import TypeVar, Generic, Any
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
+from sqlalchemy.sql import Select, ColumnElement
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import Base
 from app.utils.exceptions import NotFoundException
+from app.utils.pagination import encode_cursor, decode_cursor
 
 ModelType = TypeVar('ModelType', bound=Base)
 CreateSchemaType = TypeVar('CreateSchemaType', bound=BaseModel)
@@ -30,6 +32,56 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_page(
+        self,
+        *,
+        db: AsyncSession,
+        sort: str,
+        columns: list,
+        cursor: str | None = None,
+        limit: int = 100,
+        stmt: Select | None = None,
+    ) -> tuple[list[ModelType], str | None]:
+        """Keyset pagination: ``sort`` names the ordering ('-' prefix = descending), ``columns`` the unique key."""
+        stmt = select(self.model) if stmt is None else stmt
+        descending = sort.startswith('-')
+        if cursor:
+            values = decode_cursor(cursor, sort, columns)
+            key, after = tuple_(*columns), tuple_(*values)
+            stmt = stmt.where(key < after if descending else key > after)
+        stmt = stmt.order_by(*(column.desc() if descending else column.asc() for column in columns))
+        result = await db.execute(stmt.limit(limit + 1))
+        items = result.scalars().all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            if items:
+                next_cursor = encode_cursor(sort, [getattr(items[-1], column.key) for column in columns])
+        return items, next_cursor
+
+    async def get_ranked_page(
+        self,
+        *,
+        db: AsyncSession,
+        stmt: Select,
+        rank: ColumnElement,
+        sort: str,
+        cursor: str | None = None,
+        limit: int = 100,
+    ) -> tuple[list[ModelType], str | None]:
+        """Keyset pagination by descending ``rank``, ties broken by descending id. ``stmt`` selects the model only."""
+        key = [rank, self.model.id]
+        if cursor:
+            stmt = stmt.where(tuple_(*key) < tuple_(*decode_cursor(cursor, sort, key)))
+        result = await db.execute(stmt.add_columns(rank).order_by(rank.desc(), self.model.id.desc()).limit(limit + 1))
+        rows = result.all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            if rows:
+                next_cursor = encode_cursor(sort, [rows[-1][1], rows[-1][0].id])
+        return [row[0] for row in rows], next_cursor
+
     async def update(
         self, *, obj_current: ModelType, obj_in: UpdateSchemaType | dict[str, Any], db: AsyncSession
     ) -> ModelType:
@@ -4,12 +4,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base_crud import CRUDBase
 from app.models.option_model import Option
 from app.schemas.option_schema import OptionCreate, OptionUpdate
+from app.services.definitions import bump_question_definition
 from app.utils.exceptions import OptionNotFoundException
 
 
 class CRUDOption(CRUDBase[Option, OptionCreate, OptionUpdate]):
-    async def create_option_bulk(self, *, obj_in: list[OptionCreate], db: AsyncSession):
-        db_options = [Option(**opt.model_dump()) for opt in obj_in]
+    async def create_option_bulk(self, *, question_id: int, obj_in: list[OptionCreate], db: AsyncSession):
+        db_options = [Option(**{**opt.model_dump(), 'question_id': question_id}) for opt in obj_in]
         try:
             db.add_all(db_options)
             await db.commit()
@@ -17,6 +18,7 @@ class CRUDOption(CRUDBase[Option, OptionCreate, OptionUpdate]):
                 await db.refresh(option_obj)
         except IntegrityError:
             await db.rollback()
+        await bump_question_definition(question_id)
         return db_options
 
     async def get_option(self, *, option_id: int, db: AsyncSession):
@@ -27,10 +29,15 @@ class CRUDOption(CRUDBase[Option, OptionCreate, OptionUpdate]):
 
     async def update_option(self, *, option_id: int, obj_in: OptionUpdate, db: AsyncSession) -> Option:
         option_in_db = await self.get_option(db=db, option_id=option_id)
-        return await self.update(obj_current=option_in_db, obj_in=obj_in, db=db)
+        question_id = option_in_db.question_id
+        option_update = await self.update(obj_current=option_in_db, obj_in=obj_in, db=db)
+        await bump_question_definition(question_id)
+        return option_update
 
     async def delete_option(self, *, option_id: int, db: AsyncSession):
-        return await self.delete(db=db, id=option_id)
+        option_delete = await self.delete(db=db, id=option_id)
+        await bump_question_definition(option_delete.question_id)
+        return option_delete
 
 
 option = CRUDOption(Option)
\ No newline at end of file
@@ -3,9 +3,12 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base_crud import CRUDBase
+from app.schemas.principal_schema import Principal
 from app.models.permission_model import Permission
 from app.crud.role_crud import role
 from app.schemas.permission_schema import PermissionCreate, PermissionUpdate
+from app.services.principal import bump_principal_version
+from app.services.permission import authorized_filter
 from app.utils.exceptions import (
     PermissionNotFoundException,
     PermissionAlreadyAssignedException,
@@ -14,6 +17,12 @@ from app.utils.exceptions import (
 
 
 class CRUDPermission(CRUDBase[Permission, PermissionCreate, PermissionUpdate]):
+    sort_columns = {'id': [Permission.id], 'name': [Permission.name]}
+
+    def list_filter(self, current_user: Principal):
+        """Only the rows ``permission:list`` grants to ``current_user``, evaluated by the database."""
+        return authorized_filter(current_user, 'permission', 'list', {})
+
     async def create_permission(self, *, obj_in: PermissionCreate, db: AsyncSession):
         db_permission = Permission(**obj_in.model_dump())
         try:
@@ -30,18 +39,40 @@ class CRUDPermission(CRUDBase[Permission, PermissionCreate, PermissionUpdate]):
             raise PermissionNotFoundException
         return permission_in_db
 
-    async def get_permissions(self, *, skip: int = 0, limit: int = 100, db: AsyncSession):
-        stmt = select(Permission).offset(skip).limit(limit)
+    async def get_permissions(self, *, skip: int = 0, limit: int = 100, db: AsyncSession, current_user: Principal):
+        stmt = select(Permission).where(self.list_filter(current_user)).offset(skip).limit(limit)
         result = await db.execute(stmt)
         permissions = result.scalars().all()
         return permissions
 
+    async def get_permissions_page(
+        self,
+        *,
+        cursor: str | None = None,
+        sort: str = 'id',
+        limit: int = 100,
+        db: AsyncSession,
+        current_user: Principal,
+    ):
+        return await self.get_page(
+            db=db,
+            sort=sort,
+            columns=self.sort_columns[sort.lstrip('-')],
+            cursor=cursor,
+            limit=limit,
+            stmt=select(Permission).where(self.list_filter(current_user)),
+        )
+
     async def update_permission(self, *, permission_id: int, obj_in: PermissionUpdate, db: AsyncSession):
         permission_in_db = await self.get_permission(db=db, permission_id=permission_id)
-        return await self.update(obj_current=permission_in_db, obj_in=obj_in, db=db)
+        permission_update = await self.update(obj_current=permission_in_db, obj_in=obj_in, db=db)
+        await bump_principal_version()
+        return permission_update
 
     async def delete_permission(self, *, permission_id: int, db: AsyncSession):
-        return await self.delete(db=db, id=permission_id)
+        permission_delete = await self.delete(db=db, id=permission_id)
+        await bump_principal_version()
+        return permission_delete
 
     async def assign_permission_to_role(self, *, permission_id: int, role_id: int, db: AsyncSession):
         permission_in_db = await self.get_permission(db=db, permission_id=permission_id)
@@ -51,6 +82,7 @@ class CRUDPermission(CRUDBase[Permission, PermissionCreate, PermissionUpdate]):
             role_in_db.permissions.append(permission_in_db)
             await db.commit()
             await db.refresh(role_in_db)
+            await bump_principal_version()
         else:
             raise PermissionAlreadyAssignedException
 
@@ -63,6 +95,7 @@ class CRUDPermission(CRUDBase[Permission, PermissionCreate, PermissionUpdate]):
             role_in_db.permissions.remove(permission_in_db)
             await db.commit()
             await db.refresh(role_in_db)
+            await bump_principal_version()
         else:
             raise RoleHasNoThisPermissionException
 
@@ -1,10 +1,15 @@
+from sqlalchemy import select, func, Float
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base_crud import CRUDBase
 from app.models.question_model import Question
+from app.models.survey_model import Survey
+from app.schemas.principal_schema import Principal
 from app.crud.survey_crud import survey
 from app.schemas.question_schema import QuestionCreate, QuestionUpdate
+from app.services.permission import authorized_filter
+from app.services.definitions import bump_survey_definition, bump_question_definition
 from app.utils.exceptions import QuestionNotFoundException
 
 
@@ -18,6 +23,7 @@ class CRUDQuestion(CRUDBase[Question, QuestionCreate, QuestionUpdate]):
             await db.refresh(db_question)
         except IntegrityError:
             await db.rollback()
+        await bump_survey_definition(survey_id)
         return db_question
 
     async def get_question(self, *, question_id: int, db: AsyncSession):
@@ -26,12 +32,37 @@ class CRUDQuestion(CRUDBase[Question, QuestionCreate, QuestionUpdate]):
             raise QuestionNotFoundException
         return question_in_db
 
+    async def search_questions(
+        self, *, query: str, cursor: str | None = None, limit: int = 100, db: AsyncSession, current_user: Principal
+    ):
+        """Full-text matches on question text, best first, limited to questions ``current_user`` may read."""
+        ts_query = func.websearch_to_tsquery('simple', query)
+        rank = func.ts_rank(Question.search_vector, ts_query, type_=Float)
+        stmt = (
+            select(Question)
+            .join(Survey, Survey.id == Question.survey_id)
+            .where(
+                Question.search_vector.op('@@')(ts_query),
+                authorized_filter(current_user, 'question', 'read', {'creator_id': Survey.creator_id}),
+            )
+        )
+        return await self.get_ranked_page(
+            db=db, stmt=stmt, rank=rank, sort=f'rank:{query}', cursor=cursor, limit=limit
+        )
+
     async def update_question(self, *, question_id: int, obj_in: QuestionUpdate, db: AsyncSession) -> Question:
         question_in_db = await self.get_question(db=db, question_id=question_id)
-        return await self.update(obj_current=question_in_db, obj_in=obj_in, db=db)
+        survey_id = question_in_db.survey_id
+        question_update = await self.update(obj_current=question_in_db, obj_in=obj_in, db=db)
+        await bump_survey_definition(survey_id)
+        await bump_question_definition(question_id)
+        return question_update
 
     async def delete_question(self, *, question_id: int, db: AsyncSession):
-        return await self.delete(db=db, id=question_id)
+        question_delete = await self.delete(db=db, id=question_id)
+        await bump_survey_definition(question_delete.survey_id)
+        await bump_question_definition(question_id)
+        return question_delete
 
 
 question = CRUDQuestion(Question)
\ No newline at end of file
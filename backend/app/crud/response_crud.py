@@ -1,35 +1,187 @@
+from datetime import datetime, timezone
+from contextlib import suppress
+from collections.abc import Iterable
+from redis.exceptions import RedisError
+from sqlalchemy import insert, select, func
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base_crud import CRUDBase
+from app.models.answer_model import Answer
 from app.models.response_model import Response
-from app.models.user_model import User
-from app.schemas.response_schema import ResponseCreate, ResponseUpdate
-from app.utils.exceptions import ResponseNotFoundException
+from app.schemas.principal_schema import Principal
+from app.core.config import settings
+from app.services.counters import record_responses, drop_counters
+from app.services.bitmaps import record_bitmaps, drop_bitmaps
+from app.services.timeline import record_timeline, drop_timeline
+from app.services.respondents import hash_fingerprint, seen_fingerprint, record_respondents, drop_respondents
+from app.services.answers import load_survey_structure, validate_answers, valid_answers_select
+from app.schemas.response_schema import ResponseCreate, ResponseUpdate, ResponseSubmit, ResponseImport
+from app.utils.exceptions import ResponseNotFoundException, DuplicateResponseException, InvalidAnswersException
+
+
+async def record_committed(survey_id: int, responses: Iterable[tuple[int, int | None, datetime, str | None, list]]):
+    """Feed committed responses, each given as ``(id, user_id, submitted_at, hashed fingerprint, answers)``, to the
+    survey's Redis structures.
+
+    Never raises: the responses are stored whatever happens here, and a failure surfacing after the commit would
+    release an idempotency claim and have a retry insert them again. Structures that may have missed them are
+    dropped so they're rebuilt from the database; if even that fails the counter reconcile and the timeline's TTL
+    catch up.
+    """
+    responses = list(responses)
+    try:
+        await record_responses(survey_id, [answers for *_, answers in responses])
+        await record_bitmaps(survey_id, [(response_id, answers) for response_id, *_, answers in responses])
+        await record_timeline(survey_id, [submitted_at for _, _, submitted_at, _, _ in responses])
+        await record_respondents(
+            survey_id, [(response_id, user_id, fingerprint) for response_id, user_id, _, fingerprint, _ in responses]
+        )
+    except RedisError:
+        with suppress(RedisError):
+            await drop_counters(survey_id)
+            await drop_bitmaps(survey_id)
+            await drop_timeline(survey_id)
+            await drop_respondents(survey_id)
 
 
 class CRUDResponse(CRUDBase[Response, ResponseCreate, ResponseUpdate]):
+    sort_columns = {'submitted_at': [Response.submitted_at, Response.id]}
+
     async def create_response(
         self,
         *,
         obj_in: ResponseCreate,
         db: AsyncSession,
-        current_user: User
+        current_user: Principal
     ):
-        db_response = Response(**obj_in.model_dump())
+        # a response is always the caller's own, whatever the body says
+        db_response = Response(**obj_in.model_dump(exclude={'user_id'}), user_id=current_user.id)
         try:
             db.add(db_response)
             await db.commit()
             await db.refresh(db_response)
         except IntegrityError:
             await db.rollback()
+            return db_response
+        await record_committed(
+            db_response.survey_id, [(db_response.id, db_response.user_id, db_response.submitted_at, None, [])]
+        )
         return db_response
 
+    async def submit_response(self, *, obj_in: ResponseSubmit, db: AsyncSession, current_user: Principal) -> Response:
+        """Insert a response and all of its answers in one transaction and two statements however many answers
+        there are: an INSERT ... RETURNING for the response and an INSERT ... SELECT ... RETURNING for the answers
+        that also checks them against the survey's questions and options.
+
+        A fingerprint the survey's Bloom filter has (probably) seen is rejected before the database is touched.
+        Answers that don't fit roll the transaction back; only then is the structure loaded to say why."""
+        fingerprint = hash_fingerprint(obj_in.fingerprint) if obj_in.fingerprint else None
+        if fingerprint and await seen_fingerprint(db, obj_in.survey_id, fingerprint):
+            raise DuplicateResponseException
+        try:
+            db_response = await db.scalar(
+                insert(Response)
+                .values(survey_id=obj_in.survey_id, user_id=current_user.id, fingerprint=fingerprint)
+                .returning(Response)
+            )
+            answers = []
+            if obj_in.answers:
+                columns = ['response_id', 'question_id', 'value', 'option_id']
+                valid_answers = valid_answers_select(obj_in.survey_id, db_response.id, obj_in.answers)
+                answers = (await db.scalars(insert(Answer).from_select(columns, valid_answers).returning(Answer))).all()
+            if len(answers) < len(obj_in.answers):
+                await db.rollback()
+                error = validate_answers(obj_in.answers, *await load_survey_structure(db, obj_in.survey_id))
+                raise InvalidAnswersException(error or 'Answers do not fit the survey')
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise
+        set_committed_value(db_response, 'answers', list(answers))
+        await record_committed(
+            obj_in.survey_id, [(db_response.id, current_user.id, db_response.submitted_at, fingerprint, answers)]
+        )
+        return db_response
+
+    async def bulk_insert_responses(self, *, survey_id: int, records: list[ResponseImport], db: AsyncSession) -> int:
+        """Write a chunk of already validated responses with COPY (or executemany) and commit it."""
+        # ids are reserved up front so answers can reference their response without RETURNING
+        reserve_ids = select(func.nextval('responses_id_seq')).select_from(func.generate_series(1, len(records)))
+        response_ids = (await db.scalars(reserve_ids)).all()
+        now = datetime.now(timezone.utc)
+        response_rows = [
+            (
+                response_id,
+                survey_id,
+                record.user_id,
+                record.submitted_at or now,
+                hash_fingerprint(record.fingerprint) if record.fingerprint else None,
+            )
+            for response_id, record in zip(response_ids, records)
+        ]
+        answer_rows = [
+            (response_id, answer.question_id, answer.value, answer.option_id)
+            for response_id, record in zip(response_ids, records)
+            for answer in record.answers
+        ]
+        response_columns = ['id', 'survey_id', 'user_id', 'submitted_at', 'fingerprint']
+        answer_columns = ['response_id', 'question_id', 'value', 'option_id']
+        if settings.INGEST_USE_COPY:
+            connection = await db.connection()
+            raw_connection = (await connection.get_raw_connection()).driver_connection
+            await raw_connection.copy_records_to_table('responses', records=response_rows, columns=response_columns)
+            if answer_rows:
+                await raw_connection.copy_records_to_table('answers', records=answer_rows, columns=answer_columns)
+        else:
+            await db.execute(insert(Response), [dict(zip(response_columns, row)) for row in response_rows])
+            if answer_rows:
+                await db.execute(insert(Answer), [dict(zip(answer_columns, row)) for row in answer_rows])
+        await db.commit()
+        await record_committed(
+            survey_id,
+            [
+                (response_id, user_id, submitted_at, fingerprint, record.answers)
+                for (response_id, _, user_id, submitted_at, fingerprint), record in zip(response_rows, records)
+            ],
+        )
+        return len(response_rows)
+
     async def get_response(self, *, response_id: int, db: AsyncSession):
         response_in_db = await self.get(db=db, id=response_id)
         if not response_in_db:
             raise ResponseNotFoundException
         return response_in_db
 
+    async def get_survey_responses_page(
+        self,
+        *,
+        survey_id: int,
+        cursor: str | None = None,
+        sort: str = 'submitted_at',
+        limit: int = 100,
+        submitted_from: datetime | None = None,
+        submitted_to: datetime | None = None,
+        user_id: int | None = None,
+        include_answers: bool = False,
+        db: AsyncSession,
+    ):
+        """Page through a survey's responses on (submitted_at, id), optionally within ``[submitted_from,
+        submitted_to)`` and for one user. Answers are loaded with one extra query per page."""
+        stmt = select(Response).where(Response.survey_id == survey_id)
+        if submitted_from is not None:
+            stmt = stmt.where(Response.submitted_at >= submitted_from)
+        if submitted_to is not None:
+            stmt = stmt.where(Response.submitted_at < submitted_to)
+        if user_id is not None:
+            stmt = stmt.where(Response.user_id == user_id)
+        if include_answers:
+            stmt = stmt.options(selectinload(Response.answers))
+        return await self.get_page(
+            db=db, sort=sort, columns=self.sort_columns[sort.lstrip('-')], cursor=cursor, limit=limit, stmt=stmt
+        )
+
 
 response = CRUDResponse(Response)
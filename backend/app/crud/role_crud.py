@@ -4,13 +4,22 @@ from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base_crud import CRUDBase
+from app.schemas.principal_schema import Principal
 from app.models.role_model import Role
 from app.models.user_model import User
 from app.schemas.role_schema import RoleCreate, RoleUpdate
+from app.services.principal import invalidate_principal, bump_principal_version
+from app.services.permission import authorized_filter
 from app.utils.exceptions import RoleNotFoundException
 
 
 class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):  # todo: add permissions
+    sort_columns = {'id': [Role.id], 'name': [Role.name]}
+
+    def list_filter(self, current_user: Principal):
+        """Only the rows ``role:list`` grants to ``current_user``, evaluated by the database."""
+        return authorized_filter(current_user, 'role', 'list', {})
+
     async def create_role(self, *, obj_in: RoleCreate, db: AsyncSession):
         db_role = Role(**obj_in.model_dump())
         try:
@@ -29,18 +38,38 @@ class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):  # todo: add permissions
             raise RoleNotFoundException
         return role_in_db
 
-    async def get_roles(self, *, skip: int = 0, limit: int = 100, db: AsyncSession):
-        stmt = select(Role).offset(skip).limit(limit)
+    async def get_roles(self, *, skip: int = 0, limit: int = 100, db: AsyncSession, current_user: Principal):
+        stmt = select(Role).where(self.list_filter(current_user)).offset(skip).limit(limit)
         result = await db.execute(stmt)
         roles = result.scalars().all()
         return roles
 
+    async def get_roles_page(
+        self,
+        *,
+        cursor: str | None = None,
+        sort: str = 'id',
+        limit: int = 100,
+        db: AsyncSession,
+        current_user: Principal,
+    ):
+        return await self.get_page(
+            db=db,
+            sort=sort,
+            columns=self.sort_columns[sort.lstrip('-')],
+            cursor=cursor,
+            limit=limit,
+            stmt=select(Role).where(self.list_filter(current_user)),
+        )
+
     async def update_role(self, *, role_id: int, obj_in: RoleUpdate, db: AsyncSession):
         role_in_db = await self.get_role(db=db, role_id=role_id)
         return await self.update(obj_current=role_in_db, obj_in=obj_in, db=db)
 
     async def delete_role(self, *, role_id: int, db: AsyncSession):
-        return await self.delete(db=db, id=role_id)
+        role_delete = await self.delete(db=db, id=role_id)
+        await bump_principal_version()
+        return role_delete
 
     async def assign_role_to_user(self, *, role_id: int, user_id: int, db: AsyncSession):
         role_in_db = await self.get_role(db=db, role_id=role_id)
@@ -56,6 +85,7 @@ class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):  # todo: add permissions
             user_in_db.roles.append(role_in_db)
             await db.commit()
             await db.refresh(user_in_db)
+            await invalidate_principal(user_id)
         return user_in_db
 
     async def remove_role_from_user(self, *, role_id: int, user_id: int, db: AsyncSession):
@@ -67,6 +97,7 @@ class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):  # todo: add permissions
             user_in_db.roles.remove(role_in_db)
             await db.commit()
             await db.refresh(user_in_db)
+            await invalidate_principal(user_id)
         return user_in_db
 
 
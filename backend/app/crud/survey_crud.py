@@ -1,18 +1,31 @@
-from sqlalchemy import select
+from sqlalchemy import select, func, or_, Float
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.crud.base_crud import CRUDBase
 from app.models.survey_model import Survey
-from app.models.user_model import User
+from app.models.question_model import Question
+from app.schemas.principal_schema import Principal
 from app.models.response_model import Response
 from app.schemas.survey_schema import SurveyCreate, SurveyUpdate
+from app.services.counters import drop_counters
+from app.services.bitmaps import drop_bitmaps
+from app.services.timeline import drop_timeline
+from app.services.respondents import drop_respondents
+from app.services.definitions import bump_survey_definition, bump_question_definitions
+from app.services.permission import authorized_filter
 from app.utils.exceptions import SurveyNotFoundException
 
 
 class CRUDSurvey(CRUDBase[Survey, SurveyCreate, SurveyUpdate]):
-    async def create_survey(self, *, obj_in: SurveyCreate, db: AsyncSession, current_user: User):
+    sort_columns = {'id': [Survey.id], 'created_at': [Survey.created_at, Survey.id]}
+
+    def list_filter(self, current_user: Principal):
+        """Only the rows ``survey:list`` grants to ``current_user``, evaluated by the database."""
+        return authorized_filter(current_user, 'survey', 'list', {'creator_id': Survey.creator_id})
+
+    async def create_survey(self, *, obj_in: SurveyCreate, db: AsyncSession, current_user: Principal):
         db_survey = Survey(**obj_in.model_dump())
         db_survey.creator_id = current_user.id
         try:
@@ -29,18 +42,71 @@ class CRUDSurvey(CRUDBase[Survey, SurveyCreate, SurveyUpdate]):
             raise SurveyNotFoundException
         return survey_in_db
 
-    async def get_surveys(self, *, skip: int = 0, limit: int = 100, db: AsyncSession):
-        stmt = select(Survey).offset(skip).limit(limit)
+    async def get_surveys(self, *, skip: int = 0, limit: int = 100, db: AsyncSession, current_user: Principal):
+        stmt = select(Survey).where(self.list_filter(current_user)).offset(skip).limit(limit)
         result = await db.execute(stmt)
         surveys = result.scalars().all()
         return surveys
 
-    async def get_user_surveys(self, *, skip: int = 0, limit: int = 100, db: AsyncSession, current_user: User):
+    async def get_surveys_page(
+        self,
+        *,
+        cursor: str | None = None,
+        sort: str = 'id',
+        limit: int = 100,
+        db: AsyncSession,
+        current_user: Principal,
+    ):
+        return await self.get_page(
+            db=db,
+            sort=sort,
+            columns=self.sort_columns[sort.lstrip('-')],
+            cursor=cursor,
+            limit=limit,
+            stmt=select(Survey).where(self.list_filter(current_user)),
+        )
+
+    async def get_user_surveys(self, *, skip: int = 0, limit: int = 100, db: AsyncSession, current_user: Principal):
         stmt = select(Survey).where(Survey.creator_id == current_user.id).offset(skip).limit(limit)
         result = await db.execute(stmt)
         surveys = result.scalars().all()
         return surveys
 
+    async def get_user_surveys_page(
+        self,
+        *,
+        cursor: str | None = None,
+        sort: str = 'id',
+        limit: int = 100,
+        db: AsyncSession,
+        current_user: Principal,
+    ):
+        return await self.get_page(
+            db=db,
+            sort=sort,
+            columns=self.sort_columns[sort.lstrip('-')],
+            cursor=cursor,
+            limit=limit,
+            stmt=select(Survey).where(Survey.creator_id == current_user.id),
+        )
+
+    async def search_surveys(
+        self, *, query: str, cursor: str | None = None, limit: int = 100, db: AsyncSession, current_user: Principal
+    ):
+        """Full-text matches on title and description plus fuzzy (trigram) title matches, best first."""
+        ts_query = func.websearch_to_tsquery('simple', query)
+        rank = func.greatest(
+            func.ts_rank(Survey.search_vector, ts_query, type_=Float),
+            func.similarity(Survey.title, query, type_=Float),
+            type_=Float,
+        )
+        stmt = select(Survey).where(
+            or_(Survey.search_vector.op('@@')(ts_query), Survey.title.op('%')(query)), self.list_filter(current_user)
+        )
+        return await self.get_ranked_page(
+            db=db, stmt=stmt, rank=rank, sort=f'rank:{query}', cursor=cursor, limit=limit
+        )
+
     async def get_survey_with_responses(self, *, survey_id: int, db: AsyncSession):
         stmt = (
             select(Survey)
@@ -55,10 +121,21 @@ class CRUDSurvey(CRUDBase[Survey, SurveyCreate, SurveyUpdate]):
 
     async def update_survey(self, *, survey_id: int, obj_in: SurveyUpdate, db: AsyncSession) -> Survey:
         survey_in_db = await self.get_survey(db=db, survey_id=survey_id)
-        return await self.update(obj_current=survey_in_db, obj_in=obj_in, db=db)
+        survey_update = await self.update(obj_current=survey_in_db, obj_in=obj_in, db=db)
+        await bump_survey_definition(survey_id)
+        return survey_update
 
     async def delete_survey(self, *, survey_id: int, db: AsyncSession):
-        return await self.delete(db=db, id=survey_id)
+        # the questions go with the survey, their cached definitions must go too
+        question_ids = (await db.scalars(select(Question.id).where(Question.survey_id == survey_id))).all()
+        survey_delete = await self.delete(db=db, id=survey_id)
+        await drop_counters(survey_id)
+        await drop_bitmaps(survey_id)
+        await drop_timeline(survey_id)
+        await drop_respondents(survey_id)
+        await bump_survey_definition(survey_id)
+        await bump_question_definitions(list(question_ids))
+        return survey_delete
 
 
 survey = CRUDSurvey(Survey)
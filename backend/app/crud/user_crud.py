@@ -4,17 +4,28 @@ from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base_crud import CRUDBase
+from app.schemas.principal_schema import Principal
 from app.models.user_model import User
 from app.models.role_model import Role
 from app.schemas.user_schema import UserCreate, UserUpdate
-from app.core.security import get_hashed_password
+from app.core.security import hash_password
+from app.db.session import get_redis_db
+from app.services.principal import invalidate_principal
+from app.services.token import revoke_user_sessions
+from app.services.permission import authorized_filter
 from app.utils.exceptions import UserNotFoundException
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    sort_columns = {'id': [User.id], 'created_at': [User.created_at, User.id]}
+
+    def list_filter(self, current_user: Principal):
+        """Only the rows ``user:list`` grants to ``current_user``, evaluated by the database."""
+        return authorized_filter(current_user, 'user', 'list', {'target_user_id': User.id})
+
     async def create_user(self, *, obj_in: UserCreate, db: AsyncSession) -> User:
         db_user = User(**obj_in.model_dump(exclude={'password'}))
-        db_user.hashed_password = get_hashed_password(password=obj_in.password)
+        db_user.hashed_password = await hash_password(password=obj_in.password)
         try:
             db.add(db_user)
             await db.commit()
@@ -41,12 +52,30 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             raise UserNotFoundException
         return user_in_db
 
-    async def get_users(self, *, skip: int = 0, limit: int = 100, db: AsyncSession):
-        stmt = select(User).offset(skip).limit(limit)
+    async def get_users(self, *, skip: int = 0, limit: int = 100, db: AsyncSession, current_user: Principal):
+        stmt = select(User).where(self.list_filter(current_user)).offset(skip).limit(limit)
         result = await db.execute(stmt)
         users = result.scalars().all()
         return users
 
+    async def get_users_page(
+        self,
+        *,
+        cursor: str | None = None,
+        sort: str = 'id',
+        limit: int = 100,
+        db: AsyncSession,
+        current_user: Principal,
+    ):
+        return await self.get_page(
+            db=db,
+            sort=sort,
+            columns=self.sort_columns[sort.lstrip('-')],
+            cursor=cursor,
+            limit=limit,
+            stmt=select(User).where(self.list_filter(current_user)),
+        )
+
     async def get_user_by_email_or_username(self, *, identifier: str, db: AsyncSession) -> User | None:
         stmt = select(User).filter(or_(User.username == identifier, User.email == identifier))
         result = await db.execute(stmt)
@@ -57,10 +86,17 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
 
     async def update_user(self, *, user_id: int, obj_in: UserUpdate, db: AsyncSession) -> User:
         user_in_db = await self.get_user(db=db, user_id=user_id)
-        return await self.update(obj_current=user_in_db, obj_in=obj_in, db=db)
+        user_update = await self.update(obj_current=user_in_db, obj_in=obj_in, db=db)
+        await invalidate_principal(user_id)
+        if not user_update.is_active:
+            await revoke_user_sessions(await get_redis_db(), user_id)
+        return user_update
 
     async def delete_user(self, *, user_id: int, db: AsyncSession):
-        return await self.delete(db=db, id=user_id)
+        user_delete = await self.delete(db=db, id=user_id)
+        await invalidate_principal(user_id)
+        await revoke_user_sessions(await get_redis_db(), user_id)
+        return user_delete
 
 
 user = CRUDUser(User)
@@ -1,25 +1,167 @@
+import time
 from collections.abc import AsyncGenerator
-from redis.asyncio import Redis, from_url
-from sqlalchemy.orm import DeclarativeBase
+from fastapi import Request
+from redis.asyncio import Redis, BlockingConnectionPool
+from sqlalchemy import text, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import DeclarativeBase, Session as OrmSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.core.config import settings
 
-engine = create_async_engine(url=str(settings.DATABASE_URL), connect_args={})
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool recording how long checkouts wait for a free connection and how often they time out.
+
+    Every pool keeps its own counters, carried over when the engine recreates it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = {'checkouts': 0, 'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0, 'timeouts': 0}
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats['checkouts'] += 1
+            self.stats['wait_seconds_total'] += waited
+            self.stats['wait_seconds_max'] = max(self.stats['wait_seconds_max'], waited)
+
+
+def create_engine(url: str):
+    return create_async_engine(
+        url=url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        connect_args={
+            'prepared_statement_cache_size': settings.DATABASE_STATEMENT_CACHE_SIZE,
+            'command_timeout': settings.DATABASE_COMMAND_TIMEOUT_SECONDS,
+            'server_settings': {'statement_timeout': str(settings.DATABASE_STATEMENT_TIMEOUT_MS)},
+        },
+    )
+
+
+engine = create_engine(str(settings.DATABASE_URL))
+read_engine = create_engine(str(settings.DATABASE_REPLICA_URL)) if settings.DATABASE_REPLICA_URL else None
 
 Session = async_sessionmaker(bind=engine, expire_on_commit=False)
 
+ReadSession = async_sessionmaker(bind=read_engine, expire_on_commit=False) if read_engine else None
+
+redis_pool: BlockingConnectionPool | None = None
+
 class Base(DeclarativeBase):
     pass
 
+async def warm_up_engine():
+    connections = [await engine.connect() for _ in range(settings.DATABASE_POOL_SIZE)]
+    try:
+        for connection in connections:
+            await connection.execute(text('SELECT 1'))
+    finally:
+        for connection in connections:
+            await connection.close()
+
+async def dispose_engine():
+    await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
+
+def _pool_stats(pool: InstrumentedQueuePool) -> dict:
+    checkouts = pool.stats['checkouts']
+    return {
+        'pool_size': pool.size(),
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0),
+        'checkouts': checkouts,
+        'wait_ms_avg': pool.stats['wait_seconds_total'] / checkouts * 1000 if checkouts else 0.0,
+        'wait_ms_max': pool.stats['wait_seconds_max'] * 1000,
+        'timeouts': pool.stats['timeouts'],
+    }
+
+def get_db_pool_stats() -> dict:
+    stats = {'primary': _pool_stats(engine.pool)}
+    if read_engine is not None:
+        stats['replica'] = _pool_stats(read_engine.pool)
+    return stats
+
+def init_redis_pool() -> BlockingConnectionPool:
+    global redis_pool
+    if redis_pool is None:
+        redis_pool = BlockingConnectionPool.from_url(
+            url=str(settings.REDIS_URL),
+            encoding='utf8',
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+        )
+    return redis_pool
+
+async def close_redis_pool():
+    global redis_pool
+    if redis_pool is not None:
+        await redis_pool.disconnect()
+        redis_pool = None
+
+def get_redis_pool_stats() -> dict:
+    if redis_pool is None:
+        return {'initialized': False}
+    in_use = len(redis_pool._in_use_connections)
+    available = len(redis_pool._available_connections)
+    return {
+        'initialized': True,
+        'max_connections': redis_pool.max_connections,
+        'created_connections': in_use + available,
+        'in_use_connections': in_use,
+        'available_connections': available,
+    }
+
 async def get_redis_db() -> Redis:
-    redis = await from_url(
-        url=str(settings.REDIS_URL),
-        encoding='utf8',
-        decode_responses=True
-    )
-    return redis
+    return Redis(connection_pool=init_redis_pool())
+
+@event.listens_for(OrmSession, 'after_commit')
+def _mark_session_committed(session: OrmSession):
+    session.info['committed'] = True
+
+def primary_pin_key(user_id: int) -> str:
+    return f'primary-pin:{user_id}'
 
-async def get_db() -> AsyncGenerator:
+async def pin_to_primary(user_id: int):
+    """Route the user's reads to the primary for a while so they see their own writes despite replica lag."""
+    redis_client = await get_redis_db()
+    await redis_client.set(primary_pin_key(user_id), 1, ex=settings.READ_YOUR_WRITES_SECONDS)
+
+async def is_pinned_to_primary(user_id: int) -> bool:
+    redis_client = await get_redis_db()
+    return bool(await redis_client.exists(primary_pin_key(user_id)))
+
+async def get_db(request: Request) -> AsyncGenerator:
     async with Session() as db:
-        yield db
\ No newline at end of file
+        yield db
+        user_id = getattr(request.state, 'user_id', None)
+        if ReadSession is not None and user_id is not None and db.sync_session.info.get('committed'):
+            await pin_to_primary(user_id)
+
+async def get_replica_db() -> AsyncGenerator:
+    async with ReadSession() as db:
+        yield db
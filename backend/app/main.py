@@ -1,10 +1,49 @@
-from fastapi import FastAPI, status
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Depends, status
 from fastapi.responses import JSONResponse
 
 from app.api.v1.routers import user, permission, response, option, survey, role, login, question
+from app.api.v1.deps import require_permission
+from app.db.session import (
+    init_redis_pool,
+    close_redis_pool,
+    get_redis_pool_stats,
+    warm_up_engine,
+    dispose_engine,
+    get_db_pool_stats,
+)
+from app.core.config import settings
+from app.core.security import shutdown_password_executor
+from app.services.token_cache import listen_for_revocations, get_token_cache_stats
+from app.services.principal import listen_for_invalidations
+from app.services.definitions import listen_for_definition_invalidations
+from app.services.counters import run_counter_reconciliation
 
 
-app = FastAPI(docs_url='/api/v1/docs')
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_redis_pool()
+    await warm_up_engine()
+    background_tasks = [
+        asyncio.create_task(listen_for_invalidations()),
+        asyncio.create_task(listen_for_definition_invalidations()),
+    ]
+    if settings.TOKEN_LOCAL_CACHE_ENABLED:
+        background_tasks.append(asyncio.create_task(listen_for_revocations()))
+    if settings.SURVEY_COUNTERS_RECONCILE_INTERVAL_SECONDS:
+        background_tasks.append(asyncio.create_task(run_counter_reconciliation()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_redis_pool()
+    await dispose_engine()
+    shutdown_password_executor()
+
+
+app = FastAPI(docs_url='/api/v1/docs', lifespan=lifespan)
 
 
 @app.get('/', include_in_schema=False)
@@ -17,6 +56,18 @@ async def healthcheck():
     return JSONResponse(status_code=status.HTTP_200_OK, content='OK')
 
 
+@app.get('/api/v1/metrics', include_in_schema=False, dependencies=[Depends(require_permission('metrics', 'read'))])
+async def metrics():
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'database': get_db_pool_stats(),
+            'redis': get_redis_pool_stats(),
+            'token_cache': get_token_cache_stats(),
+        },
+    )
+
+
 app.include_router(router=user.router, prefix='/api/v1/users', tags=['User'])
 app.include_router(router=role.router, prefix='/api/v1/roles', tags=['Role'])
 app.include_router(router=permission.router, prefix='/api/v1/permissions', tags=['Permission'])
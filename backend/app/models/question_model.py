@@ -1,4 +1,5 @@
-from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy import Integer, String, ForeignKey, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import mapped_column, relationship, Mapped
 
 from app.db.session import Base
@@ -7,12 +8,16 @@ from app.core.config import QuestionType
 
 class Question(Base):
     __tablename__ = 'questions'
+    __table_args__ = (Index('ix_questions_search_vector', 'search_vector', postgresql_using='gin'),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     survey_id: Mapped[int] = mapped_column(Integer, ForeignKey('surveys.id', ondelete='CASCADE'))
     text: Mapped[str] = mapped_column(String, nullable=False, index=True)
     type: Mapped[str] = mapped_column(String, nullable=False)
     order: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, Computed("to_tsvector('simple', coalesce(text, ''))", persisted=True), deferred=True
+    )
 
     survey: Mapped['Survey'] = relationship('Survey', back_populates='questions')
     options: Mapped[list['Option']] = relationship('Option', back_populates='question')
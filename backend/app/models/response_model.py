@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Integer, ForeignKey, func, DateTime
+from sqlalchemy import Integer, String, ForeignKey, func, DateTime, Index
 from sqlalchemy.orm import mapped_column, relationship, Mapped
 
 from app.db.session import Base
@@ -7,11 +7,21 @@ from app.db.session import Base
 
 class Response(Base):
     __tablename__ = 'responses'
+    __table_args__ = (
+        Index(
+            'ix_responses_survey_fingerprint',
+            'survey_id',
+            'fingerprint',
+            postgresql_where='fingerprint IS NOT NULL',
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     survey_id: Mapped[int] = mapped_column(Integer, ForeignKey('surveys.id'), nullable=False, index=True)
     user_id: Mapped[int | None] = mapped_column(Integer, ForeignKey('users.id'), nullable=True, index=True) # true if user is anonymous
     submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True, server_default=func.now())
+    # keyed hash of the client's respondent fingerprint, lets the duplicate filter be rebuilt
+    fingerprint: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
     answers: Mapped[list['Answer']] = relationship('Answer', back_populates='response')
     survey: Mapped['Survey'] = relationship('Survey', back_populates='responses')
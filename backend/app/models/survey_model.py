@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Integer, String, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import Integer, String, Boolean, DateTime, ForeignKey, Computed, Index, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import mapped_column, relationship, Mapped
 
 from app.db.session import Base
@@ -7,6 +8,10 @@ from app.db.session import Base
 
 class Survey(Base):
     __tablename__ = 'surveys'
+    __table_args__ = (
+        Index('ix_surveys_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_surveys_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String, nullable=False, unique=False, index=True)
@@ -15,6 +20,20 @@ class Survey(Base):
     creator_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
     deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # drawn from the responses' id sequence on insert: every response of the survey has a larger id, so its
+    # bitmaps can be indexed from here instead of from 0
+    response_id_floor: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("nextval('responses_id_seq')")
+    )
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     questions: Mapped[list['Question']] = relationship('Question', back_populates='survey')
     responses: Mapped[list['Response']] = relationship('Response', back_populates='survey')
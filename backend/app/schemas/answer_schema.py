@@ -17,6 +17,12 @@ class AnswerCreate(OrmBaseModel):
     option_id: int | None = None
 
 
+class AnswerSubmit(OrmBaseModel):
+    question_id: int
+    value: str | None = None
+    option_id: int | None = None
+
+
 class AnswerUpdate(OrmBaseModel):
     value: str | None = None
     option_id: int | None = None
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Literal
 from pydantic import BaseModel, ConfigDict
 
 
@@ -6,6 +6,9 @@ class OrmBaseModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+PermissionSort = Literal['id', '-id', 'name', '-name']
+
+
 class PermissionBase(OrmBaseModel):
     name: str
     description: str | None = None
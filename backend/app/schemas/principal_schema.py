@@ -0,0 +1,24 @@
+from typing import Any
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+
+class OrmBaseModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PermissionGrant(OrmBaseModel):
+    resource: str
+    action: str
+    conditions: dict[str, Any] | None = None
+    direct: bool = False
+
+
+class Principal(OrmBaseModel):
+    """Serializable snapshot of an authenticated user: identity, status and flattened permissions."""
+
+    id: int
+    is_active: bool
+    permissions: list[PermissionGrant] = []
+
+    # compiled lazily by app.services.permission and kept for as long as the snapshot is cached
+    _permission_index: Any = PrivateAttr(default=None)
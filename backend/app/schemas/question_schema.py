@@ -27,5 +27,9 @@ class QuestionResponse(QuestionBase):
     id: int
 
 
+class QuestionSearchResult(QuestionResponse):
+    survey_id: int
+
+
 class QuestionDetails(QuestionResponse):
     options: list[OptionResponse]
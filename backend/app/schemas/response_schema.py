@@ -1,11 +1,17 @@
+from typing import Literal
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict
 
+from app.schemas.answer_schema import AnswerSubmit, AnswerResponse
+
 
 class OrmBaseModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+ResponseSort = Literal['submitted_at', '-submitted_at']
+
+
 class ResponseBase(OrmBaseModel):
     survey_id: int
     user_id: int | None = None
@@ -16,9 +22,30 @@ class ResponseCreate(ResponseBase):
     pass
 
 
+class ResponseSubmit(OrmBaseModel):
+    survey_id: int
+    answers: list[AnswerSubmit] = []
+    fingerprint: str | None = None
+
+
+class ResponseImport(OrmBaseModel):
+    user_id: int | None = None
+    submitted_at: datetime | None = None
+    answers: list[AnswerSubmit] = []
+    fingerprint: str | None = None
+
+
 class ResponseUpdate(ResponseBase):
     pass # ??
 
 
 class ResponseResponse(ResponseBase):
     id: int
+
+
+class ResponseWithAnswers(ResponseResponse):
+    answers: list[AnswerResponse] = []
+
+
+class ResponsePageItem(ResponseResponse):
+    answers: list[AnswerResponse] | None = None
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic import BaseModel, ConfigDict
 
 from app.schemas.permission_schema import PermissionResponse
@@ -7,6 +8,9 @@ class OrmBaseModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+RoleSort = Literal['id', '-id', 'name', '-name']
+
+
 class RoleBase(OrmBaseModel):
     name: str
     description: str | None = None
@@ -1,3 +1,4 @@
+from typing import Literal
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -9,6 +10,13 @@ class OrmBaseModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+SurveySort = Literal['id', '-id', 'created_at', '-created_at']
+
+ExportFormat = Literal['csv', 'ndjson', 'parquet']
+
+TimelineBucket = Literal['minute', 'hour', 'day']
+
+
 class SurveyBase(OrmBaseModel):
     title: str = Field(min_length=3, max_length=64)
     description: str | None = None
@@ -38,3 +46,65 @@ class SurveyDetails(SurveyResponse):
 
 class SurveyDetailsWithResponses(SurveyDetails):
     responses: list[ResponseResponse]
+
+
+class OptionResult(OrmBaseModel):
+    option_id: int
+    text: str
+    count: int
+    percentage: float
+
+
+class QuestionResult(OrmBaseModel):
+    question_id: int
+    text: str
+    type: str
+    order: int
+    answered: int
+    text_answers: int
+    options: list[OptionResult] = []
+
+
+class SurveyResults(OrmBaseModel):
+    survey_id: int
+    total_responses: int
+    questions: list[QuestionResult] = []
+
+
+class CrosstabOption(OrmBaseModel):
+    option_id: int
+    text: str
+
+
+class Crosstab(OrmBaseModel):
+    survey_id: int
+    row_question_id: int
+    column_question_id: int
+    row_options: list[CrosstabOption]
+    column_options: list[CrosstabOption]
+    counts: list[list[int]]
+    row_percentages: list[list[float]]
+    column_percentages: list[list[float]]
+    row_totals: list[int]
+    column_totals: list[int]
+    total: int
+    chi_square: float
+    degrees_of_freedom: int
+    cramers_v: float | None = None
+
+
+class TimelinePoint(OrmBaseModel):
+    start: datetime
+    count: int
+
+
+class SurveyTimeline(OrmBaseModel):
+    survey_id: int
+    bucket: TimelineBucket
+    points: list[TimelinePoint]
+
+
+class RespondentEstimate(OrmBaseModel):
+    survey_id: int
+    unique_respondents: int
+    standard_error: float
@@ -1,3 +1,4 @@
+from typing import Literal
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
@@ -9,6 +10,9 @@ class OrmBaseModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+UserSort = Literal['id', '-id', 'created_at', '-created_at']
+
+
 class UserBase(OrmBaseModel):
     email: EmailStr
     username: str = Field(
@@ -0,0 +1,80 @@
+from sqlalchemy import Integer, Text, Select, select, func, cast, literal, bindparam, and_, or_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.option_model import Option
+from app.models.question_model import Question
+from app.core.config import QuestionType
+from app.schemas.answer_schema import AnswerSubmit
+
+
+async def load_survey_structure(db: AsyncSession, survey_id: int) -> tuple[dict[int, str], dict[int, int]]:
+    """Return ``{question_id: type}`` and ``{option_id: question_id}`` for the survey."""
+    result = await db.execute(
+        select(Question.id, Question.type, Option.id)
+        .outerjoin(Option, Option.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+    )
+    questions, options = {}, {}
+    for question_id, question_type, option_id in result:
+        questions[question_id] = question_type
+        if option_id is not None:
+            options[option_id] = question_id
+    return questions, options
+
+
+def validate_answers(answers: list[AnswerSubmit], questions: dict[int, str], options: dict[int, int]) -> str | None:
+    """Why the answers don't fit the survey's structure, or None when they do."""
+    answered: dict[int, int] = {}
+    for answer in answers:
+        question_type = questions.get(answer.question_id)
+        if question_type is None:
+            return f'Question {answer.question_id} does not belong to this survey'
+        if question_type == QuestionType.TEXT:
+            if answer.option_id is not None:
+                return f'Question {answer.question_id} takes a text answer, not an option'
+        elif options.get(answer.option_id) != answer.question_id:
+            return f'Option {answer.option_id} does not belong to question {answer.question_id}'
+        answered[answer.question_id] = answered.get(answer.question_id, 0) + 1
+        if question_type != QuestionType.MULTIPLE and answered[answer.question_id] > 1:
+            return f'Question {answer.question_id} accepts a single answer'
+    return None
+
+
+def valid_answers_select(survey_id: int, response_id: int, answers: list[AnswerSubmit]) -> Select:
+    """``(response_id, question_id, value, option_id)`` of the answers that fit the survey, in submission order.
+
+    The rules of ``validate_answers`` evaluated by the database, so answers can be checked and inserted in one
+    INSERT ... SELECT: fewer rows than answers means some didn't fit.
+    """
+    submitted = (
+        func.unnest(
+            bindparam('question_ids', [answer.question_id for answer in answers], type_=ARRAY(Integer)),
+            bindparam('values', [answer.value for answer in answers], type_=ARRAY(Text)),
+            bindparam('option_ids', [answer.option_id for answer in answers], type_=ARRAY(Integer)),
+        )
+        .table_valued('question_id', 'value', 'option_id', with_ordinality='position')
+        .render_derived(with_types=False)
+    )
+    counted = select(
+        submitted.c.question_id,
+        submitted.c.value,
+        submitted.c.option_id,
+        submitted.c.position,
+        func.count().over(partition_by=submitted.c.question_id).label('times'),
+    ).subquery()
+    # compared as text so the check holds whether the column is a plain string or a Postgres enum
+    question_type = cast(Question.type, Text)
+    return (
+        select(literal(response_id), counted.c.question_id, counted.c.value, counted.c.option_id)
+        .join(Question, and_(Question.id == counted.c.question_id, Question.survey_id == survey_id))
+        .outerjoin(Option, Option.id == counted.c.option_id)
+        .where(
+            or_(
+                and_(question_type == QuestionType.TEXT.value, counted.c.option_id.is_(None)),
+                and_(question_type != QuestionType.TEXT.value, Option.question_id == counted.c.question_id),
+            ),
+            or_(question_type == QuestionType.MULTIPLE.value, counted.c.times == 1),
+        )
+        .order_by(counted.c.position)
+    )
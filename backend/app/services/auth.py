@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user_model import User
 from app.crud.user_crud import user
 from app.utils.exceptions import WrongPasswordException, UserNotFoundException
-from app.core.security import verify_password
+from app.core.security import check_password, hash_password, password_needs_rehash
 from app.schemas.user_schema import UserLogin
 
 
@@ -11,6 +11,10 @@ async def authenticate_user(data: UserLogin, db: AsyncSession) -> User | None:
     user_obj = await user.get_user_by_email_or_username(identifier=data.identifier, db=db)
     if not user_obj:
         raise UserNotFoundException
-    if not verify_password(plain_password=data.password, hashed_password=user_obj.hashed_password):
+    if not await check_password(plain_password=data.password, hashed_password=user_obj.hashed_password):
         raise WrongPasswordException
+    if password_needs_rehash(user_obj.hashed_password):
+        user_obj = await user.update(
+            obj_current=user_obj, obj_in={'hashed_password': await hash_password(data.password)}, db=db
+        )
     return user_obj
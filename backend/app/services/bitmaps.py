@@ -0,0 +1,192 @@
+import uuid
+import asyncio
+import numpy as np
+from collections.abc import Iterable
+from redis.asyncio import Redis
+from sqlalchemy import select, func
+
+from app.db.session import Session, get_redis_db
+from app.models.answer_model import Answer
+from app.models.question_model import Question
+from app.models.response_model import Response
+from app.models.survey_model import Survey
+
+ALL_RESPONSES = 'all'
+
+# bumped whenever what the bitmaps hold or how they are indexed changes, older ones are dropped and rebuilt
+READY = 'ready:2'
+
+# bits only land once the index exists (or is being built); a missing index is built from answers on first use
+SET_BITS_IF_INDEXED = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local offset = tonumber(redis.call('GET', KEYS[4]))
+if not offset then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    local key = KEYS[2] .. ARGV[i]
+    redis.call('SETBIT', key, tonumber(ARGV[i + 1]) - offset, 1)
+    redis.call('SADD', KEYS[3], key)
+end
+return 1
+"""
+
+
+def bitmap_key(survey_id: int, name: int | str) -> str:
+    return f'survey:{survey_id}:bitmap:{name}'
+
+
+def answered_name(question_id: int) -> str:
+    return f'q{question_id}'
+
+
+def text_name(question_id: int) -> str:
+    return f't{question_id}'
+
+
+def state_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:bitmaps:state'
+
+
+def keys_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:bitmaps:keys'
+
+
+def offset_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:bitmaps:offset'
+
+
+def pack_bits(positions: np.ndarray) -> bytes:
+    """Bitmap with the given bits set, in Redis SETBIT order (offset 0 is the first byte's high bit)."""
+    if not len(positions):
+        return b''
+    bits = np.zeros(int(positions.max()) + 1, dtype=bool)
+    bits[positions] = True
+    return np.packbits(bits).tobytes()
+
+
+def unpack_bits(bitmap: bytes | None) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(bitmap or b'', dtype=np.uint8)).astype(bool)
+
+
+def _pack_groups(labels: np.ndarray, positions: np.ndarray) -> dict[int, bytes]:
+    order = np.argsort(labels, kind='stable')
+    labels, positions = labels[order], positions[order]
+    keys, starts = np.unique(labels, return_index=True)
+    return {int(key): pack_bits(chunk) for key, chunk in zip(keys, np.split(positions, starts[1:]))}
+
+
+def _build_bitmaps(
+    offset: int,
+    response_ids: np.ndarray,
+    answer_responses: np.ndarray,
+    answer_questions: np.ndarray,
+    answer_options: np.ndarray,
+    answer_has_value: np.ndarray,
+) -> dict:
+    positions = answer_responses - offset
+    has_option = answer_options > 0
+    bitmaps = {ALL_RESPONSES: pack_bits(response_ids - offset)}
+    bitmaps.update(_pack_groups(answer_options[has_option], positions[has_option]))
+    for question_id, bitmap in _pack_groups(answer_questions, positions).items():
+        bitmaps[answered_name(question_id)] = bitmap
+    for question_id, bitmap in _pack_groups(answer_questions[answer_has_value], positions[answer_has_value]).items():
+        bitmaps[text_name(question_id)] = bitmap
+    return bitmaps
+
+
+async def build_bitmaps(redis_client: Redis, survey_id: int):
+    """(Re)build the survey's bitmaps: one for all responses, one per option and, per question, one for the
+    responses answering it and one for those giving it a text value.
+
+    Bits are indexed by ``response id - offset``, the offset coming from the survey's response id floor, so a
+    bitmap spans the ids handed out during the survey's life rather than every id ever issued.
+
+    The state key is set before reading answers so responses committed meanwhile set their own bits; built bitmaps
+    are OR-ed into whatever is there, which also makes concurrent builds harmless. Reads go to the primary so a
+    lagging replica can't leave holes.
+    """
+    async with Session() as db:
+        floor = await db.scalar(select(Survey.response_id_floor).where(Survey.id == survey_id))
+    if floor is None:
+        return
+    offset = floor + 1
+    state = await redis_client.get(state_key(survey_id))
+    async with redis_client.pipeline(transaction=True) as pipe:
+        if state not in (None, 'building', READY):
+            # built by an older layout, drop it rather than merge into it
+            pipe.delete(keys_key(survey_id), *await redis_client.smembers(keys_key(survey_id)))
+            pipe.set(offset_key(survey_id), offset)
+            pipe.set(state_key(survey_id), 'building')
+        else:
+            pipe.set(offset_key(survey_id), offset)
+            pipe.set(state_key(survey_id), 'building', nx=True)
+        await pipe.execute()
+    async with Session() as db:
+        response_ids = await db.scalar(select(func.array_agg(Response.id)).where(Response.survey_id == survey_id))
+        answer_columns = (
+            await db.execute(
+                select(
+                    func.array_agg(Answer.response_id),
+                    func.array_agg(Answer.question_id),
+                    func.array_agg(func.coalesce(Answer.option_id, 0)),
+                    func.array_agg(Answer.value.is_not(None)),
+                )
+                .join(Question, Question.id == Answer.question_id)
+                .where(Question.survey_id == survey_id)
+            )
+        ).one()
+    bitmaps = await asyncio.to_thread(
+        _build_bitmaps,
+        offset,
+        np.asarray(response_ids or [], dtype=np.int64),
+        *(
+            np.asarray(column or [], dtype=dtype)
+            for column, dtype in zip(answer_columns, (np.int64, np.int64, np.int64, bool))
+        ),
+    )
+    merge_key = f'{keys_key(survey_id)}:merge:{uuid.uuid4().hex}'
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for name, bitmap in bitmaps.items():
+            pipe.set(merge_key, bitmap)
+            pipe.bitop('OR', bitmap_key(survey_id, name), bitmap_key(survey_id, name), merge_key)
+            pipe.sadd(keys_key(survey_id), bitmap_key(survey_id, name))
+        pipe.delete(merge_key)
+        pipe.set(state_key(survey_id), READY)
+        await pipe.execute()
+
+
+async def ensure_bitmaps(redis_client: Redis, survey_id: int):
+    if await redis_client.get(state_key(survey_id)) != READY:
+        await build_bitmaps(redis_client, survey_id)
+
+
+async def record_bitmaps(survey_id: int, responses: Iterable[tuple[int, Iterable[Answer]]]):
+    """Set the bits of freshly committed responses, each given as ``(response_id, answers)``."""
+    args = []
+    for response_id, answers in responses:
+        args += [ALL_RESPONSES, response_id]
+        for answer in answers:
+            args += [answered_name(answer.question_id), response_id]
+            if answer.option_id is not None:
+                args += [answer.option_id, response_id]
+            if answer.value is not None:
+                args += [text_name(answer.question_id), response_id]
+    redis_client = await get_redis_db()
+    await redis_client.eval(
+        SET_BITS_IF_INDEXED,
+        4,
+        state_key(survey_id),
+        bitmap_key(survey_id, ''),
+        keys_key(survey_id),
+        offset_key(survey_id),
+        *args,
+    )
+
+
+async def drop_bitmaps(survey_id: int):
+    redis_client = await get_redis_db()
+    keys = await redis_client.smembers(keys_key(survey_id))
+    await redis_client.delete(state_key(survey_id), keys_key(survey_id), offset_key(survey_id), *keys)
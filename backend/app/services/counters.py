@@ -0,0 +1,220 @@
+import uuid
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Iterable
+from redis.asyncio import Redis
+from sqlalchemy import select, func, distinct
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import Session, get_redis_db
+from app.models.answer_model import Answer
+from app.models.question_model import Question
+from app.models.response_model import Response
+from app.core.config import settings
+from app.services.respondents import ensure_respondents
+
+logger = logging.getLogger(__name__)
+
+COUNTED_SURVEYS_KEY = 'survey-counters:surveys'
+RECONCILE_LOCK_KEY = 'survey-counters:reconcile-lock'
+
+# increments land on an existing hash, and on the pending hash while a rebuild runs so they survive it;
+# a missing hash is rebuilt from answers on the next read
+INCREMENT_IF_EXISTS = """
+local exists = redis.call('EXISTS', KEYS[1]) == 1
+local building = redis.call('PTTL', KEYS[2])
+for i = 1, #ARGV, 2 do
+    if exists then
+        redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+    if building > 0 then
+        redis.call('HINCRBY', KEYS[3], ARGV[i], ARGV[i + 1])
+    end
+end
+if building > 0 then
+    redis.call('PEXPIRE', KEYS[3], building)
+end
+return 1
+"""
+
+# replaces the hash with the rebuilt counts plus whatever arrived meanwhile, unless a newer rebuild took over
+FINISH_REBUILD = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+local pending = redis.call('HGETALL', KEYS[3])
+for i = 1, #pending, 2 do
+    redis.call('HINCRBY', KEYS[1], pending[i], pending[i + 1])
+end
+redis.call('DEL', KEYS[2], KEYS[3])
+redis.call('SADD', KEYS[4], ARGV[2])
+return 1
+"""
+
+REBUILD_TIMEOUT_SECONDS = 300
+
+SurveyCounts = tuple[int, dict[int, tuple[int, int]], dict[int, int]]
+
+
+def counters_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:counts'
+
+
+def building_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:counts:building'
+
+
+def pending_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:counts:pending'
+
+
+async def count_from_answers(db: AsyncSession, survey_id: int) -> SurveyCounts:
+    """Aggregate in SQL: total responses, ``{question_id: (answered, text_answers)}`` and ``{option_id: count}``."""
+    # the three aggregates have to come from one snapshot
+    await db.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+    total_responses = await db.scalar(select(func.count()).select_from(Response).where(Response.survey_id == survey_id))
+    question_stats = await db.execute(
+        select(Answer.question_id, func.count(distinct(Answer.response_id)), func.count(Answer.value))
+        .join(Question, Question.id == Answer.question_id)
+        .where(Question.survey_id == survey_id)
+        .group_by(Answer.question_id)
+    )
+    option_counts = await db.execute(
+        select(Answer.option_id, func.count())
+        .join(Question, Question.id == Answer.question_id)
+        .where(Question.survey_id == survey_id, Answer.option_id.is_not(None))
+        .group_by(Answer.option_id)
+    )
+    return (
+        total_responses,
+        {question_id: (answered, text_answers) for question_id, answered, text_answers in question_stats},
+        dict(option_counts.all()),
+    )
+
+
+def _to_fields(counts: SurveyCounts) -> dict[str, int]:
+    total_responses, question_stats, option_counts = counts
+    fields = {'responses': total_responses}
+    for question_id, (answered, text_answers) in question_stats.items():
+        fields[f'q:{question_id}'] = answered
+        fields[f't:{question_id}'] = text_answers
+    for option_id, count in option_counts.items():
+        fields[f'o:{option_id}'] = count
+    return fields
+
+
+def _from_fields(fields: dict[str, str]) -> SurveyCounts:
+    question_stats: dict[int, list[int]] = {}
+    option_counts = {}
+    for field, value in fields.items():
+        kind, _, entity_id = field.partition(':')
+        if kind == 'q':
+            question_stats.setdefault(int(entity_id), [0, 0])[0] = int(value)
+        elif kind == 't':
+            question_stats.setdefault(int(entity_id), [0, 0])[1] = int(value)
+        elif kind == 'o':
+            option_counts[int(entity_id)] = int(value)
+    return (
+        int(fields.get('responses', 0)),
+        {question_id: tuple(stats) for question_id, stats in question_stats.items()},
+        option_counts,
+    )
+
+
+async def rebuild_counters(redis_client: Redis, survey_id: int) -> SurveyCounts:
+    """Recount the survey from answers on the primary, a lagging replica would be trusted until the next reconcile.
+
+    Like the option bitmaps, the building marker is set before reading so increments arriving meanwhile are
+    collected in a pending hash and added on top of the recount. Counts are not idempotent the way bits are: a
+    response committed before the snapshot whose increment only lands after the marker is counted twice, a window
+    of one commit-to-increment gap that the periodic reconcile repairs.
+    """
+    token = uuid.uuid4().hex
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(building_key(survey_id), token, ex=REBUILD_TIMEOUT_SECONDS)
+        pipe.delete(pending_key(survey_id))
+        await pipe.execute()
+    async with Session() as db:
+        counts = await count_from_answers(db, survey_id)
+    fields = _to_fields(counts)
+    finished = await redis_client.eval(
+        FINISH_REBUILD,
+        4,
+        counters_key(survey_id),
+        building_key(survey_id),
+        pending_key(survey_id),
+        COUNTED_SURVEYS_KEY,
+        token,
+        survey_id,
+        *(item for field_value in fields.items() for item in field_value),
+    )
+    if finished:
+        return _from_fields(await redis_client.hgetall(counters_key(survey_id)))
+    return counts
+
+
+async def get_counts(redis_client: Redis, survey_id: int) -> SurveyCounts:
+    """Live counts in O(options) from the counter hash, rebuilding it from answers when it is missing."""
+    fields = await redis_client.hgetall(counters_key(survey_id))
+    if not fields:
+        return await rebuild_counters(redis_client, survey_id)
+    return _from_fields(fields)
+
+
+async def record_responses(survey_id: int, responses: Iterable[Iterable[Answer]]):
+    """Bump counters for freshly committed responses, each given as its answers."""
+    increments = Counter()
+    for answers in responses:
+        increments['responses'] += 1
+        for question_id in {answer.question_id for answer in answers}:
+            increments[f'q:{question_id}'] += 1
+        for answer in answers:
+            if answer.value is not None:
+                increments[f't:{answer.question_id}'] += 1
+            if answer.option_id is not None:
+                increments[f'o:{answer.option_id}'] += 1
+    args = [item for field_increment in increments.items() for item in field_increment]
+    redis_client = await get_redis_db()
+    await redis_client.eval(
+        INCREMENT_IF_EXISTS, 3, counters_key(survey_id), building_key(survey_id), pending_key(survey_id), *args
+    )
+
+
+async def drop_counters(survey_id: int):
+    redis_client = await get_redis_db()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(counters_key(survey_id), building_key(survey_id), pending_key(survey_id))
+        pipe.srem(COUNTED_SURVEYS_KEY, survey_id)
+        await pipe.execute()
+
+
+async def reconcile_counters():
+    """Rebuild every survey's counters from answers to repair drift, and its respondent structures if they're
+    missing, off the submit path. Only one worker runs it per interval."""
+    redis_client = await get_redis_db()
+    interval = settings.SURVEY_COUNTERS_RECONCILE_INTERVAL_SECONDS
+    if not await redis_client.set(RECONCILE_LOCK_KEY, 1, nx=True, ex=interval):
+        return
+    for survey_id in await redis_client.smembers(COUNTED_SURVEYS_KEY):
+        # one short transaction per survey so long reconciliations don't pin old row versions
+        try:
+            await rebuild_counters(redis_client, int(survey_id))
+            await ensure_respondents(redis_client, int(survey_id))
+        except Exception:
+            # one broken survey must not keep the others from being repaired
+            logger.exception('Reconciling the counters of survey %s failed', survey_id)
+
+
+async def run_counter_reconciliation():
+    while True:
+        await asyncio.sleep(settings.SURVEY_COUNTERS_RECONCILE_INTERVAL_SECONDS)
+        try:
+            await reconcile_counters()
+        except Exception:
+            # counters stay usable, the next run gets another chance
+            logger.exception('Counter reconciliation failed')
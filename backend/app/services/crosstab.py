@@ -0,0 +1,152 @@
+import asyncio
+import numpy as np
+from redis.asyncio import Redis
+from sqlalchemy import select, func, cast, literal_column, BigInteger, LargeBinary
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.answer_model import Answer
+from app.crud.survey_crud import survey
+from app.services.results import load_structure
+from app.services.segments import evaluate_segment, in_segment
+from app.core.config import QuestionType
+from app.schemas.survey_schema import Crosstab, CrosstabOption
+from app.utils.exceptions import QuestionNotFoundException, NotChoiceQuestionException
+
+
+def _packed(column):
+    # big-endian int8s concatenated into one bytea: the driver hands back bytes instead of a list of boxed ints
+    return func.string_agg(func.int8send(cast(column, BigInteger)), literal_column("''::bytea"), type_=LargeBinary)
+
+
+async def load_choice_answers(db: AsyncSession, question_ids: list[int]) -> tuple[bytes, bytes, bytes]:
+    """Fetch ``(response_id, question_id, option_id)`` of the choice answers as three packed columns in one row,
+    decoded by ``unpack_columns``."""
+    result = await db.execute(
+        select(_packed(Answer.response_id), _packed(Answer.question_id), _packed(Answer.option_id))
+        .where(Answer.question_id.in_(question_ids), Answer.option_id.is_not(None))
+    )
+    return tuple(column or b'' for column in result.one())
+
+
+def unpack_columns(columns: tuple[bytes, ...]) -> tuple[np.ndarray, ...]:
+    return tuple(np.frombuffer(column, dtype='>i8').astype(np.int64) for column in columns)
+
+
+def _option_positions(option_ids: np.ndarray, options: list[int]) -> np.ndarray:
+    """Map option ids to their position in ``options``, which must be sorted."""
+    return np.searchsorted(np.asarray(options, dtype=np.int64), option_ids)
+
+
+def contingency_table(
+    row_responses: np.ndarray,
+    row_positions: np.ndarray,
+    column_responses: np.ndarray,
+    column_positions: np.ndarray,
+    shape: tuple[int, int],
+) -> np.ndarray:
+    """Count every (row option, column option) pair given by the same response.
+
+    A response choosing several options of a multiple choice question contributes each combination.
+    """
+    order = np.argsort(column_responses, kind='stable')
+    column_responses, column_positions = column_responses[order], column_positions[order]
+    starts = np.searchsorted(column_responses, row_responses, side='left')
+    matches = np.searchsorted(column_responses, row_responses, side='right') - starts
+    # expand every row answer into one entry per column answer of the same response
+    offsets = np.arange(matches.sum()) - np.repeat(np.cumsum(matches) - matches, matches)
+    rows = np.repeat(row_positions, matches)
+    columns = column_positions[np.repeat(starts, matches) + offsets]
+    return np.bincount(rows * shape[1] + columns, minlength=shape[0] * shape[1]).reshape(shape)
+
+
+def _percentages(counts: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(totals > 0, np.round(counts / totals * 100, 2), 0.0)
+
+
+def chi_square(counts: np.ndarray) -> tuple[float, int, float | None]:
+    """Pearson's chi-square, its degrees of freedom and Cramér's V, ignoring empty rows and columns."""
+    counts = counts[counts.sum(axis=1) > 0][:, counts.sum(axis=0) > 0]
+    total = counts.sum()
+    if counts.shape[0] < 2 or counts.shape[1] < 2:
+        return 0.0, 0, None
+    expected = np.outer(counts.sum(axis=1), counts.sum(axis=0)) / total
+    statistic = float(((counts - expected) ** 2 / expected).sum())
+    cramers_v = float(np.sqrt(statistic / (total * (min(counts.shape) - 1))))
+    return statistic, (counts.shape[0] - 1) * (counts.shape[1] - 1), cramers_v
+
+
+def compute_crosstab(
+    survey_id: int,
+    row_question: dict,
+    column_question: dict,
+    columns: tuple[bytes, bytes, bytes],
+    segment: tuple[np.ndarray, int] | None = None,
+) -> Crosstab:
+    """Crosstab from the packed columns of ``load_choice_answers``, restricted to the responses of an evaluated
+    segment if one is given."""
+    response_ids, question_ids, option_ids = unpack_columns(columns)
+    if segment is not None:
+        selected = in_segment(*segment, response_ids)
+        response_ids, question_ids, option_ids = response_ids[selected], question_ids[selected], option_ids[selected]
+    row_options = sorted(option['option_id'] for option in row_question['options'])
+    column_options = sorted(option['option_id'] for option in column_question['options'])
+    # answers pointing at an option of another question are ignored rather than miscounted
+    is_row = (question_ids == row_question['question_id']) & np.isin(option_ids, row_options)
+    is_column = (question_ids == column_question['question_id']) & np.isin(option_ids, column_options)
+    counts = contingency_table(
+        response_ids[is_row],
+        _option_positions(option_ids[is_row], row_options),
+        response_ids[is_column],
+        _option_positions(option_ids[is_column], column_options),
+        (len(row_options), len(column_options)),
+    )
+    row_totals, column_totals = counts.sum(axis=1), counts.sum(axis=0)
+    statistic, degrees_of_freedom, cramers_v = chi_square(counts)
+    texts = {
+        option['option_id']: option['text']
+        for question in (row_question, column_question)
+        for option in question['options']
+    }
+    return Crosstab(
+        survey_id=survey_id,
+        row_question_id=row_question['question_id'],
+        column_question_id=column_question['question_id'],
+        row_options=[CrosstabOption(option_id=option_id, text=texts[option_id]) for option_id in row_options],
+        column_options=[CrosstabOption(option_id=option_id, text=texts[option_id]) for option_id in column_options],
+        counts=counts.tolist(),
+        row_percentages=_percentages(counts, row_totals[:, None]).tolist(),
+        column_percentages=_percentages(counts, column_totals[None, :]).tolist(),
+        row_totals=row_totals.tolist(),
+        column_totals=column_totals.tolist(),
+        total=int(counts.sum()),
+        chi_square=statistic,
+        degrees_of_freedom=degrees_of_freedom,
+        cramers_v=cramers_v,
+    )
+
+
+async def get_crosstab(
+    redis_client: Redis,
+    db: AsyncSession,
+    survey_id: int,
+    row_question_id: int,
+    column_question_id: int,
+    segment: str | None = None,
+) -> Crosstab:
+    """Cross-tabulate two choice questions of a survey, optionally within a respondent segment.
+
+    Decoding the answers and the number crunching run in a worker thread.
+    """
+    await survey.get_survey(db=db, survey_id=survey_id)
+    questions = {question['question_id']: question for question in await load_structure(db, survey_id)}
+    for question_id in (row_question_id, column_question_id):
+        if question_id not in questions:
+            raise QuestionNotFoundException
+        if questions[question_id]['type'] == QuestionType.TEXT:
+            raise NotChoiceQuestionException
+    columns = await load_choice_answers(db, [row_question_id, column_question_id])
+    evaluated = await evaluate_segment(redis_client, survey_id, segment) if segment else None
+    return await asyncio.to_thread(
+        compute_crosstab, survey_id, questions[row_question_id], questions[column_question_id], columns, evaluated
+    )
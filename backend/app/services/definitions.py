@@ -0,0 +1,158 @@
+import json
+import asyncio
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError, TimeoutError
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import Session, get_redis_db
+from app.models.survey_model import Survey
+from app.models.question_model import Question
+from app.core.config import settings
+from app.schemas.survey_schema import SurveyResponse, SurveyDetails
+from app.schemas.question_schema import QuestionDetails
+from app.utils.cache import LRUCache
+from app.utils.etag import make_etag
+from app.utils.exceptions import SurveyNotFoundException, QuestionNotFoundException
+
+# every cached view belongs to the scope whose version a mutation bumps
+VIEW_SCOPES = {'survey': 'survey', 'questions': 'survey', 'options': 'question'}
+INVALIDATION_CHANNEL = 'definition:invalidations'
+
+_local_definitions = LRUCache(
+    maxsize=settings.SURVEY_DEFINITION_LOCAL_CACHE_SIZE, ttl=settings.SURVEY_DEFINITION_LOCAL_CACHE_TTL_SECONDS
+)
+# bumped on every invalidation this worker sees, a lookup that overlapped one doesn't fill the local cache
+_invalidations = {'seen': 0}
+
+
+def definition_key(view: str, entity_id: int) -> str:
+    return f'definition:{view}:{entity_id}'
+
+
+def version_key(scope: str, entity_id: int) -> str:
+    return f'definition-version:{scope}:{entity_id}'
+
+
+async def _load_survey(db: AsyncSession, survey_id: int) -> BaseModel:
+    survey_in_db = await db.get(Survey, survey_id)
+    if not survey_in_db:
+        raise SurveyNotFoundException
+    return SurveyResponse.model_validate(survey_in_db)
+
+
+async def _load_survey_questions(db: AsyncSession, survey_id: int) -> BaseModel:
+    survey_in_db = await db.scalar(select(Survey).options(selectinload(Survey.questions)).where(Survey.id == survey_id))
+    if not survey_in_db:
+        raise SurveyNotFoundException
+    return SurveyDetails.model_validate(survey_in_db)
+
+
+async def _load_question_options(db: AsyncSession, question_id: int) -> BaseModel:
+    question_in_db = await db.scalar(
+        select(Question).options(selectinload(Question.options)).where(Question.id == question_id)
+    )
+    if not question_in_db:
+        raise QuestionNotFoundException
+    return QuestionDetails.model_validate(question_in_db)
+
+
+LOADERS = {'survey': _load_survey, 'questions': _load_survey_questions, 'options': _load_question_options}
+
+
+async def get_definition(redis_client: Redis, view: str, entity_id: int) -> tuple[str, str]:
+    """Return the serialized view and its ETag from the local LRU, then Redis, rebuilding it on a stale version.
+
+    Rebuilds read the primary so a lagging replica can never be cached under a fresh version.
+    """
+    entry = _local_definitions.get((view, entity_id))
+    if entry is not None:
+        return entry
+
+    seen = _invalidations['seen']
+    cached, version = await redis_client.mget(
+        definition_key(view, entity_id), version_key(VIEW_SCOPES[view], entity_id)
+    )
+    version = version or '0'
+    if cached:
+        data = json.loads(cached)
+        if data['version'] == version:
+            entry = data['body'], data['etag']
+            if _invalidations['seen'] == seen:
+                _local_definitions.set((view, entity_id), entry)
+            return entry
+
+    async with Session() as db:
+        body = (await LOADERS[view](db, entity_id)).model_dump_json()
+    entry = body, make_etag(body)
+    await redis_client.set(
+        definition_key(view, entity_id),
+        json.dumps({'version': version, 'body': body, 'etag': entry[1]}),
+        ex=settings.SURVEY_DEFINITION_CACHE_TTL_SECONDS,
+    )
+    if _invalidations['seen'] == seen:
+        _local_definitions.set((view, entity_id), entry)
+    return entry
+
+
+def forget_definitions(scope: str | None, entity_ids: list[int]):
+    """Drop the views of the given scope's entities from the local cache, everything when ``scope`` is None."""
+    _invalidations['seen'] += 1
+    if scope is None:
+        _local_definitions.clear()
+        return
+    for view, view_scope in VIEW_SCOPES.items():
+        if view_scope == scope:
+            for entity_id in entity_ids:
+                _local_definitions.pop((view, entity_id))
+
+
+async def _bump(scope: str, entity_ids: list[int]):
+    if not entity_ids:
+        return
+    redis_client = await get_redis_db()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for entity_id in entity_ids:
+            pipe.incr(version_key(scope, entity_id))
+        await pipe.execute()
+    # every worker, this one included, drops its local copies
+    forget_definitions(scope, entity_ids)
+    await redis_client.publish(INVALIDATION_CHANNEL, json.dumps({'scope': scope, 'entity_ids': entity_ids}))
+
+
+async def bump_survey_definition(survey_id: int):
+    """Invalidate the cached survey and its question list, e.g. after a survey or question changed."""
+    await _bump('survey', [survey_id])
+
+
+async def bump_question_definition(question_id: int):
+    """Invalidate the cached question with its options, e.g. after a question or option changed."""
+    await _bump('question', [question_id])
+
+
+async def bump_question_definitions(question_ids: list[int]):
+    """Invalidate several cached questions at once, e.g. those of a deleted survey."""
+    await _bump('question', question_ids)
+
+
+async def listen_for_definition_invalidations():
+    """Long-running task evicting definitions invalidated by any worker."""
+    while True:
+        redis_client = await get_redis_db()
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # anything invalidated while we were not subscribed is unknown, so start from scratch
+            forget_definitions(None, [])
+            while True:
+                message = await pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    data = json.loads(message['data'])
+                    forget_definitions(data['scope'], data['entity_ids'])
+        except (ConnectionError, TimeoutError):
+            forget_definitions(None, [])
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.reset()
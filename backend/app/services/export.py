@@ -0,0 +1,151 @@
+import io
+import csv
+import json
+from importlib.util import find_spec
+from collections.abc import AsyncIterator
+from sqlalchemy import select
+
+from app.db.session import Session, ReadSession
+from app.models.answer_model import Answer
+from app.models.option_model import Option
+from app.models.question_model import Question
+from app.models.response_model import Response
+from app.core.config import settings
+from app.utils.exceptions import ExportFormatUnavailableException
+
+EXPORT_MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+BASE_COLUMNS = ['response_id', 'user_id', 'submitted_at']
+
+
+def ensure_format_available(export_format: str):
+    if export_format == 'parquet' and find_spec('pyarrow') is None:
+        raise ExportFormatUnavailableException
+
+
+async def iter_wide_rows(survey_id: int) -> AsyncIterator[tuple[list[str], list[list]]]:
+    """Yield the header once, then batches of one wide row per response with answers pivoted into columns.
+
+    Rows come from a server-side cursor ordered by response id, so memory stays at one batch. The long-running
+    read goes to the replica when one is configured.
+    """
+    async with (ReadSession or Session)() as db:
+        questions = (
+            await db.execute(
+                select(Question.id, Question.text).where(Question.survey_id == survey_id).order_by(Question.order)
+            )
+        ).all()
+        option_texts = dict(
+            (
+                await db.execute(
+                    select(Option.id, Option.text)
+                    .join(Question, Question.id == Option.question_id)
+                    .where(Question.survey_id == survey_id)
+                )
+            ).all()
+        )
+        positions = {question_id: len(BASE_COLUMNS) + i for i, (question_id, _) in enumerate(questions)}
+        header = BASE_COLUMNS + [f'{text} [{question_id}]' for question_id, text in questions]
+
+        stmt = (
+            select(
+                Response.id, Response.user_id, Response.submitted_at, Answer.question_id, Answer.option_id, Answer.value
+            )
+            .outerjoin(Answer, Answer.response_id == Response.id)
+            .where(Response.survey_id == survey_id)
+            .order_by(Response.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        result = await db.stream(stmt)
+        current: list | None = None
+        batch: list[list] = []
+        first = True
+        async for partition in result.partitions():
+            for response_id, user_id, submitted_at, question_id, option_id, value in partition:
+                if current is None or current[0] != response_id:
+                    if current is not None:
+                        batch.append(current)
+                    current = [response_id, user_id, submitted_at] + [None] * len(questions)
+                if question_id in positions:
+                    answer = option_texts.get(option_id) if option_id is not None else value
+                    if answer is None:
+                        continue
+                    position = positions[question_id]
+                    # multiple choice answers share one cell
+                    current[position] = answer if current[position] is None else f'{current[position]}; {answer}'
+            if batch:
+                yield (header if first else None), batch
+                first = False
+                batch = []
+        if current is not None:
+            batch.append(current)
+        if batch or first:
+            yield (header if first else None), batch
+
+
+async def export_csv(survey_id: int) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    async for header, rows in iter_wide_rows(survey_id):
+        if header:
+            writer.writerow(header)
+        writer.writerows([row[0], row[1], row[2].isoformat(), *row[3:]] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def export_ndjson(survey_id: int) -> AsyncIterator[str]:
+    columns = None
+    async for header, rows in iter_wide_rows(survey_id):
+        columns = header or columns
+        yield ''.join(
+            json.dumps(dict(zip(columns, [row[0], row[1], row[2].isoformat(), *row[3:]]))) + '\n' for row in rows
+        )
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file collecting what the Parquet writer produced since the last drain."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def export_parquet(survey_id: int) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ByteSink()
+    writer = None
+    async for header, rows in iter_wide_rows(survey_id):
+        if writer is None:
+            schema = pa.schema(
+                [('response_id', pa.int64()), ('user_id', pa.int64()), ('submitted_at', pa.timestamp('us', tz='UTC'))]
+                + [(column, pa.string()) for column in header[len(BASE_COLUMNS):]]
+            )
+            writer = pq.ParquetWriter(sink, schema)
+        if rows:
+            # one row group per batch keeps only the current batch in memory
+            writer.write_table(pa.Table.from_pylist([dict(zip(schema.names, row)) for row in rows], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+EXPORTERS = {'csv': export_csv, 'ndjson': export_ndjson, 'parquet': export_parquet}
@@ -0,0 +1,97 @@
+import json
+import uuid
+import asyncio
+import hashlib
+from contextlib import suppress
+from collections.abc import Awaitable, Callable
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.utils.exceptions import IdempotencyKeyReusedException, IdempotencyKeyInProgressException
+
+# only the request holding the claim may settle it, a claim that expired and was taken over is left alone
+SETTLE_IF_CLAIMED = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return 1
+"""
+
+EXTEND_IF_CLAIMED = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+return redis.call('EXPIRE', KEYS[1], ARGV[2])
+"""
+
+
+def replay_key(user_id: int, scope: str, key: str) -> str:
+    return f'idempotency:{user_id}:{scope}:{key}'
+
+
+def request_hash(obj_in: BaseModel) -> str:
+    return hashlib.sha256(obj_in.model_dump_json().encode()).hexdigest()
+
+
+async def _keep_claim(redis_client: Redis, key: str, claim: str):
+    """Extend the claim while the request runs so a slow request isn't run a second time by a retry."""
+    ttl = settings.IDEMPOTENCY_CLAIM_TTL_SECONDS
+    while True:
+        await asyncio.sleep(ttl / 3)
+        if not await redis_client.eval(EXTEND_IF_CLAIMED, 1, key, claim, ttl):
+            return
+
+
+async def run_once(
+    redis_client: Redis,
+    key: str,
+    obj_in: BaseModel,
+    call: Callable[[], Awaitable[BaseModel]],
+) -> tuple[dict, bool]:
+    """Run ``call`` once per idempotency key and return ``(body, replayed)``.
+
+    The first request claims the key with SET NX and caches its result; retries get that result back, and
+    retries arriving while it still runs wait for it instead of running again; the claim is extended for as long
+    as it runs. Failures release the key so the request can be retried, so ``call`` must not fail once it has
+    committed. Reusing a key for a different request body is refused.
+    """
+    fingerprint = request_hash(obj_in)
+    claim = json.dumps({'state': 'pending', 'request': fingerprint, 'claim': uuid.uuid4().hex})
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.02
+    while not await redis_client.set(key, claim, nx=True, ex=settings.IDEMPOTENCY_CLAIM_TTL_SECONDS):
+        stored = await redis_client.get(key)
+        if stored is None:
+            # the original failed or its claim expired, try to claim again
+            continue
+        stored = json.loads(stored)
+        if stored['request'] != fingerprint:
+            raise IdempotencyKeyReusedException
+        if stored['state'] == 'done':
+            return stored['body'], True
+        if loop.time() >= deadline:
+            raise IdempotencyKeyInProgressException
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+    keeper = asyncio.create_task(_keep_claim(redis_client, key, claim))
+    try:
+        body = (await call()).model_dump(mode='json')
+    except BaseException:
+        await redis_client.eval(SETTLE_IF_CLAIMED, 1, key, claim, '', 0)
+        raise
+    finally:
+        keeper.cancel()
+        with suppress(asyncio.CancelledError, RedisError):
+            await keeper
+    result = json.dumps({'state': 'done', 'request': fingerprint, 'body': body})
+    await redis_client.eval(SETTLE_IF_CLAIMED, 1, key, claim, result, settings.IDEMPOTENCY_TTL_SECONDS)
+    return body, False
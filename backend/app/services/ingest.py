@@ -0,0 +1,111 @@
+import asyncpg
+from collections.abc import AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import Session
+from app.models.user_model import User
+from app.crud.response_crud import response
+from app.services.answers import load_survey_structure, validate_answers
+from app.core.config import settings
+from app.schemas.response_schema import ResponseImport
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes | None]]:
+    """Split a byte stream into numbered lines without buffering more than one partial line.
+
+    Lines longer than ``INGEST_MAX_LINE_BYTES`` are dropped as they stream in and yielded as ``None``.
+    """
+    max_length = settings.INGEST_MAX_LINE_BYTES
+    buffer = b''
+    line_no = 0
+    overlong = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            line_no += 1
+            yield line_no, None if overlong or len(line) > max_length else line
+            overlong = False
+        if len(buffer) > max_length:
+            overlong, buffer = True, b''
+    if buffer or overlong:
+        yield line_no + 1, None if overlong or len(buffer) > max_length else buffer
+
+
+async def unknown_user_ids(db: AsyncSession, records: list[ResponseImport]) -> set[int]:
+    user_ids = {record.user_id for record in records if record.user_id is not None}
+    if not user_ids:
+        return set()
+    return user_ids - set((await db.scalars(select(User.id).where(User.id.in_(user_ids)))).all())
+
+
+async def ingest_responses(survey_id: int, chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """Validate NDJSON response records as they stream in and store them every ``INGEST_CHUNK_SIZE`` rows.
+
+    Yields ``error`` events for rejected lines, a ``progress`` event per written chunk and a final ``summary``.
+    Records naming an unknown user are rejected before the chunk is written; a chunk the database still refuses
+    is retried line by line so only the offending lines are reported. A bad line never aborts the upload.
+    """
+    stats = {'lines': 0, 'imported': 0, 'failed': 0}
+    async with Session() as db:
+        questions, options = await load_survey_structure(db, survey_id)
+        batch: list[tuple[int, ResponseImport]] = []
+
+        async def insert(records: list[ResponseImport]) -> str | None:
+            try:
+                stats['imported'] += await response.bulk_insert_responses(db=db, survey_id=survey_id, records=records)
+            except (SQLAlchemyError, asyncpg.PostgresError) as exc:
+                await db.rollback()
+                return f'Rejected by the database: {exc.__class__.__name__}'
+            return None
+
+        async def flush():
+            unknown = await unknown_user_ids(db, [record for _, record in batch])
+            for line_no, record in batch:
+                if record.user_id in unknown:
+                    stats['failed'] += 1
+                    yield {'type': 'error', 'line': line_no, 'detail': f'Unknown user {record.user_id}'}
+            rows = [(line_no, record) for line_no, record in batch if record.user_id not in unknown]
+            if rows and await insert([record for _, record in rows]):
+                for line_no, record in rows:
+                    error = await insert([record])
+                    if error:
+                        stats['failed'] += 1
+                        yield {'type': 'error', 'line': line_no, 'detail': error}
+            batch.clear()
+            yield {'type': 'progress', **stats}
+
+        async for line_no, line in iter_lines(chunks):
+            if line is None:
+                stats['lines'] += 1
+                stats['failed'] += 1
+                detail = f'Line longer than {settings.INGEST_MAX_LINE_BYTES} bytes'
+                yield {'type': 'error', 'line': line_no, 'detail': detail}
+                continue
+            if not line.strip():
+                continue
+            stats['lines'] += 1
+            try:
+                record = ResponseImport.model_validate_json(line)
+            except ValidationError as exc:
+                stats['failed'] += 1
+                detail = [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors()]
+                yield {'type': 'error', 'line': line_no, 'detail': detail}
+                continue
+            error = validate_answers(record.answers, questions, options)
+            if error:
+                stats['failed'] += 1
+                yield {'type': 'error', 'line': line_no, 'detail': error}
+                continue
+            batch.append((line_no, record))
+            if len(batch) >= settings.INGEST_CHUNK_SIZE:
+                async for event in flush():
+                    yield event
+
+        if batch:
+            async for event in flush():
+                yield event
+    yield {'type': 'summary', **stats}
@@ -0,0 +1,45 @@
+from typing import Any, NamedTuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.survey_model import Survey
+from app.models.option_model import Option
+from app.models.question_model import Question
+from app.utils.exceptions import SurveyNotFoundException, QuestionNotFoundException, OptionNotFoundException
+
+
+class OwnedResource(NamedTuple):
+    resource: Any
+    creator_id: int
+
+
+def _owner_query(kind: str, entity_id: int):
+    if kind == 'survey':
+        return select(Survey, Survey.creator_id).where(Survey.id == entity_id)
+    if kind == 'question':
+        return (
+            select(Question, Survey.creator_id)
+            .join(Survey, Survey.id == Question.survey_id)
+            .where(Question.id == entity_id)
+        )
+    return (
+        select(Option, Survey.creator_id)
+        .join(Question, Question.id == Option.question_id)
+        .join(Survey, Survey.id == Question.survey_id)
+        .where(Option.id == entity_id)
+    )
+
+
+NOT_FOUND = {
+    'survey': SurveyNotFoundException,
+    'question': QuestionNotFoundException,
+    'option': OptionNotFoundException,
+}
+
+
+async def resolve_owner(db: AsyncSession, kind: str, entity_id: int) -> OwnedResource:
+    """Load a survey, question or option together with the creator of the survey it belongs to, in one query."""
+    row = (await db.execute(_owner_query(kind, entity_id))).first()
+    if row is None:
+        raise NOT_FOUND[kind]
+    return OwnedResource(*row)
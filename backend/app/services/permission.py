@@ -1,41 +1,86 @@
 from typing import Any
+from sqlalchemy import and_, or_, true, false
+from sqlalchemy.sql import ColumnElement
 
-from app.models.user_model import User
+from app.schemas.principal_schema import Principal, PermissionGrant
 
+CONDITION_FIELDS = {'self': 'target_user_id', 'creator': 'creator_id'}
 
-async def has_permission(user: User, resource: str, action: str, context: dict[str, Any] | None = None) -> bool:
-    context = context or {}
+Predicate = tuple[tuple[str, str], ...]
 
-    def evaluate_conditions(conditions: dict[str, Any] | None = None, context: dict[str, Any] | None = None) -> bool:
-        if not conditions:
-            return True
 
-        for condition_key, condition_value in conditions.items():
-            if condition_key == 'self' and condition_value:
-                if context.get('user_id') != context.get('target_user_id'):
-                    return False
+def compile_conditions(conditions: dict[str, Any] | None) -> Predicate:
+    """Turn ``Permission.conditions`` into (context key, context key) pairs that must be equal."""
+    if not conditions:
+        return ()
+    return tuple(
+        ('user_id', CONDITION_FIELDS[condition_key])
+        for condition_key, condition_value in conditions.items()
+        if condition_value and condition_key in CONDITION_FIELDS
+    )
 
-            if condition_key == 'creator' and condition_value:
-                if context.get('user_id') != context.get('creator_id'):
-                    return False
 
-        return True
+def evaluate_predicate(predicate: Predicate, context: dict[str, Any]) -> bool:
+    return all(context.get(left) == context.get(right) for left, right in predicate)
 
-    for permission in user.direct_permissions:
-        if (
-            permission.resource == resource
-            and permission.action == action
-            and evaluate_conditions(permission.conditions, context)
-        ):
-            return True
 
-    for role in user.roles:
-        for permission in role.permissions:
-            if (
-                (permission.resource == resource or permission.resource == '*')
-                and (permission.action == action or permission.action == '*')
-                and evaluate_conditions(permission.conditions, context)
-            ):
-                return True
+class PermissionIndex:
+    """Permissions of one principal bucketed by (resource, action).
 
-    return False
+    Direct grants only ever match literally; role grants containing '*' land in the wildcard buckets.
+    """
+
+    def __init__(self, grants: list[PermissionGrant]):
+        self.exact: dict[tuple[str, str], list[Predicate]] = {}
+        self.wildcard: dict[tuple[str, str], list[Predicate]] = {}
+        for grant in grants:
+            is_wildcard = not grant.direct and (grant.resource == '*' or grant.action == '*')
+            buckets = self.wildcard if is_wildcard else self.exact
+            buckets.setdefault((grant.resource, grant.action), []).append(compile_conditions(grant.conditions))
+        for buckets in (self.exact, self.wildcard):
+            for key, predicates in buckets.items():
+                # an unconditional grant makes the rest of the bucket irrelevant
+                buckets[key] = [()] if () in predicates else predicates
+
+    def predicates(self, resource: str, action: str) -> list[Predicate]:
+        return [
+            predicate
+            for buckets, key in (
+                (self.exact, (resource, action)),
+                (self.wildcard, (resource, '*')),
+                (self.wildcard, ('*', action)),
+                (self.wildcard, ('*', '*')),
+            )
+            for predicate in buckets.get(key, ())
+        ]
+
+    def check(self, resource: str, action: str, context: dict[str, Any]) -> bool:
+        return any(evaluate_predicate(predicate, context) for predicate in self.predicates(resource, action))
+
+
+def get_permission_index(user: Principal) -> PermissionIndex:
+    if user._permission_index is None:
+        user._permission_index = PermissionIndex(user.permissions)
+    return user._permission_index
+
+
+async def has_permission(
+    user: Principal, resource: str, action: str, context: dict[str, Any] | None = None
+) -> bool:
+    return get_permission_index(user).check(resource, action, context or {})
+
+
+def authorized_filter(user: Principal, resource: str, action: str, columns: dict[str, ColumnElement]) -> ColumnElement:
+    """WHERE clause matching exactly the rows for which ``has_permission`` would pass.
+
+    ``columns`` maps context keys (e.g. ``'creator_id'``) to the columns holding them on each row; a condition on a
+    key the rows don't carry can never hold.
+    """
+    clauses = []
+    for predicate in get_permission_index(user).predicates(resource, action):
+        if not predicate:
+            return true()
+        # compile_conditions always compares the caller's user_id with a field of the target
+        if all(left == 'user_id' and right in columns for left, right in predicate):
+            clauses.append(and_(*(columns[right] == user.id for _, right in predicate)))
+    return or_(false(), *clauses)
@@ -0,0 +1,160 @@
+import json
+import asyncio
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError, TimeoutError
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_redis_db
+from app.models.user_model import User
+from app.models.role_model import Role
+from app.core.config import settings
+from app.schemas.principal_schema import Principal, PermissionGrant
+from app.utils.cache import LRUCache
+
+PRINCIPAL_VERSION_KEY = 'principal:version'
+INVALIDATION_CHANNEL = 'principal:invalidations'
+
+# a snapshot is only written while both versions it was loaded under are still current, so a load racing an
+# invalidation can't put the stale principal back
+SET_IF_CURRENT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] or (redis.call('GET', KEYS[3]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[4])
+return 1
+"""
+
+_local_principals = LRUCache(
+    maxsize=settings.PRINCIPAL_LOCAL_CACHE_SIZE, ttl=settings.PRINCIPAL_LOCAL_CACHE_TTL_SECONDS
+)
+# bumped on every invalidation this worker sees, a lookup that overlapped one doesn't fill the local cache
+_invalidations = {'seen': 0}
+
+
+def principal_key(user_id: int) -> str:
+    return f'principal:{user_id}'
+
+
+def user_version_key(user_id: int) -> str:
+    return f'principal:{user_id}:version'
+
+
+def build_principal(user_obj: User) -> Principal:
+    grants = [
+        PermissionGrant(resource=p.resource, action=p.action, conditions=p.conditions, direct=True)
+        for p in user_obj.direct_permissions
+    ]
+    for role_obj in user_obj.roles:
+        grants.extend(
+            PermissionGrant(resource=p.resource, action=p.action, conditions=p.conditions)
+            for p in role_obj.permissions
+        )
+    return Principal(id=user_obj.id, is_active=user_obj.is_active, permissions=grants)
+
+
+async def load_principal(db: AsyncSession, user_id: int) -> Principal | None:
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.direct_permissions), selectinload(User.roles).selectinload(Role.permissions))
+        .where(User.id == user_id)
+    )
+    user_in_db = result.scalar_one_or_none()
+    if not user_in_db:
+        return None
+    return build_principal(user_in_db)
+
+
+async def get_principal(redis_client: Redis, db: AsyncSession, user_id: int) -> Principal | None:
+    """Resolve a principal from the local LRU, then Redis, falling back to Postgres on a miss or stale version.
+
+    Snapshots carry the global and the user's version; a stale one is reloaded and only written back if neither
+    version moved meanwhile."""
+    principal = _local_principals.get(user_id)
+    if principal is not None:
+        return principal
+
+    seen = _invalidations['seen']
+    cached, version, user_version = await redis_client.mget(
+        principal_key(user_id), PRINCIPAL_VERSION_KEY, user_version_key(user_id)
+    )
+    version, user_version = version or '0', user_version or '0'
+    if cached:
+        data = json.loads(cached)
+        if data['version'] == version and data.get('user_version') == user_version:
+            principal = Principal.model_validate(data['principal'])
+            if _invalidations['seen'] == seen:
+                _local_principals.set(user_id, principal)
+            return principal
+
+    principal = await load_principal(db, user_id)
+    if principal is None:
+        return None
+    stored = await redis_client.eval(
+        SET_IF_CURRENT,
+        3,
+        principal_key(user_id),
+        PRINCIPAL_VERSION_KEY,
+        user_version_key(user_id),
+        version,
+        user_version,
+        json.dumps({'version': version, 'user_version': user_version, 'principal': principal.model_dump()}),
+        settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    )
+    if stored and _invalidations['seen'] == seen:
+        _local_principals.set(user_id, principal)
+    return principal
+
+
+def forget_principals(user_ids: list[int] | None):
+    """Drop the given users from the local cache, everyone when ``user_ids`` is None."""
+    _invalidations['seen'] += 1
+    if user_ids is None:
+        _local_principals.clear()
+        return
+    for user_id in user_ids:
+        _local_principals.pop(user_id)
+
+
+async def broadcast_invalidation(redis_client: Redis, user_ids: list[int] | None):
+    """Tell every worker to drop the given users (or everyone) from its local cache."""
+    forget_principals(user_ids)
+    await redis_client.publish(INVALIDATION_CHANNEL, json.dumps({'user_ids': user_ids}))
+
+
+async def invalidate_principal(user_id: int):
+    """Drop a single user's snapshot, e.g. after their roles or status changed."""
+    redis_client = await get_redis_db()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.incr(user_version_key(user_id))
+        pipe.delete(principal_key(user_id))
+        await pipe.execute()
+    await broadcast_invalidation(redis_client, [user_id])
+
+
+async def bump_principal_version():
+    """Invalidate every snapshot at once, e.g. after a role's or permission's definition changed."""
+    redis_client = await get_redis_db()
+    await redis_client.incr(PRINCIPAL_VERSION_KEY)
+    await broadcast_invalidation(redis_client, None)
+
+
+async def listen_for_invalidations():
+    """Long-running task evicting principals invalidated by any worker."""
+    while True:
+        redis_client = await get_redis_db()
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # anything invalidated while we were not subscribed is unknown, so start from scratch
+            forget_principals(None)
+            while True:
+                message = await pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    forget_principals(json.loads(message['data'])['user_ids'])
+        except (ConnectionError, TimeoutError):
+            forget_principals(None)
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.reset()
@@ -0,0 +1,203 @@
+import math
+import uuid
+import asyncio
+import hashlib
+from collections.abc import Iterable
+from redis.asyncio import Redis
+from sqlalchemy import select, func, cast, distinct, exists, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import Session, get_redis_db
+from app.models.response_model import Response
+from app.core.config import settings
+
+# Redis HyperLogLogs use 16384 registers, a fixed standard error of 1.04 / sqrt(16384)
+HLL_STANDARD_ERROR = 0.0081
+
+# the state key doubles as "structures exist": updates before a build starts are dropped, the build covers them
+RECORD_IF_INDEXED = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local members = tonumber(ARGV[1])
+for i = 2, members + 1 do
+    redis.call('PFADD', KEYS[2], ARGV[i])
+end
+for i = members + 2, #ARGV do
+    redis.call('SETBIT', KEYS[3], ARGV[i], 1)
+end
+return 1
+"""
+
+
+def respondents_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:respondents'
+
+
+def fingerprints_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:fingerprints'
+
+
+def state_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:respondents:state'
+
+
+def build_lock_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:respondents:build-lock'
+
+
+def bloom_parameters() -> tuple[int, int]:
+    """Bits and hash functions for a filter holding ``RESPONDENT_BLOOM_CAPACITY`` fingerprints at the configured
+    false positive rate."""
+    capacity, error_rate = settings.RESPONDENT_BLOOM_CAPACITY, settings.RESPONDENT_BLOOM_ERROR_RATE
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    return bits, max(1, round(bits / capacity * math.log(2)))
+
+
+def ready_state() -> str:
+    # a filter built for other parameters is rebuilt rather than probed at the wrong positions
+    return 'ready:{}:{}'.format(*bloom_parameters())
+
+
+def hash_fingerprint(fingerprint: str) -> str:
+    """Keyed hash of a client supplied fingerprint, the only form in which it is stored."""
+    return hashlib.blake2b(fingerprint.encode(), digest_size=16, key=settings.SECRET_KEY.encode()[:64]).hexdigest()
+
+
+def bloom_positions(fingerprint: str, bits: int, hashes: int) -> list[int]:
+    """Positions of a hashed fingerprint, by double hashing its two halves."""
+    digest = bytes.fromhex(fingerprint)
+    first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+    return [(first + i * second) % bits for i in range(hashes)]
+
+
+def respondent_member(user_id: int | None, fingerprint: str | None, response_id: int) -> str:
+    """What identifies a respondent: the user, else the device, else the response is its own respondent."""
+    if user_id is not None:
+        return f'u:{user_id}'
+    if fingerprint is not None:
+        return f'f:{fingerprint}'
+    return f'r:{response_id}'
+
+
+def _build_filter(fingerprints: list[str], bits: int, hashes: int) -> bytes:
+    bloom = bytearray((bits + 7) // 8)
+    for fingerprint in fingerprints:
+        for position in bloom_positions(fingerprint, bits, hashes):
+            # Redis numbers bits from the most significant bit of the first byte
+            bloom[position >> 3] |= 0x80 >> (position & 7)
+    return bytes(bloom)
+
+
+async def build_respondents(redis_client: Redis, survey_id: int):
+    """(Re)build the survey's respondent HyperLogLog and fingerprint Bloom filter from the responses.
+
+    Works like the option bitmaps: the state key is set first so concurrent submissions record themselves, and
+    the built structures are merged into whatever is there (PFMERGE and BITOP OR are both unions).
+    """
+    state = await redis_client.get(state_key(survey_id))
+    if state not in (None, 'building'):
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(fingerprints_key(survey_id))
+            pipe.set(state_key(survey_id), 'building')
+            await pipe.execute()
+    await redis_client.set(state_key(survey_id), 'building', nx=True)
+    member = func.coalesce(
+        'u:' + cast(Response.user_id, String), 'f:' + Response.fingerprint, 'r:' + cast(Response.id, String)
+    )
+    async with Session() as db:
+        members, fingerprints = (
+            await db.execute(
+                select(
+                    func.array_agg(distinct(member)),
+                    func.array_agg(distinct(Response.fingerprint)).filter(Response.fingerprint.is_not(None)),
+                ).where(Response.survey_id == survey_id)
+            )
+        ).one()
+    bits, hashes = bloom_parameters()
+    bloom = await asyncio.to_thread(_build_filter, fingerprints or [], bits, hashes)
+    merge_key = f'{state_key(survey_id)}:merge:{uuid.uuid4().hex}'
+    members = members or []
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.pfadd(f'{merge_key}:hll')
+        for start in range(0, len(members), 10000):
+            pipe.pfadd(f'{merge_key}:hll', *members[start:start + 10000])
+        pipe.pfmerge(respondents_key(survey_id), respondents_key(survey_id), f'{merge_key}:hll')
+        pipe.set(f'{merge_key}:bloom', bloom)
+        pipe.bitop('OR', fingerprints_key(survey_id), fingerprints_key(survey_id), f'{merge_key}:bloom')
+        pipe.delete(f'{merge_key}:hll', f'{merge_key}:bloom')
+        pipe.set(state_key(survey_id), ready_state())
+        await pipe.execute()
+
+
+async def is_ready(redis_client: Redis, survey_id: int) -> bool:
+    return await redis_client.get(state_key(survey_id)) == ready_state()
+
+
+async def ensure_respondents(redis_client: Redis, survey_id: int) -> bool:
+    """Build the survey's structures unless they're ready or another worker holds the build lock; returns whether
+    they're ready now."""
+    if await is_ready(redis_client, survey_id):
+        return True
+    if not await redis_client.set(build_lock_key(survey_id), 1, nx=True, ex=settings.RESPONDENT_BUILD_LOCK_SECONDS):
+        return False
+    try:
+        await build_respondents(redis_client, survey_id)
+    finally:
+        await redis_client.delete(build_lock_key(survey_id))
+    return True
+
+
+async def count_respondents(redis_client: Redis, db: AsyncSession, survey_id: int) -> int:
+    """Estimated unique respondents, within about ``HLL_STANDARD_ERROR``; counted exactly in the database while
+    another worker is still building the estimate."""
+    if await ensure_respondents(redis_client, survey_id):
+        return await redis_client.pfcount(respondents_key(survey_id))
+    member = func.coalesce(
+        'u:' + cast(Response.user_id, String), 'f:' + Response.fingerprint, 'r:' + cast(Response.id, String)
+    )
+    return await db.scalar(select(func.count(distinct(member))).where(Response.survey_id == survey_id))
+
+
+async def seen_fingerprint(db: AsyncSession, survey_id: int, fingerprint: str) -> bool:
+    """Whether a hashed fingerprint probably answered the survey already.
+
+    Never wrong when it says no; says yes for a new fingerprint at about ``RESPONDENT_BLOOM_ERROR_RATE`` while
+    the survey stays under ``RESPONDENT_BLOOM_CAPACITY`` fingerprints. This runs on the submit path, so it never
+    builds the filter: until it's ready the fingerprint is looked up exactly, through its index.
+    """
+    redis_client = await get_redis_db()
+    if not await is_ready(redis_client, survey_id):
+        return await db.scalar(
+            select(exists().where(Response.survey_id == survey_id, Response.fingerprint == fingerprint))
+        )
+    probe = redis_client.bitfield(fingerprints_key(survey_id))
+    for position in bloom_positions(fingerprint, *bloom_parameters()):
+        probe.get('u1', position)
+    return all(await probe.execute())
+
+
+async def record_respondents(survey_id: int, responses: Iterable[tuple[int, int | None, str | None]]):
+    """Add freshly committed responses, each given as ``(response_id, user_id, hashed fingerprint)``."""
+    members, positions = [], []
+    bits, hashes = bloom_parameters()
+    for response_id, user_id, fingerprint in responses:
+        members.append(respondent_member(user_id, fingerprint, response_id))
+        if fingerprint is not None:
+            positions += bloom_positions(fingerprint, bits, hashes)
+    redis_client = await get_redis_db()
+    await redis_client.eval(
+        RECORD_IF_INDEXED,
+        3,
+        state_key(survey_id),
+        respondents_key(survey_id),
+        fingerprints_key(survey_id),
+        len(members),
+        *members,
+        *positions,
+    )
+
+
+async def drop_respondents(survey_id: int):
+    redis_client = await get_redis_db()
+    await redis_client.delete(state_key(survey_id), respondents_key(survey_id), fingerprints_key(survey_id))
@@ -0,0 +1,69 @@
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.option_model import Option
+from app.models.question_model import Question
+from app.crud.survey_crud import survey
+from app.services.counters import get_counts
+from app.core.config import settings
+from app.schemas.survey_schema import SurveyResults, QuestionResult, OptionResult
+
+
+def results_key(survey_id: int) -> str:
+    return f'survey:{survey_id}:results'
+
+
+async def load_structure(db: AsyncSession, survey_id: int) -> list[dict]:
+    result = await db.execute(
+        select(Question.id, Question.text, Question.type, Question.order, Option.id, Option.text)
+        .outerjoin(Option, Option.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+        .order_by(Question.order, Question.id, Option.id)
+    )
+    questions: dict[int, dict] = {}
+    for question_id, question_text, question_type, order, option_id, option_text in result:
+        question = questions.setdefault(
+            question_id,
+            {'question_id': question_id, 'text': question_text, 'type': question_type, 'order': order, 'options': []},
+        )
+        if option_id is not None:
+            question['options'].append({'option_id': option_id, 'text': option_text})
+    return list(questions.values())
+
+
+def assemble_results(
+    survey_id: int,
+    structure: list[dict],
+    total_responses: int,
+    question_stats: dict[int, tuple[int, int]],
+    option_counts: dict[int, int],
+) -> SurveyResults:
+    questions = []
+    for question in structure:
+        answered, text_answers = question_stats.get(question['question_id'], (0, 0))
+        options = []
+        for option in question['options']:
+            count = option_counts.get(option['option_id'], 0)
+            percentage = round(count / answered * 100, 2) if answered else 0.0
+            options.append(OptionResult(**option, count=count, percentage=percentage))
+        questions.append(
+            QuestionResult(**{**question, 'options': options}, answered=answered, text_answers=text_answers)
+        )
+    return SurveyResults(survey_id=survey_id, total_responses=total_responses, questions=questions)
+
+
+async def get_survey_results(redis_client: Redis, db: AsyncSession, survey_id: int) -> SurveyResults:
+    """Per-question option counts and percentages, sized by the number of questions and options only."""
+    ttl = settings.SURVEY_RESULTS_CACHE_TTL_SECONDS
+    if ttl:
+        cached = await redis_client.get(results_key(survey_id))
+        if cached:
+            return SurveyResults.model_validate_json(cached)
+
+    await survey.get_survey(db=db, survey_id=survey_id)
+    structure = await load_structure(db, survey_id)
+    results = assemble_results(survey_id, structure, *await get_counts(redis_client, survey_id))
+    if ttl:
+        await redis_client.set(results_key(survey_id), results.model_dump_json(), ex=ttl)
+    return results
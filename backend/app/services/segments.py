@@ -0,0 +1,178 @@
+import re
+import uuid
+import numpy as np
+from redis.asyncio import Redis
+from redis.client import NEVER_DECODE
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.survey_crud import survey
+from app.services.bitmaps import (
+    ALL_RESPONSES,
+    bitmap_key,
+    answered_name,
+    text_name,
+    keys_key,
+    offset_key,
+    ensure_bitmaps,
+    unpack_bits,
+)
+from app.services.results import load_structure, assemble_results
+from app.schemas.survey_schema import SurveyResults
+from app.utils.exceptions import InvalidSegmentException
+
+TOKEN = re.compile(r'\s*(?:(\d+)|(\()|(\))|(and|or|not)\b)', re.IGNORECASE)
+# bounds on what a client may send, so parsing and compiling a segment can't recurse without limit
+MAX_SEGMENT_LENGTH = 1000
+MAX_SEGMENT_DEPTH = 32
+
+# AND the segment with every other bitmap in KEYS and count the bits, KEYS[#KEYS] is scratch space
+COUNT_IN_SEGMENT = """
+local counts = {}
+for i = 2, #KEYS - 1 do
+    redis.call('BITOP', 'AND', KEYS[#KEYS], KEYS[1], KEYS[i])
+    counts[#counts + 1] = redis.call('BITCOUNT', KEYS[#KEYS])
+end
+redis.call('DEL', KEYS[#KEYS])
+return counts
+"""
+
+
+def parse_segment(expression: str):
+    """Parse e.g. ``12 and (13 or not 14)``, where numbers are option ids, into nested tuples.
+
+    ``not`` binds tighter than ``and``, which binds tighter than ``or``. Expressions longer than
+    ``MAX_SEGMENT_LENGTH`` or nesting parentheses and ``not`` deeper than ``MAX_SEGMENT_DEPTH`` are refused.
+    """
+    tokens, position = [], 0
+    expression = expression.strip()
+    if len(expression) > MAX_SEGMENT_LENGTH:
+        raise InvalidSegmentException
+    while position < len(expression):
+        match = TOKEN.match(expression, position)
+        if not match:
+            raise InvalidSegmentException
+        number, opening, closing, word = match.groups()
+        tokens.append(int(number) if number else (opening or closing or word.lower()))
+        position = match.end()
+    tokens.append(None)
+
+    def parse(index: int, level: int, depth: int):
+        if level == 2:
+            token = tokens[index]
+            if token in ('not', '(') and depth == MAX_SEGMENT_DEPTH:
+                raise InvalidSegmentException
+            if token == 'not':
+                operand, index = parse(index + 1, 2, depth + 1)
+                return ('not', operand), index
+            if token == '(':
+                node, index = parse(index + 1, 0, depth + 1)
+                if tokens[index] != ')':
+                    raise InvalidSegmentException
+                return node, index + 1
+            if isinstance(token, int):
+                return token, index + 1
+            raise InvalidSegmentException
+        operator = 'or' if level == 0 else 'and'
+        node, index = parse(index, level + 1, depth)
+        while tokens[index] == operator:
+            operand, index = parse(index + 1, level + 1, depth)
+            node = (operator, node, operand)
+        return node, index
+
+    node, index = parse(0, 0, 0)
+    if tokens[index] is not None:
+        raise InvalidSegmentException
+    return node
+
+
+def _compile(pipe, survey_id: int, node, scratch: list[str]) -> str:
+    """Queue the BITOPs computing ``node`` and return the key holding it; intermediate keys go to ``scratch``."""
+    if isinstance(node, int):
+        return bitmap_key(survey_id, node)
+    operands = [_compile(pipe, survey_id, operand, scratch) for operand in node[1:]]
+    key = f'{scratch[0]}:{len(scratch)}'
+    scratch.append(key)
+    if node[0] == 'not':
+        # all AND NOT x, spelled so that bits past the end of a shorter bitmap still count as unset
+        universe = bitmap_key(survey_id, ALL_RESPONSES)
+        pipe.bitop('AND', key, universe, operands[0])
+        pipe.bitop('XOR', key, universe, key)
+    else:
+        pipe.bitop(node[0].upper(), key, *operands)
+    pipe.expire(key, 60)
+    return key
+
+
+def _scratch(survey_id: int) -> list[str]:
+    # the first entry is only the prefix of the keys that follow
+    return [f'{keys_key(survey_id)}:segment:{uuid.uuid4().hex}']
+
+
+async def evaluate_segment(redis_client: Redis, survey_id: int, expression: str) -> tuple[np.ndarray, int]:
+    """Boolean array of the survey's responses matching the segment and the response id of its first entry."""
+    node = parse_segment(expression)
+    await ensure_bitmaps(redis_client, survey_id)
+    scratch = _scratch(survey_id)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        key = _compile(pipe, survey_id, node, scratch)
+        position = len(pipe)
+        # the shared pool decodes replies, bitmaps have to be read raw
+        pipe.execute_command('GET', key, **{NEVER_DECODE: True})
+        pipe.get(offset_key(survey_id))
+        pipe.delete(*scratch)
+        results = await pipe.execute()
+    bitmap, offset = results[position:position + 2]
+    return unpack_bits(bitmap), int(offset)
+
+
+def in_segment(segment: np.ndarray, offset: int, response_ids: np.ndarray) -> np.ndarray:
+    positions = response_ids - offset
+    inside = (positions >= 0) & (positions < len(segment))
+    selected = np.zeros(len(response_ids), dtype=bool)
+    selected[inside] = segment[positions[inside]]
+    return selected
+
+
+async def count_in_segment(redis_client: Redis, survey_id: int, expression: str, names: list) -> dict:
+    """``{name: responses in the segment whose bit is set in bitmap name}``, computed inside Redis."""
+    node = parse_segment(expression)
+    await ensure_bitmaps(redis_client, survey_id)
+    scratch = _scratch(survey_id)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        key = _compile(pipe, survey_id, node, scratch)
+        pipe.eval(
+            COUNT_IN_SEGMENT,
+            len(names) + 2,
+            key,
+            *(bitmap_key(survey_id, name) for name in names),
+            f'{scratch[0]}:count',
+        )
+        pipe.delete(*scratch)
+        counts = (await pipe.execute())[-2]
+    return dict(zip(names, counts))
+
+
+async def get_segment_results(redis_client: Redis, db: AsyncSession, survey_id: int, expression: str) -> SurveyResults:
+    """Same shape as the survey results, restricted to the responses in the segment.
+
+    Every count is a BITCOUNT of the segment AND-ed with a response, question or option bitmap, so no answers are
+    read from the database.
+    """
+    await survey.get_survey(db=db, survey_id=survey_id)
+    structure = await load_structure(db, survey_id)
+    names = [ALL_RESPONSES]
+    for question in structure:
+        names += [answered_name(question['question_id']), text_name(question['question_id'])]
+        names += [option['option_id'] for option in question['options']]
+    counts = await count_in_segment(redis_client, survey_id, expression, names)
+    question_stats = {
+        question['question_id']: (
+            counts[answered_name(question['question_id'])],
+            counts[text_name(question['question_id'])],
+        )
+        for question in structure
+    }
+    option_counts = {
+        option['option_id']: counts[option['option_id']] for question in structure for option in question['options']
+    }
+    return assemble_results(survey_id, structure, counts[ALL_RESPONSES], question_stats, option_counts)
@@ -0,0 +1,182 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+from collections.abc import Iterable
+from redis.asyncio import Redis
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import Session, get_redis_db
+from app.models.response_model import Response
+from app.models.survey_model import Survey
+from app.core.config import settings
+from app.schemas.survey_schema import SurveyTimeline, TimelinePoint
+from app.utils.exceptions import SurveyNotFoundException, InvalidTimelineRangeException
+
+BUCKET_SECONDS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+DEFAULT_RANGES = {'minute': timedelta(hours=1), 'hour': timedelta(days=2), 'day': timedelta(days=30)}
+
+# KEYS holds (rollup, building marker, pending increments) per bucket width and ARGV (width index, bucket start,
+# count) triplets. Increments land on rollups that exist, and on the pending hash while a rollup is rebuilt so they
+# survive it; a missing rollup is rebuilt from the responses on the next read.
+INCREMENT_EXISTING_BUCKETS = """
+for i = 1, #ARGV, 3 do
+    local base = (tonumber(ARGV[i]) - 1) * 3
+    if redis.call('EXISTS', KEYS[base + 1]) == 1 then
+        redis.call('HINCRBY', KEYS[base + 1], ARGV[i + 1], ARGV[i + 2])
+    end
+    local building = redis.call('PTTL', KEYS[base + 2])
+    if building > 0 then
+        redis.call('HINCRBY', KEYS[base + 3], ARGV[i + 1], ARGV[i + 2])
+        redis.call('PEXPIRE', KEYS[base + 3], building)
+    end
+end
+return 1
+"""
+
+# replaces the rollup with the rebuilt counts plus whatever arrived meanwhile, unless a newer rebuild took over;
+# the marker field keeps an empty rollup from being rebuilt on every read
+FINISH_REBUILD = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'built', 1)
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+local pending = redis.call('HGETALL', KEYS[3])
+for i = 1, #pending, 2 do
+    redis.call('HINCRBY', KEYS[1], pending[i], pending[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('DEL', KEYS[2], KEYS[3])
+return 1
+"""
+
+REBUILD_TIMEOUT_SECONDS = 300
+
+
+def timeline_key(survey_id: int, bucket: str) -> str:
+    return f'survey:{survey_id}:timeline:{bucket}'
+
+
+def building_key(survey_id: int, bucket: str) -> str:
+    return f'survey:{survey_id}:timeline:{bucket}:building'
+
+
+def pending_key(survey_id: int, bucket: str) -> str:
+    return f'survey:{survey_id}:timeline:{bucket}:pending'
+
+
+def _bucket_keys(survey_id: int) -> list[str]:
+    return [
+        key
+        for bucket in BUCKET_SECONDS
+        for key in (timeline_key(survey_id, bucket), building_key(survey_id, bucket), pending_key(survey_id, bucket))
+    ]
+
+
+def bucket_start(moment: datetime, bucket: str) -> int:
+    width = BUCKET_SECONDS[bucket]
+    return int(moment.timestamp()) // width * width
+
+
+def _as_utc(moment: datetime) -> datetime:
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
+async def rebuild_timeline(redis_client: Redis, survey_id: int, bucket: str) -> dict[int, int]:
+    """Roll responses up into ``{bucket start (epoch seconds): count}``. Minute rollups only cover the retention.
+
+    Reads the primary, the rollup is cached for a day and must not start out behind. Uses the same building marker
+    and pending hash handshake as the result counters, with the same caveat.
+    """
+    token = uuid.uuid4().hex
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(building_key(survey_id, bucket), token, ex=REBUILD_TIMEOUT_SECONDS)
+        pipe.delete(pending_key(survey_id, bucket))
+        await pipe.execute()
+    width = BUCKET_SECONDS[bucket]
+    start = func.floor(func.extract('epoch', Response.submitted_at) / width) * width
+    stmt = select(start, func.count()).where(Response.survey_id == survey_id).group_by(start)
+    if bucket == 'minute':
+        retention = timedelta(hours=settings.TIMELINE_MINUTE_RETENTION_HOURS)
+        stmt = stmt.where(Response.submitted_at >= datetime.now(timezone.utc) - retention)
+    async with Session() as db:
+        counts = {int(bucket_start_): count for bucket_start_, count in await db.execute(stmt)}
+    # rollups expire so they are rebuilt periodically, which also repairs any drift
+    finished = await redis_client.eval(
+        FINISH_REBUILD,
+        3,
+        timeline_key(survey_id, bucket),
+        building_key(survey_id, bucket),
+        pending_key(survey_id, bucket),
+        token,
+        settings.TIMELINE_ROLLUP_TTL_SECONDS,
+        *(item for bucket_count in counts.items() for item in bucket_count),
+    )
+    if finished:
+        fields = await redis_client.hgetall(timeline_key(survey_id, bucket))
+        return {int(field): int(value) for field, value in fields.items() if field != 'built'}
+    return counts
+
+
+async def record_timeline(survey_id: int, submitted_at: Iterable[datetime]):
+    """Count freshly committed responses into every rollup of their survey."""
+    increments = Counter(
+        (index, bucket_start(moment, bucket))
+        for moment in submitted_at
+        for index, bucket in enumerate(BUCKET_SECONDS, start=1)
+    )
+    args = [item for (index, start), count in increments.items() for item in (index, start, count)]
+    redis_client = await get_redis_db()
+    await redis_client.eval(
+        INCREMENT_EXISTING_BUCKETS,
+        len(BUCKET_SECONDS) * 3,
+        *_bucket_keys(survey_id),
+        *args,
+    )
+
+
+async def drop_timeline(survey_id: int):
+    redis_client = await get_redis_db()
+    await redis_client.delete(*_bucket_keys(survey_id))
+
+
+async def get_timeline(
+    redis_client: Redis,
+    db: AsyncSession,
+    survey_id: int,
+    bucket: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> SurveyTimeline:
+    """Responses per bucket over ``[start, end)``, zero-filled. Reads one rollup hash however many responses exist;
+    the current bucket is live because submissions increment it directly."""
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - DEFAULT_RANGES[bucket]
+    width = BUCKET_SECONDS[bucket]
+    first, last = bucket_start(start, bucket), bucket_start(end - timedelta(microseconds=1), bucket)
+    if last < first:
+        raise InvalidTimelineRangeException('end must be after start')
+    if (last - first) // width + 1 > settings.TIMELINE_MAX_POINTS:
+        raise InvalidTimelineRangeException('Too many buckets, use a coarser bucket or a shorter range')
+    retention = settings.TIMELINE_MINUTE_RETENTION_HOURS
+    if bucket == 'minute' and start < datetime.now(timezone.utc) - timedelta(hours=retention):
+        raise InvalidTimelineRangeException(f'Minute buckets only cover the last {retention} hours')
+
+    # survey_crud drops the rollups on delete, so the survey is looked up directly
+    if await db.get(Survey, survey_id) is None:
+        raise SurveyNotFoundException
+    fields = await redis_client.hgetall(timeline_key(survey_id, bucket))
+    if fields:
+        counts = {int(field): int(value) for field, value in fields.items() if field != 'built'}
+    else:
+        counts = await rebuild_timeline(redis_client, survey_id, bucket)
+    points = [
+        TimelinePoint(start=datetime.fromtimestamp(moment, timezone.utc), count=counts.get(moment, 0))
+        for moment in range(first, last + 1, width)
+    ]
+    return SurveyTimeline(survey_id=survey_id, bucket=bucket, points=points)
@@ -1,35 +1,107 @@
+from uuid import uuid4
 from redis.asyncio import Redis
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+from jose import jwt
 
-from app.models.user_model import User
-from app.core.config import TokenType
+from app.core.config import settings, TokenType
+from app.services.token_cache import broadcast_revocation
 
 
-async def add_token_to_redis(
-    redis_client: Redis, user: User, token: str, token_type: TokenType, expires_delta: int | None = None
-):
-    token_key = f'user:{user.id}:{token_type}'
+def session_key(jti: str) -> str:
+    return f'session:{jti}'
 
-    await redis_client.sadd(token_key, token)
-    if expires_delta:
-        await redis_client.expire(token_key, timedelta(minutes=expires_delta))
 
+def user_sessions_key(user_id: int) -> str:
+    return f'user:{user_id}:session-index'
 
-async def get_valid_tokens(redis_client: Redis, user_id: int, token_type: TokenType):
-    token_key = f'user:{user_id}:{token_type}'
-    valid_token = await redis_client.smembers(token_key)
-    return valid_token
 
+def legacy_user_sessions_key(user_id: int) -> str:
+    # the former unpruned set of jtis, gone once the last refresh token issued before the index existed expires
+    return f'user:{user_id}:sessions'
 
-async def delete_token(redis_client: Redis, user_id: int, token_type: TokenType):
-    token_key = f'user:{user_id}:{token_type}'
-    valid_token = await get_valid_tokens(redis_client, user_id, token_type)
-    if valid_token is not None:
-        await redis_client.delete(token_key)
 
+def session_group_key(sid: str) -> str:
+    return f'session-group:{sid}'
 
-async def update_token_in_redis(
-    redis_client: Redis, user: User, token: str, token_type: TokenType, expires_delta: int | None = None
-):
-    await delete_token(redis_client, user.id, token_type)
-    await add_token_to_redis(redis_client, user, token, token_type, expires_delta)
+
+def session_value(user_id: int, token_type: TokenType, sid: str) -> str:
+    return f'{user_id}:{token_type.value}:{sid}'
+
+
+def parse_session_value(value: str) -> tuple[str, str, str | None]:
+    # sessions stored before session groups existed are just '{user_id}:{type}'
+    user_id, token_type, *sid = value.split(':', 2)
+    return user_id, token_type, sid[0] if sid else None
+
+
+async def create_sessions(
+    redis_client: Redis, user_id: int, tokens: dict[TokenType, str], sid: str | None = None
+) -> str:
+    """Register one session per token, keyed by its ``jti`` and living exactly as long as the token.
+
+    Tokens issued together, and access tokens later minted from their refresh token (pass its ``sid``), form one
+    session group that is logged out as a whole. Existing sessions of the user are left alone, so every device
+    keeps its own tokens. Returns the group's sid.
+    """
+    sid = sid or uuid4().hex
+    now = datetime.now(timezone.utc).timestamp()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        # the indexes are scored by expiry, drop what has expired so they don't grow with every login and refresh
+        pipe.zremrangebyscore(user_sessions_key(user_id), '-inf', now)
+        pipe.zremrangebyscore(session_group_key(sid), '-inf', now)
+        for token_type, token in tokens.items():
+            claims = jwt.get_unverified_claims(token)
+            ttl = max(int(claims['exp'] - now), 1)
+            pipe.set(session_key(claims['jti']), session_value(user_id, token_type, sid), ex=ttl)
+            pipe.zadd(user_sessions_key(user_id), {claims['jti']: claims['exp']})
+            pipe.zadd(session_group_key(sid), {claims['jti']: claims['exp']})
+        # no session outlives a refresh token, so neither do the indexes
+        pipe.expire(user_sessions_key(user_id), timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES))
+        pipe.expire(session_group_key(sid), timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES))
+        await pipe.execute()
+    return sid
+
+
+async def is_session_active(redis_client: Redis, jti: str, user_id: int, token_type: TokenType) -> bool:
+    value = await redis_client.get(session_key(jti))
+    return value is not None and parse_session_value(value)[:2] == (str(user_id), token_type.value)
+
+
+async def get_session_id(redis_client: Redis, jti: str) -> str | None:
+    value = await redis_client.get(session_key(jti))
+    return parse_session_value(value)[2] if value else None
+
+
+async def revoke_session(redis_client: Redis, user_id: int, jti: str) -> list[str]:
+    """Log one device out: the token's whole session group, so its refresh token can't mint new access tokens.
+    Returns the revoked jtis."""
+    sid = await get_session_id(redis_client, jti)
+    jtis = {jti}
+    if sid:
+        jtis.update(await redis_client.zrange(session_group_key(sid), 0, -1))
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(*(session_key(jti) for jti in jtis))
+        pipe.zrem(user_sessions_key(user_id), *jtis)
+        if sid:
+            pipe.delete(session_group_key(sid))
+        await pipe.execute()
+    await broadcast_revocation(redis_client, list(jtis))
+    return list(jtis)
+
+
+async def revoke_user_sessions(redis_client: Redis, user_id: int) -> list[str]:
+    """Log the user out everywhere. Returns the revoked jtis."""
+    now = datetime.now(timezone.utc).timestamp()
+    jtis = list(await redis_client.zrangebyscore(user_sessions_key(user_id), now, '+inf'))
+    jtis += await redis_client.smembers(legacy_user_sessions_key(user_id))
+    values = await redis_client.mget(*(session_key(jti) for jti in jtis)) if jtis else []
+    sids = {parse_session_value(value)[2] for value in values if value} - {None}
+    async with redis_client.pipeline(transaction=True) as pipe:
+        if jtis:
+            pipe.delete(*(session_key(jti) for jti in jtis))
+        if sids:
+            pipe.delete(*(session_group_key(sid) for sid in sids))
+        pipe.delete(user_sessions_key(user_id), legacy_user_sessions_key(user_id))
+        await pipe.execute()
+    await broadcast_revocation(redis_client, jtis)
+    return jtis
@@ -0,0 +1,81 @@
+import json
+import time
+import asyncio
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError, TimeoutError
+
+from app.db.session import get_redis_db
+from app.core.config import settings
+from app.utils.cache import LRUCache
+
+REVOCATION_CHANNEL = 'session:revocations'
+
+_verified_tokens = LRUCache(maxsize=settings.TOKEN_LOCAL_CACHE_SIZE, ttl=settings.TOKEN_LOCAL_CACHE_TTL_SECONDS)
+_revocation_stats = {'received': 0, 'last_lag_ms': None, 'max_lag_ms': None}
+
+
+def is_token_verified(jti: str, user_id: int) -> bool:
+    return settings.TOKEN_LOCAL_CACHE_ENABLED and _verified_tokens.get(jti) == user_id
+
+
+def remember_verified_token(jti: str, user_id: int, expires_at: float):
+    if not settings.TOKEN_LOCAL_CACHE_ENABLED:
+        return
+    ttl = min(settings.TOKEN_LOCAL_CACHE_TTL_SECONDS, expires_at - time.time())
+    if ttl > 0:
+        _verified_tokens.set(jti, user_id, ttl=ttl)
+
+
+def forget_tokens(jtis: list[str]):
+    for jti in jtis:
+        _verified_tokens.pop(jti)
+
+
+async def broadcast_revocation(redis_client: Redis, jtis: list[str]):
+    """Tell every worker to drop the given jtis from its local cache."""
+    forget_tokens(jtis)
+    if jtis:
+        await redis_client.publish(REVOCATION_CHANNEL, json.dumps({'jtis': jtis, 'sent_at': time.time()}))
+
+
+def _record_revocation(message: dict):
+    data = json.loads(message['data'])
+    forget_tokens(data['jtis'])
+    lag_ms = (time.time() - data['sent_at']) * 1000
+    _revocation_stats['received'] += 1
+    _revocation_stats['last_lag_ms'] = lag_ms
+    _revocation_stats['max_lag_ms'] = max(lag_ms, _revocation_stats['max_lag_ms'] or 0)
+
+
+async def listen_for_revocations():
+    """Long-running task evicting revoked jtis published by any worker."""
+    while True:
+        redis_client = await get_redis_db()
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(REVOCATION_CHANNEL)
+            # anything revoked while we were not subscribed is unknown, so start from scratch
+            _verified_tokens.clear()
+            while True:
+                message = await pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    _record_revocation(message)
+        except (ConnectionError, TimeoutError):
+            _verified_tokens.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.reset()
+
+
+def get_token_cache_stats() -> dict:
+    lookups = _verified_tokens.hits + _verified_tokens.misses
+    return {
+        'enabled': settings.TOKEN_LOCAL_CACHE_ENABLED,
+        'size': len(_verified_tokens),
+        'hits': _verified_tokens.hits,
+        'misses': _verified_tokens.misses,
+        'hit_ratio': _verified_tokens.hits / lookups if lookups else None,
+        'revocations_received': _revocation_stats['received'],
+        'last_revocation_lag_ms': _revocation_stats['last_lag_ms'],
+        'max_revocation_lag_ms': _revocation_stats['max_lag_ms'],
+    }
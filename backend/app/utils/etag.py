@@ -0,0 +1,21 @@
+import hashlib
+from fastapi import Request, Response, status
+
+
+def make_etag(body: str) -> str:
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+def etag_response(request: Request, body: str, etag: str) -> Response:
+    """Serve a pre-serialized JSON body, or an empty 304 when the client already holds this representation."""
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
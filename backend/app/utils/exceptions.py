@@ -36,3 +36,33 @@ class RoleAlreadyAssignedException(Exception):
 
 class UserHasNoThisRoleException(Exception):
     pass
+
+class PasswordHasherBusyException(Exception):
+    pass
+
+class InvalidCursorException(Exception):
+    pass
+
+class ExportFormatUnavailableException(Exception):
+    pass
+
+class NotChoiceQuestionException(Exception):
+    pass
+
+class InvalidSegmentException(Exception):
+    pass
+
+class InvalidTimelineRangeException(Exception):
+    pass
+
+class DuplicateResponseException(Exception):
+    pass
+
+class IdempotencyKeyReusedException(Exception):
+    pass
+
+class IdempotencyKeyInProgressException(Exception):
+    pass
+
+class InvalidAnswersException(Exception):
+    pass
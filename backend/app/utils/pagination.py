@@ -0,0 +1,40 @@
+import json
+import base64
+import binascii
+from typing import Annotated
+from datetime import datetime
+from fastapi import Query, Response
+
+from app.utils.exceptions import InvalidCursorException
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+MAX_PAGE_SIZE = 1000
+
+PageLimit = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+
+PageSkip = Annotated[int, Query(ge=0)]
+
+
+def encode_cursor(sort: str, values: list) -> str:
+    payload = {'sort': sort, 'values': [v.isoformat() if isinstance(v, datetime) else v for v in values]}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str, columns: list) -> list:
+    """Decode an opaque cursor issued for ``sort`` back into values typed like ``columns``."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if payload['sort'] != sort or len(payload['values']) != len(columns):
+            raise InvalidCursorException
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else value
+            for column, value in zip(columns, payload['values'])
+        ]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursorException
+
+
+def set_next_cursor(response: Response, next_cursor: str | None):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
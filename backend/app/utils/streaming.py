@@ -0,0 +1,19 @@
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """Streaming response whose iterator is still reading the request body.
+
+    A plain ``StreamingResponse`` listens for a disconnect on ``receive`` while it streams and would swallow the
+    body chunks; here only the body reader uses ``receive`` and sees a disconnect itself, as ``ClientDisconnect``.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
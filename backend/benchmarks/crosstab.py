@@ -0,0 +1,151 @@
+"""Cross-tab of two choice questions over 5M answers: loading the answer columns with array_agg into Python lists
+(then NumPy), as first shipped, against the packed int8send columns decoded with np.frombuffer.
+
+    python -m benchmarks.crosstab [--responses 2500000] [--repeat 10]
+
+Needs ``DATABASE_URL`` at a migrated database; the survey is seeded under a throwaway user and removed again. Each
+response answers both questions, so there are twice as many answers as responses. The number crunching is the same
+either way, so it is timed once, as part of get_crosstab end to end."""
+import asyncio
+import argparse
+import numpy as np
+from sqlalchemy import select, func, text
+
+from app.db.session import Session, dispose_engine
+from app.models.answer_model import Answer
+from app.core.config import QuestionType
+from app.services.crosstab import load_choice_answers, unpack_columns, get_crosstab
+from benchmarks.seed import BATCH_SIZE, benchmark_user
+from benchmarks.timing import measure_async, report
+
+
+async def seed_survey(user_id: int, responses: int, row_options: int, column_options: int) -> tuple[int, int, int]:
+    """A survey of two single choice questions, each answered by every one of ``responses`` responses."""
+    async with Session() as db:
+        survey_id = await db.scalar(
+            text('INSERT INTO surveys (title, creator_id, is_active) VALUES (:title, :user_id, true) RETURNING id'),
+            {'title': 'Benchmark', 'user_id': user_id},
+        )
+        questions = []
+        for order, options in enumerate((row_options, column_options)):
+            question_id = await db.scalar(
+                text(
+                    'INSERT INTO questions (survey_id, text, type, "order") '
+                    'VALUES (:survey_id, :text, :type, :order) RETURNING id'
+                ),
+                {
+                    'survey_id': survey_id,
+                    'text': f'Question {order}',
+                    'type': QuestionType.SINGLE.value,
+                    'order': order,
+                },
+            )
+            option_ids = (
+                await db.scalars(
+                    text(
+                        'INSERT INTO options (question_id, text) '
+                        "SELECT :question_id, 'Option ' || g FROM generate_series(1, CAST(:options AS integer)) g "
+                        'RETURNING id'
+                    ),
+                    {'question_id': question_id, 'options': options},
+                )
+            ).all()
+            questions.append((question_id, sorted(option_ids)))
+        (row_id, row_option_ids), (column_id, column_option_ids) = questions
+        # the column option leans on the row option, so the table is not uniform
+        insert = text(
+            'WITH new_responses AS ('
+            '  INSERT INTO responses (survey_id, user_id) '
+            '  SELECT :survey_id, :user_id FROM generate_series(1, CAST(:count AS integer)) RETURNING id'
+            '), chosen AS ('
+            '  SELECT id, floor(random() * CAST(:row_count AS integer))::integer AS row_choice FROM new_responses'
+            ') '
+            'INSERT INTO answers (response_id, question_id, option_id) '
+            'SELECT id, CAST(:row_id AS integer), (CAST(:row_options AS integer[]))[row_choice + 1] FROM chosen '
+            'UNION ALL '
+            'SELECT id, CAST(:column_id AS integer), (CAST(:column_options AS integer[]))'
+            '[(row_choice + floor(random() * 2)::integer) % CAST(:column_count AS integer) + 1] FROM chosen'
+        )
+        for start in range(0, responses, BATCH_SIZE):
+            await db.execute(
+                insert,
+                {
+                    'survey_id': survey_id,
+                    'user_id': user_id,
+                    'count': min(BATCH_SIZE, responses - start),
+                    'row_id': row_id,
+                    'row_options': row_option_ids,
+                    'row_count': row_options,
+                    'column_id': column_id,
+                    'column_options': column_option_ids,
+                    'column_count': column_options,
+                },
+            )
+            await db.commit()
+        await db.execute(text('ANALYZE responses'))
+        await db.execute(text('ANALYZE answers'))
+        await db.commit()
+    return survey_id, row_id, column_id
+
+
+async def legacy_load_choice_answers(db, question_ids: list[int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """load_choice_answers as first shipped: three int[] the driver turns into lists of Python ints."""
+    result = await db.execute(
+        select(
+            func.array_agg(Answer.response_id), func.array_agg(Answer.question_id), func.array_agg(Answer.option_id)
+        ).where(Answer.question_id.in_(question_ids), Answer.option_id.is_not(None))
+    )
+    return tuple(np.asarray(column or [], dtype=np.int64) for column in result.one())
+
+
+async def main(responses: int, row_options: int, column_options: int, repeat: int):
+    async with benchmark_user() as user_id:
+        print(f'seeding {responses} responses, {2 * responses} answers...')
+        survey_id, row_id, column_id = await seed_survey(user_id, responses, row_options, column_options)
+        question_ids = [row_id, column_id]
+        async with Session() as db:
+
+            async def array_agg_load():
+                return await legacy_load_choice_answers(db, question_ids)
+
+            async def packed_load():
+                return unpack_columns(await load_choice_answers(db, question_ids))
+
+            async def scan_only():
+                # the same rows counted in Postgres, nothing sent: the floor for any way of shipping them
+                return await db.scalar(
+                    select(func.count()).where(Answer.question_id.in_(question_ids), Answer.option_id.is_not(None))
+                )
+
+            async def crosstab():
+                return await get_crosstab(None, db, survey_id, row_id, column_id)
+
+            # both loads must hand the crosstab the same answers, in whatever order the aggregate collected them
+            before, after = np.stack(await array_agg_load()), np.stack(await packed_load())
+            assert np.array_equal(before[:, np.lexsort(before)], after[:, np.lexsort(after)])
+            table = await crosstab()
+            print(f'{table.total} answer pairs, chi-square {table.chi_square:.1f}, Cramér\'s V {table.cramers_v:.3f}')
+
+            report(
+                f'loading the {2 * responses} answers of two choice questions',
+                {
+                    'array_agg lists (before)': await measure_async(array_agg_load, repeat, warmup=1),
+                    'packed int8send (after)': await measure_async(packed_load, repeat, warmup=1),
+                },
+            )
+            report('counting the same answers in Postgres', {'count(*)': await measure_async(scan_only, repeat)})
+            report(
+                f'get_crosstab end to end, {row_options}x{column_options} table',
+                {'get_crosstab (after)': await measure_async(crosstab, repeat, warmup=1)},
+            )
+    await dispose_engine()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--responses', type=int, default=2_500_000)
+    parser.add_argument('--row-options', type=int, default=5)
+    parser.add_argument('--column-options', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.responses, args.row_options, args.column_options, args.repeat))
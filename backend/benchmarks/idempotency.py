@@ -0,0 +1,85 @@
+"""Load test of retried submissions: clients that resend POST /responses/submit while the first attempt is still in
+flight, without and with an Idempotency-Key.
+
+    python -m benchmarks.idempotency [--clients 100] [--retries 5] [--jitter-ms 50]
+
+Needs ``DATABASE_URL`` at a migrated database and ``REDIS_URL``; the survey is seeded under a throwaway user and
+removed again. The route handler is called directly, each attempt on its own session like a request of its own;
+every client fires its attempts within ``--jitter-ms`` of each other, so most retries overlap the original.
+Postgres writes are counted with a cursor event."""
+import uuid
+import random
+import asyncio
+import argparse
+from fastapi import Response
+from sqlalchemy import event, func, select
+
+from app.db.session import Session, engine, dispose_engine, close_redis_pool, get_redis_db
+from app.models.response_model import Response as ResponseModel
+from app.api.v1.routers import response as response_router
+from app.schemas.response_schema import ResponseSubmit
+from benchmarks.seed import admin_principal, benchmark_user
+from benchmarks.submission import seed_survey
+from benchmarks.timing import summarize
+
+
+async def main(clients: int, retries: int, jitter_ms: int, questions: int):
+    rng = random.Random(0)
+    async with benchmark_user() as user_id:
+        survey_id, answers = await seed_survey(user_id, questions, 4)
+        principal = admin_principal(user_id)
+        obj_in = ResponseSubmit(survey_id=survey_id, answers=answers)
+        redis_client = await get_redis_db()
+        writes = []
+        event.listen(
+            engine.sync_engine,
+            'before_cursor_execute',
+            lambda conn, cursor, statement, *args: writes.append(statement) if statement.startswith('INSERT') else None,
+        )
+
+        async def attempt(key: str | None, replays: list[bool], latencies: list[float]):
+            await asyncio.sleep(rng.uniform(0, jitter_ms / 1000))
+            started = asyncio.get_running_loop().time()
+            http_response = Response()
+            async with Session() as db:
+                await response_router.submit_response(
+                    obj_in, http_response, db, redis_client, principal, idempotency_key=key
+                )
+            latencies.append(asyncio.get_running_loop().time() - started)
+            replays.append(http_response.headers.get('Idempotent-Replayed') == 'true')
+
+        async def count_responses():
+            async with Session() as db:
+                return await db.scalar(
+                    select(func.count()).select_from(ResponseModel).where(ResponseModel.survey_id == survey_id)
+                )
+
+        print(f'{clients} clients sending each submission {retries} times, {len(answers)} answers each')
+        for name, with_key in (('no Idempotency-Key (before)', False), ('Idempotency-Key (after)', True)):
+            writes.clear()
+            replays, latencies = [], []
+            responses_before = await count_responses()
+            started = asyncio.get_running_loop().time()
+            # one key per client, shared by all of its attempts
+            keys = [uuid.uuid4().hex if with_key else None for _ in range(clients)]
+            await asyncio.gather(*(attempt(key, replays, latencies) for key in keys for _ in range(retries)))
+            elapsed = asyncio.get_running_loop().time() - started
+            stored = await count_responses() - responses_before
+            result = summarize(latencies)
+            print(name)
+            print(f'  {len(latencies)} attempts in {elapsed * 1000:.0f} ms, {sum(replays)} replayed')
+            print(f'  {stored} responses stored, {len(writes)} INSERT statements sent to Postgres')
+            print(f"  per attempt: median {result['median_ms']:.1f} ms   p95 {result['p95_ms']:.1f} ms")
+        await redis_client.aclose()
+    await dispose_engine()
+    await close_redis_pool()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--retries', type=int, default=5)
+    parser.add_argument('--jitter-ms', type=int, default=50)
+    parser.add_argument('--questions', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.retries, args.jitter_ms, args.questions))
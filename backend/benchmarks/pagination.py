@@ -0,0 +1,59 @@
+"""Survey listing, page 1 against page 10 000: OFFSET/LIMIT (kept for compatibility) against keyset cursors.
+
+    python -m benchmarks.pagination [--surveys 1000000] [--limit 100] [--page 10000]
+
+Needs ``DATABASE_URL`` at a migrated database; the surveys are seeded under a throwaway user and removed again.
+The cursor for the deep page is the one a client walking the pages would hold, looked up before timing starts."""
+import asyncio
+import argparse
+from sqlalchemy import text
+
+from app.db.session import Session, dispose_engine
+from app.crud.survey_crud import survey
+from app.utils.pagination import encode_cursor
+from benchmarks.seed import admin_principal, benchmark_user, seed_surveys
+from benchmarks.timing import measure_async, report
+
+
+async def main(surveys: int, limit: int, page: int, repeat: int):
+    skip = (page - 1) * limit
+    async with benchmark_user() as user_id:
+        print(f'seeding {surveys} surveys...')
+        await seed_surveys(user_id, surveys)
+        principal = admin_principal(user_id)
+        async with Session() as db:
+            ids = text('SELECT id FROM surveys ORDER BY id OFFSET :skip LIMIT :limit')
+            last_seen = (await db.scalars(ids, {'skip': skip - 1, 'limit': 1})).one()
+            deep_cursor = encode_cursor('id', [last_seen])
+
+            async def offset_page(skip):
+                return await survey.get_surveys(skip=skip, limit=limit, db=db, current_user=principal)
+
+            async def keyset_page(cursor):
+                return await survey.get_surveys_page(cursor=cursor, limit=limit, db=db, current_user=principal)
+
+            # the cursor must land on the same page the offset reaches
+            expected = (await db.scalars(ids, {'skip': skip, 'limit': limit})).all()
+            assert [row.id for row in (await keyset_page(deep_cursor))[0]] == expected
+
+            report(
+                f'page 1 vs page {page} of {limit} surveys',
+                {
+                    'offset, page 1': await measure_async(lambda: offset_page(0), repeat),
+                    f'offset, page {page}': await measure_async(lambda: offset_page(skip), repeat),
+                    'keyset, page 1': await measure_async(lambda: keyset_page(None), repeat),
+                    f'keyset, page {page}': await measure_async(lambda: keyset_page(deep_cursor), repeat),
+                },
+                compare=(f'offset, page {page}', f'keyset, page {page}'),
+            )
+    await dispose_engine()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--surveys', type=int, default=1_000_000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--page', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.surveys, args.limit, args.page, args.repeat))
@@ -0,0 +1,109 @@
+"""has_permission for a user with many roles: the per-call scan it replaced against the compiled index.
+
+    python -m benchmarks.permission_check [--roles 50] [--permissions-per-role 20] [--checks 1000]
+
+Needs no database or Redis; the principal is built in memory."""
+import random
+import asyncio
+import argparse
+from typing import Any
+
+from app.schemas.principal_schema import Principal, PermissionGrant
+from app.services.permission import has_permission
+from benchmarks.timing import measure_async, report
+
+RESOURCES = ['survey', 'question', 'option', 'response', 'user', 'role', 'permission', 'metrics']
+ACTIONS = ['create', 'read', 'list', 'update', 'delete', 'import', 'export', 'search']
+
+
+async def legacy_has_permission(
+    user: Principal, resource: str, action: str, context: dict[str, Any] | None = None
+) -> bool:
+    """has_permission before the index: every grant scanned and the condition closure rebuilt on each call."""
+    context = context or {}
+
+    def evaluate_conditions(conditions: dict[str, Any] | None = None, context: dict[str, Any] | None = None) -> bool:
+        if not conditions:
+            return True
+
+        for condition_key, condition_value in conditions.items():
+            if condition_key == 'self' and condition_value:
+                if context.get('user_id') != context.get('target_user_id'):
+                    return False
+
+            if condition_key == 'creator' and condition_value:
+                if context.get('user_id') != context.get('creator_id'):
+                    return False
+
+        return True
+
+    for permission in user.permissions:
+        if permission.direct:
+            matches = permission.resource == resource and permission.action == action
+        else:
+            matches = (permission.resource == resource or permission.resource == '*') and (
+                permission.action == action or permission.action == '*'
+            )
+        if matches and evaluate_conditions(permission.conditions, context):
+            return True
+
+    return False
+
+
+def make_principal(roles: int, permissions_per_role: int, seed: int = 0) -> Principal:
+    rng = random.Random(seed)
+    grants = []
+    for _ in range(roles * permissions_per_role):
+        conditions = rng.choice([None, None, {'creator': True}, {'self': True}])
+        grants.append(
+            PermissionGrant(resource=rng.choice(RESOURCES), action=rng.choice(ACTIONS), conditions=conditions)
+        )
+    return Principal(id=1, is_active=True, permissions=grants)
+
+
+def make_checks(count: int, seed: int = 1) -> list[tuple[str, str, dict]]:
+    rng = random.Random(seed)
+    return [
+        (
+            rng.choice(RESOURCES + ['unknown']),
+            rng.choice(ACTIONS),
+            {'user_id': 1, 'creator_id': rng.choice([1, 2]), 'target_user_id': rng.choice([1, 2])},
+        )
+        for _ in range(count)
+    ]
+
+
+async def main(roles: int, permissions_per_role: int, checks: int, repeat: int):
+    principal = make_principal(roles, permissions_per_role)
+    batch = make_checks(checks)
+    # both paths must agree before their speed means anything
+    for resource, action, context in batch:
+        expected = await legacy_has_permission(principal, resource, action, context)
+        assert await has_permission(principal, resource, action, context) == expected
+
+    async def run(check):
+        for resource, action, context in batch:
+            await check(principal, resource, action, context)
+
+    async def cold_index():
+        principal._permission_index = None
+        await run(has_permission)
+
+    report(
+        f'{checks} checks, {roles} roles x {permissions_per_role} permissions',
+        {
+            'scan (before)': await measure_async(lambda: run(legacy_has_permission), repeat),
+            'index, built per batch': await measure_async(cold_index, repeat),
+            'index (after)': await measure_async(lambda: run(has_permission), repeat),
+        },
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--roles', type=int, default=50)
+    parser.add_argument('--permissions-per-role', type=int, default=20)
+    parser.add_argument('--checks', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.roles, args.permissions_per_role, args.checks, args.repeat))
@@ -0,0 +1,62 @@
+"""Survey search over a million surveys: the ILIKE '%term%' scan admins had to fall back on against search_surveys
+(tsvector and trigram GIN indexes, ranked).
+
+    python -m benchmarks.search [--surveys 1000000] [--limit 20] [--repeat 20]
+
+Needs ``DATABASE_URL`` at a migrated database with pg_trgm; the surveys are seeded under a throwaway user and
+removed again. Each query is timed for its first page. The trigram index also serves ILIKE, so the scan is timed
+with it dropped inside a transaction that is rolled back afterwards, as before the search migration; that holds
+an exclusive lock on surveys meanwhile, so don't point this at a database in use."""
+import asyncio
+import argparse
+from sqlalchemy import select, text
+
+from app.db.session import Session, dispose_engine
+from app.models.survey_model import Survey
+from app.crud.survey_crud import survey
+from benchmarks.seed import TOPICS, admin_principal, benchmark_user, seed_surveys, survey_token
+from benchmarks.timing import measure_async, report
+
+
+async def main(surveys: int, limit: int, repeat: int):
+    queries = {
+        'one survey by its token': survey_token(surveys // 2),
+        'a topic (5% of surveys)': TOPICS[1],
+        'misspelt topic': 'onbaording survey',
+        'misspelt title': f'Survey {surveys // 3} abuot',
+    }
+    async with benchmark_user() as user_id:
+        print(f'seeding {surveys} surveys...')
+        await seed_surveys(user_id, surveys)
+        principal = admin_principal(user_id)
+        results = {label: {} for label in queries}
+        async with Session() as db:
+            await db.execute(text('DROP INDEX ix_surveys_title_trgm'))
+            for label, query in queries.items():
+
+                async def scan():
+                    return (await db.scalars(select(Survey).where(Survey.title.ilike(f'%{query}%')).limit(limit))).all()
+
+                print(f'{label}: {len(await scan())} ILIKE hits on the first page')
+                results[label]['ILIKE scan (before)'] = await measure_async(scan, repeat)
+            await db.rollback()
+        async with Session() as db:
+            for label, query in queries.items():
+
+                async def search():
+                    return (await survey.search_surveys(query=query, limit=limit, db=db, current_user=principal))[0]
+
+                print(f'{label}: {len(await search())} search hits on the first page')
+                results[label]['search_surveys (after)'] = await measure_async(search, repeat)
+        for label, query in queries.items():
+            report(f'{label}: {query!r}', results[label])
+    await dispose_engine()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--surveys', type=int, default=1_000_000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.surveys, args.limit, args.repeat))
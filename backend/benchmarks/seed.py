@@ -0,0 +1,78 @@
+"""Seeding helpers for the benchmarks that need Postgres. Everything is created under a throwaway user and deleted
+again on exit, so a benchmark can run against a development database."""
+import uuid
+import hashlib
+from contextlib import asynccontextmanager
+from sqlalchemy import text
+
+from app.db.session import Session
+from app.schemas.principal_schema import Principal, PermissionGrant
+
+# rows per statement while seeding and cleaning up, small enough to stay under the statement timeout
+BATCH_SIZE = 50_000
+
+
+def admin_principal(user_id: int) -> Principal:
+    return Principal(
+        id=user_id, is_active=True, permissions=[PermissionGrant(resource='*', action='*', conditions=None)]
+    )
+
+
+@asynccontextmanager
+async def benchmark_user():
+    """Yield the id of a fresh user; its surveys and everything hanging off them are deleted afterwards."""
+    name = f'bench-{uuid.uuid4().hex[:24]}'
+    async with Session() as db:
+        user_id = await db.scalar(
+            text(
+                'INSERT INTO users (username, email, hashed_password, is_active, account_verified) '
+                "VALUES (:name, :email, '-', true, true) RETURNING id"
+            ),
+            {'name': name, 'email': f'{name}@bench.invalid'},
+        )
+        await db.commit()
+    try:
+        yield user_id
+    finally:
+        async with Session() as db:
+            surveys = 'SELECT id FROM surveys WHERE creator_id = :user_id'
+            responses = f'SELECT id FROM responses WHERE survey_id IN ({surveys}) OR user_id = :user_id'
+            # batched so no statement hits the statement timeout; questions and options go with their survey
+            for delete_batch in (
+                f'DELETE FROM answers WHERE id IN '
+                f'(SELECT id FROM answers WHERE response_id IN ({responses}) LIMIT :batch)',
+                f'DELETE FROM responses WHERE id IN ({responses} LIMIT :batch)',
+                f'DELETE FROM surveys WHERE id IN ({surveys} LIMIT :batch)',
+            ):
+                while (await db.execute(text(delete_batch), {'user_id': user_id, 'batch': BATCH_SIZE})).rowcount:
+                    await db.commit()
+            await db.execute(text('DELETE FROM users WHERE id = :user_id'), {'user_id': user_id})
+            await db.commit()
+
+
+TOPICS = [
+    'onboarding', 'pricing', 'support', 'delivery', 'checkout', 'mobile', 'security', 'billing', 'catalog', 'returns',
+    'loyalty', 'newsletter', 'events', 'training', 'hiring', 'benefits', 'workplace', 'commute', 'canteen', 'parking',
+]
+
+
+def survey_token(number: int) -> str:
+    """The word only the ``number``-th seeded survey carries in its title."""
+    return hashlib.md5(str(number).encode()).hexdigest()[:8]
+
+
+async def seed_surveys(user_id: int, count: int):
+    """``count`` surveys titled 'Survey <n> about <topic> <token>': each topic covers 1/20 of them, each token one."""
+    insert = text(
+        'INSERT INTO surveys (title, description, creator_id, is_active) '
+        "SELECT 'Survey ' || g || ' about ' || (CAST(:topics AS text[]))[g % 20 + 1] || ' ' || left(md5(g::text), 8), "
+        "'Benchmark survey number ' || g, :user_id, true "
+        'FROM generate_series(CAST(:start AS integer), CAST(:end AS integer)) g'
+    )
+    async with Session() as db:
+        for start in range(1, count + 1, BATCH_SIZE):
+            end = min(start + BATCH_SIZE - 1, count)
+            await db.execute(insert, {'topics': TOPICS, 'user_id': user_id, 'start': start, 'end': end})
+            await db.commit()
+        await db.execute(text('ANALYZE surveys'))
+        await db.commit()
@@ -0,0 +1,110 @@
+"""Submitting a response to a 50-question survey: a bare response plus one insert per answer, as clients had to do
+before, against submit_response.
+
+    python -m benchmarks.submission [--questions 50] [--options 4] [--repeat 50]
+
+Needs ``DATABASE_URL`` at a migrated database and ``REDIS_URL``; the survey is seeded under a throwaway user and
+removed again. Statements are counted with a cursor event, BEGIN and COMMIT aside."""
+import random
+import asyncio
+import argparse
+from sqlalchemy import event, text
+
+from app.db.session import Session, engine, dispose_engine, close_redis_pool
+from app.models.answer_model import Answer
+from app.models.response_model import Response
+from app.core.config import QuestionType
+from app.crud.response_crud import response
+from app.schemas.answer_schema import AnswerSubmit
+from app.schemas.response_schema import ResponseSubmit
+from benchmarks.seed import admin_principal, benchmark_user
+from benchmarks.timing import measure_async, report
+
+
+async def seed_survey(user_id: int, questions: int, options: int) -> tuple[int, list[AnswerSubmit]]:
+    """A survey of single, multiple choice and text questions and one complete, valid set of answers to it."""
+    rng = random.Random(0)
+    kinds = [QuestionType.SINGLE, QuestionType.MULTIPLE, QuestionType.TEXT]
+    answers = []
+    async with Session() as db:
+        survey_id = await db.scalar(
+            text('INSERT INTO surveys (title, creator_id, is_active) VALUES (:title, :user_id, true) RETURNING id'),
+            {'title': 'Benchmark', 'user_id': user_id},
+        )
+        for order in range(questions):
+            kind = kinds[order % len(kinds)]
+            question_id = await db.scalar(
+                text(
+                    'INSERT INTO questions (survey_id, text, type, "order") '
+                    'VALUES (:survey_id, :text, :type, :order) RETURNING id'
+                ),
+                {'survey_id': survey_id, 'text': f'Question {order}', 'type': kind.value, 'order': order},
+            )
+            if kind == QuestionType.TEXT:
+                answers.append(AnswerSubmit(question_id=question_id, value=f'Answer {order}'))
+                continue
+            option_ids = (
+                await db.scalars(
+                    text(
+                        'INSERT INTO options (question_id, text) '
+                        "SELECT :question_id, 'Option ' || g FROM generate_series(1, :options) g RETURNING id"
+                    ),
+                    {'question_id': question_id, 'options': options},
+                )
+            ).all()
+            chosen = rng.sample(option_ids, 2) if kind == QuestionType.MULTIPLE else [rng.choice(option_ids)]
+            answers += [AnswerSubmit(question_id=question_id, option_id=option_id) for option_id in chosen]
+        await db.commit()
+    return survey_id, answers
+
+
+async def per_answer_submit(survey_id: int, user_id: int, answers: list[AnswerSubmit]):
+    """Before: a bare response, then one request (and transaction) per answer."""
+    async with Session() as db:
+        db_response = Response(survey_id=survey_id, user_id=user_id)
+        db.add(db_response)
+        await db.commit()
+        await db.refresh(db_response)
+        for answer in answers:
+            db_answer = Answer(response_id=db_response.id, **answer.model_dump())
+            db.add(db_answer)
+            await db.commit()
+            await db.refresh(db_answer)
+
+
+async def main(questions: int, options: int, repeat: int):
+    async with benchmark_user() as user_id:
+        survey_id, answers = await seed_survey(user_id, questions, options)
+        principal = admin_principal(user_id)
+        obj_in = ResponseSubmit(survey_id=survey_id, answers=answers)
+
+        async def submit():
+            async with Session() as db:
+                await response.submit_response(db=db, obj_in=obj_in, current_user=principal)
+
+        paths = {
+            'per answer (before)': lambda: per_answer_submit(survey_id, user_id, answers),
+            'submit_response (after)': submit,
+        }
+        statements = []
+        event.listen(engine.sync_engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        counts = {}
+        for name, call in paths.items():
+            statements.clear()
+            await call()
+            counts[name] = len(statements)
+        results = {name: await measure_async(call, repeat) for name, call in paths.items()}
+        report(f'one submission of {len(answers)} answers to {questions} questions', results)
+        for name, count in counts.items():
+            print(f'  {name:<28} {count} statements per submission')
+    await dispose_engine()
+    await close_redis_pool()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--options', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.questions, args.options, args.repeat))
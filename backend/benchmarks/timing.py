@@ -0,0 +1,54 @@
+"""Small timing helpers shared by the benchmark scripts. Run a script from ``backend`` with
+``python -m benchmarks.<name>``."""
+import time
+import statistics
+from collections.abc import Awaitable, Callable
+
+
+def summarize(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        'runs': len(samples),
+        'median_ms': statistics.median(samples) * 1000,
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        'min_ms': samples[0] * 1000,
+    }
+
+
+def measure(call: Callable[[], object], repeat: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def measure_async(call: Callable[[], Awaitable[object]], repeat: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        await call()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def report(title: str, results: dict[str, dict], compare: tuple[str, str] | None = None):
+    """Print one line per measured path and the median speedup of ``compare[1]`` over ``compare[0]``, by default
+    of the last path over the first."""
+    print(title)
+    for name, result in results.items():
+        print(
+            f"  {name:<28} median {result['median_ms']:10.3f} ms   p95 {result['p95_ms']:10.3f} ms"
+            f"   min {result['min_ms']:10.3f} ms   ({result['runs']} runs)"
+        )
+    if len(results) < 2:
+        return
+    before, after = compare or (next(iter(results)), next(reversed(results)))
+    if results[after]['median_ms']:
+        speedup = results[before]['median_ms'] / results[after]['median_ms']
+        print(f'  speedup (median)             {speedup:.1f}x  ({after} over {before})')
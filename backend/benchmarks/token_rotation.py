@@ -0,0 +1,100 @@
+"""Redis side of a login: the sequential SMEMBERS/DEL/SADD/EXPIRE rotation against the one pipelined
+create_sessions call.
+
+    python -m benchmarks.token_rotation [--logins 200] [--concurrency 20]
+
+Needs ``REDIS_URL`` (and the rest of the app settings). Password hashing is left out: it costs the same either
+way and would hide the difference. Round trips are counted on the connections themselves."""
+import asyncio
+import argparse
+from datetime import timedelta
+from redis.asyncio import Redis, ConnectionPool
+from redis.asyncio.connection import Connection
+
+from app.core.config import settings, TokenType
+from app.core.security import create_access_token, create_refresh_token
+from app.services.token import create_sessions
+from benchmarks.timing import measure_async, report
+
+USER_ID_BASE = 10_000_000
+
+
+class CountingConnection(Connection):
+    round_trips = 0
+
+    async def send_packed_command(self, command, check_health=True):
+        CountingConnection.round_trips += 1
+        await super().send_packed_command(command, check_health)
+
+
+async def legacy_update_token(redis_client: Redis, user_id: int, token: str, token_type: TokenType, minutes: int):
+    """update_token_in_redis before the rotation became one pipeline."""
+    token_key = f'user:{user_id}:{token_type}'
+    if await redis_client.smembers(token_key) is not None:
+        await redis_client.delete(token_key)
+    await redis_client.sadd(token_key, token)
+    await redis_client.expire(token_key, timedelta(minutes=minutes))
+
+
+async def legacy_login(redis_client: Redis, user_id: int, tokens: dict[TokenType, str]):
+    await legacy_update_token(
+        redis_client, user_id, tokens[TokenType.ACCESS], TokenType.ACCESS, settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    )
+    await legacy_update_token(
+        redis_client, user_id, tokens[TokenType.REFRESH], TokenType.REFRESH, settings.REFRESH_TOKEN_EXPIRE_MINUTES
+    )
+
+
+async def pipelined_login(redis_client: Redis, user_id: int, tokens: dict[TokenType, str]):
+    await create_sessions(redis_client, user_id, tokens)
+
+
+async def main(logins: int, concurrency: int, repeat: int):
+    pool = ConnectionPool.from_url(str(settings.REDIS_URL), decode_responses=True, connection_class=CountingConnection)
+    redis_client = Redis(connection_pool=pool)
+    tokens = [
+        {TokenType.ACCESS: create_access_token(user_id), TokenType.REFRESH: create_refresh_token(user_id)}
+        for user_id in range(USER_ID_BASE, USER_ID_BASE + logins)
+    ]
+
+    def burst(login):
+        async def run():
+            # ``concurrency`` logins in flight at a time, as behind a busy worker
+            for start in range(0, logins, concurrency):
+                await asyncio.gather(
+                    *(
+                        login(redis_client, USER_ID_BASE + i, tokens[i])
+                        for i in range(start, min(start + concurrency, logins))
+                    )
+                )
+
+        return run
+
+    results, round_trips = {}, {}
+    for name, login in (('sequential (before)', legacy_login), ('pipelined (after)', pipelined_login)):
+        # the first call also opens the connection, count a warm one
+        await login(redis_client, USER_ID_BASE, tokens[0])
+        CountingConnection.round_trips = 0
+        await login(redis_client, USER_ID_BASE, tokens[0])
+        round_trips[name] = CountingConnection.round_trips
+        results[name] = await measure_async(burst(login), repeat)
+
+    report(f'{logins} logins, {concurrency} at a time', results)
+    for name, count in round_trips.items():
+        print(f'  {name:<28} {count} Redis round trips per login')
+
+    keys = [key async for key in redis_client.scan_iter('user:1000*')] + [
+        key async for key in redis_client.scan_iter('session*')
+    ]
+    for start in range(0, len(keys), 1000):
+        await redis_client.delete(*keys[start:start + 1000])
+    await pool.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency, args.repeat))
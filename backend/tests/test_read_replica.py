@@ -0,0 +1,138 @@
+"""Read routing against two local Postgres databases standing in for a primary and its replica.
+
+Run from ``backend`` with ``DATABASE_URL`` and ``DATABASE_REPLICA_URL`` pointing at different databases, plus the
+usual settings (Redis included, the read-your-writes pin lives there)."""
+import os
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+if not (os.environ.get('DATABASE_URL') and os.environ.get('DATABASE_REPLICA_URL')):
+    pytest.skip('DATABASE_URL and DATABASE_REPLICA_URL are not set', allow_module_level=True)
+
+from sqlalchemy import text
+
+from app.api.v1.deps import get_read_db
+from app.core.security import create_access_token
+from app.db.session import (
+    Session,
+    ReadSession,
+    get_db,
+    get_redis_db,
+    primary_pin_key,
+    dispose_engine,
+    close_redis_pool,
+)
+
+USER_ID = 1
+OTHER_USER_ID = 2
+
+
+def run(test):
+    async def main():
+        redis_client = await get_redis_db()
+        await redis_client.delete(primary_pin_key(USER_ID), primary_pin_key(OTHER_USER_ID))
+        try:
+            await test()
+        finally:
+            # engines and the Redis pool are bound to the loop, every test gets a fresh one
+            await dispose_engine()
+            await close_redis_pool()
+
+    asyncio.run(main())
+
+
+async def current_database(db) -> str:
+    return await db.scalar(text('SELECT current_database()'))
+
+
+async def databases() -> tuple[str, str]:
+    async with Session() as primary, ReadSession() as replica:
+        return await current_database(primary), await current_database(replica)
+
+
+async def read_database(token: str | None) -> str:
+    """The database ``get_read_db`` hands to a request carrying ``token``."""
+    request = SimpleNamespace(state=SimpleNamespace())
+    db_session = get_db(request)
+    read_session = get_read_db(await anext(db_session), token)
+    try:
+        return await current_database(await anext(read_session))
+    finally:
+        await read_session.aclose()
+        await db_session.aclose()
+
+
+async def write_as(user_id: int):
+    """Commit a write the way an authenticated request does."""
+    request = SimpleNamespace(state=SimpleNamespace(user_id=user_id))
+    db_session = get_db(request)
+    db = await anext(db_session)
+    await db.execute(text('CREATE TEMP TABLE read_your_writes (id int) ON COMMIT DROP'))
+    await db.commit()
+    with pytest.raises(StopAsyncIteration):
+        await anext(db_session)
+
+
+def test_databases_are_distinct():
+    async def test():
+        primary, replica = await databases()
+        assert primary != replica
+
+    run(test)
+
+
+def test_anonymous_reads_go_to_replica():
+    async def test():
+        _, replica = await databases()
+        assert await read_database(None) == replica
+
+    run(test)
+
+
+def test_reads_go_to_replica_without_recent_writes():
+    async def test():
+        _, replica = await databases()
+        assert await read_database(create_access_token(USER_ID)) == replica
+
+    run(test)
+
+
+def test_reads_go_to_primary_after_write():
+    async def test():
+        primary, _ = await databases()
+        await write_as(USER_ID)
+        assert await read_database(create_access_token(USER_ID)) == primary
+
+    run(test)
+
+
+def test_pin_only_applies_to_the_writer():
+    async def test():
+        _, replica = await databases()
+        await write_as(USER_ID)
+        assert await read_database(create_access_token(OTHER_USER_ID)) == replica
+        assert await read_database(None) == replica
+
+    run(test)
+
+
+def test_reads_return_to_replica_when_pin_expires():
+    async def test():
+        _, replica = await databases()
+        await write_as(USER_ID)
+        redis_client = await get_redis_db()
+        await redis_client.delete(primary_pin_key(USER_ID))
+        assert await read_database(create_access_token(USER_ID)) == replica
+
+    run(test)
+
+
+def test_invalid_token_reads_go_to_replica():
+    async def test():
+        _, replica = await databases()
+        await write_as(USER_ID)
+        assert await read_database('not-a-token') == replica
+
+    run(test)